@@ -188,7 +188,8 @@ export const bookingService = {
         schedule_id: bookingStore.selectedOutbound.schedule_id || bookingStore.selectedOutbound.id,
         flight_number: bookingStore.selectedOutbound.flight_number,
         price: parseFloat(bookingStore.selectedOutbound.price) || 0,
-        class_type: bookingStore.selectedOutbound.class_type || 'Economy',
+        price_quote: bookingStore.selectedOutbound.price_quote,
+        class_type: bookingStore.selectedOutbound.selected_seat_class || bookingStore.selectedOutbound.class_type || 'Economy',
         origin: bookingStore.selectedOutbound.origin,
         destination: bookingStore.selectedOutbound.destination,
         departure_time: bookingStore.selectedOutbound.departure_time,
@@ -200,7 +201,8 @@ export const bookingService = {
         schedule_id: bookingStore.selectedReturn.schedule_id || bookingStore.selectedReturn.id,
         flight_number: bookingStore.selectedReturn.flight_number,
         price: parseFloat(bookingStore.selectedReturn.price) || 0,
-        class_type: bookingStore.selectedReturn.class_type || 'Economy',
+        price_quote: bookingStore.selectedReturn.price_quote,
+        class_type: bookingStore.selectedReturn.selected_seat_class || bookingStore.selectedReturn.class_type || 'Economy',
         origin: bookingStore.selectedReturn.origin,
         destination: bookingStore.selectedReturn.destination,
         departure_time: bookingStore.selectedReturn.departure_time
@@ -303,6 +303,21 @@ class AircraftAdmin(admin.ModelAdmin):
     flight_count.short_description = 'Flights'
 
 
+class SeatLayoutZoneInline(admin.TabularInline):
+    model = SeatLayoutZone
+    extra = 1
+    fields = ('seat_class', 'first_row', 'last_row', 'columns')
+
+
+@admin.register(SeatLayout)
+class SeatLayoutAdmin(admin.ModelAdmin):
+    list_display = ('aircraft', 'columns', 'exit_rows', 'bulkhead_rows', 'extra_legroom_rows', 'updated_at')
+    list_filter = ('aircraft__airline',)
+    search_fields = ('aircraft__model', 'aircraft__airline__name')
+    raw_id_fields = ('aircraft',)
+    inlines = [SeatLayoutZoneInline]
+
+
 @admin.register(Airport)
 class AirportAdmin(admin.ModelAdmin):
     list_display = ('name', 'code', 'city', 'country', 'airport_type', 'is_international', 'is_philippine_airport')
@@ -387,12 +402,15 @@ class ScheduleAdmin(admin.ModelAdmin):
         return "N/A"
     duration.short_description = 'Duration'
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('seat_inventory')
+    
     def seat_count(self, obj):
-        return obj.seats.count()
+        return obj.get_seat_counts()['total_seats']
     seat_count.short_description = 'Total Seats'
     
     def available_seats(self, obj):
-        return obj.seats.filter(is_available=True).count()
+        return obj.get_seat_counts()['available_seats']
     available_seats.short_description = 'Available'
     
     fieldsets = (
@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-18 16:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_seat_inventory(apps, schema_editor):
+    """Backfill SeatInventory counters from existing seats"""
+    Seat = apps.get_model('app', 'Seat')
+    SeatInventory = apps.get_model('app', 'SeatInventory')
+
+    counts = Seat.objects.filter(schedule__isnull=False).values(
+        'schedule_id', 'seat_class_id'
+    ).annotate(
+        total=models.Count('id'),
+        available=models.Count('id', filter=models.Q(is_available=True)),
+    )
+
+    SeatInventory.objects.bulk_create([
+        SeatInventory(
+            schedule_id=row['schedule_id'],
+            seat_class_id=row['seat_class_id'],
+            total_seats=row['total'],
+            available_seats=row['available'],
+        )
+        for row in counts
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_add_ml_price_fields_to_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_seats', models.PositiveIntegerField(default=0)),
+                ('available_seats', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_inventory', to='app.schedule')),
+                ('seat_class', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seat_inventory', to='app.seatclass')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('schedule', 'seat_class'), name='unique_inventory_per_schedule_class')],
+            },
+        ),
+        migrations.RunPython(build_seat_inventory, migrations.RunPython.noop),
+    ]
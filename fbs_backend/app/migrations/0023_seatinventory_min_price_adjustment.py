@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 16:02
+
+from django.db import migrations, models
+
+
+def fill_min_price_adjustment(apps, schema_editor):
+    """Backfill the cheapest available price adjustment per inventory row"""
+    Seat = apps.get_model('app', 'Seat')
+    SeatInventory = apps.get_model('app', 'SeatInventory')
+
+    min_adjustment = Seat.objects.filter(
+        schedule_id=models.OuterRef('schedule_id'),
+        seat_class_id=models.OuterRef('seat_class_id'),
+        is_available=True,
+    ).values('schedule_id').annotate(
+        value=models.Min('price_adjustment')
+    ).values('value')
+
+    SeatInventory.objects.update(min_price_adjustment=models.Subquery(min_adjustment))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_seatinventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seatinventory',
+            name='min_price_adjustment',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Cheapest price adjustment among available seats', max_digits=10, null=True),
+        ),
+        migrations.RunPython(fill_min_price_adjustment, migrations.RunPython.noop),
+    ]
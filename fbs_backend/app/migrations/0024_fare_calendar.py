@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-18 16:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def build_fare_calendar(apps, schema_editor):
+    """Backfill the fare calendar from open schedules and their seat inventory"""
+    SeatInventory = apps.get_model('app', 'SeatInventory')
+    FareCalendar = apps.get_model('app', 'FareCalendar')
+
+    base_price = Coalesce('schedule__ml_base_price', 'schedule__price')
+    rows = SeatInventory.objects.filter(
+        schedule__status='Open', seat_class__isnull=False
+    ).values(
+        origin_id=models.F('schedule__flight__route__origin_airport_id'),
+        destination_id=models.F('schedule__flight__route__destination_airport_id'),
+        day=TruncDate('schedule__departure_time'),
+        class_name=models.F('seat_class__name'),
+    ).annotate(
+        min_open_price=models.Min(base_price, filter=models.Q(available_seats__gt=0)),
+        min_price=models.Min(base_price),
+        available=models.Sum('available_seats'),
+        schedules=models.Count('schedule_id', distinct=True),
+    )
+
+    FareCalendar.objects.bulk_create([
+        FareCalendar(
+            origin_id=row['origin_id'],
+            destination_id=row['destination_id'],
+            date=row['day'],
+            seat_class_name=row['class_name'],
+            min_base_price=row['min_open_price'] if row['min_open_price'] is not None else row['min_price'],
+            available_seats=row['available'] or 0,
+            schedule_count=row['schedules'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_seatinventory_min_price_adjustment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FareCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('seat_class_name', models.CharField(max_length=50)),
+                ('min_base_price', models.DecimalField(blank=True, decimal_places=2, help_text='Cheapest base price among schedules with open seats in this class', max_digits=10, null=True)),
+                ('available_seats', models.PositiveIntegerField(default=0)),
+                ('schedule_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fare_calendar_arrivals', to='app.airport')),
+                ('origin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fare_calendar_departures', to='app.airport')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('origin', 'destination', 'date', 'seat_class_name'), name='unique_fare_per_route_date_class')],
+            },
+        ),
+        migrations.RunPython(build_fare_calendar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 16:16
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_fare_calendar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['status', 'departure_time', 'id'], name='schedule_sort_departure'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('ml_base_price', 'price'), models.F('id'), name='schedule_sort_price'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('arrival_time'), '-', models.F('departure_time')), models.F('id'), name='schedule_sort_duration'),
+        ),
+    ]
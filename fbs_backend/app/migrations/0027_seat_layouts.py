@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_seathold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('columns', models.CharField(default='ABC-DEF', help_text="Seat letters of a row, '-' marks an aisle (e.g. 'ABC-DEF', 'AB-CD')", max_length=20)),
+                ('exit_rows', models.CharField(blank=True, default='', help_text="Rows, e.g. '11,26'", max_length=100)),
+                ('bulkhead_rows', models.CharField(blank=True, default='', help_text="Rows, e.g. '1,5,10'", max_length=100)),
+                ('extra_legroom_rows', models.CharField(blank=True, default='', help_text="Rows, e.g. '5-9'", max_length=100)),
+                ('exit_row_price', models.DecimalField(decimal_places=2, default=Decimal('800.00'), max_digits=10)),
+                ('bulkhead_price', models.DecimalField(decimal_places=2, default=Decimal('300.00'), max_digits=10)),
+                ('extra_legroom_price', models.DecimalField(decimal_places=2, default=Decimal('500.00'), max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('aircraft', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='seat_layout', to='app.aircraft')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SeatLayoutZone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_row', models.PositiveIntegerField()),
+                ('last_row', models.PositiveIntegerField()),
+                ('columns', models.CharField(blank=True, default='', help_text="Seat letters for these rows if they differ from the layout (e.g. 'AC-DF')", max_length=20)),
+                ('layout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zones', to='app.seatlayout')),
+                ('seat_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='layout_zones', to='app.seatclass')),
+            ],
+            options={
+                'ordering': ['first_row'],
+            },
+        ),
+    ]
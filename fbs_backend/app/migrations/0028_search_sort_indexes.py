@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 17:20
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0027_seat_layouts'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='schedule',
+            name='schedule_sort_price',
+        ),
+        migrations.RemoveIndex(
+            model_name='schedule',
+            name='schedule_sort_duration',
+        ),
+        migrations.AddIndex(
+            model_name='airline',
+            index=models.Index(fields=['name', 'id'], name='airline_sort_name'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(models.F('status'), django.db.models.functions.comparison.Coalesce('ml_base_price', 'price'), models.F('id'), name='schedule_sort_price'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(models.F('status'), django.db.models.expressions.CombinedExpression(models.F('arrival_time'), '-', models.F('departure_time')), models.F('id'), name='schedule_sort_duration'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['status', 'flight', 'id'], name='schedule_sort_airline'),
+        ),
+    ]
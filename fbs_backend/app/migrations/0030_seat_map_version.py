@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0029_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatMapVersion',
+            fields=[
+                ('schedule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seat_map_version', serialize=False, to='app.schedule')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 19:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0030_seat_map_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedeemedPriceQuote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quote_id', models.CharField(max_length=32, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('redeemed_at', models.DateTimeField(auto_now_add=True)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redeemed_price_quotes', to='app.schedule')),
+            ],
+        ),
+    ]
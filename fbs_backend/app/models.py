@@ -1,14 +1,20 @@
 # app.models.py
 
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.apps import apps
+import logging
+from collections import Counter
 from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+logger = logging.getLogger('flightapp.pricing')
+
 #User Profile with Roles
 from django.contrib.auth.models import User
 from django.db import models
@@ -115,6 +121,12 @@ class Airline(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10, unique=True)
 
+    class Meta:
+        indexes = [
+            # Airline sort of paginated search results
+            models.Index(fields=['name', 'id'], name='airline_sort_name'),
+        ]
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
@@ -145,6 +157,191 @@ class Aircraft(models.Model):
         return f"{self.model} ({self.airline.code})"
 
 
+class SeatLayout(models.Model):
+    """
+    Seat-map template of an aircraft: seat letters per row (aisles marked
+    with '-'), class zones by row range and feature rows. Seats of the
+    aircraft's schedules are materialized from it with one bulk insert
+    (SeatLayout.materialize); aircraft without a template get a default
+    grid derived from their capacity and the airline's seat classes.
+    """
+    aircraft = models.OneToOneField(Aircraft, on_delete=models.CASCADE, related_name="seat_layout")
+    columns = models.CharField(
+        max_length=20,
+        default="ABC-DEF",
+        help_text="Seat letters of a row, '-' marks an aisle (e.g. 'ABC-DEF', 'AB-CD')"
+    )
+    exit_rows = models.CharField(max_length=100, blank=True, default="", help_text="Rows, e.g. '11,26'")
+    bulkhead_rows = models.CharField(max_length=100, blank=True, default="", help_text="Rows, e.g. '1,5,10'")
+    extra_legroom_rows = models.CharField(max_length=100, blank=True, default="", help_text="Rows, e.g. '5-9'")
+    exit_row_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('800.00'))
+    bulkhead_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('300.00'))
+    extra_legroom_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('500.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Seat layout {self.columns} - {self.aircraft}"
+
+    @staticmethod
+    def parse_rows(text):
+        """'5-9,12' -> {5, 6, 7, 8, 9, 12}"""
+        rows = set()
+        for part in (text or '').replace(' ', '').split(','):
+            if not part:
+                continue
+            if '-' in part:
+                first, last = part.split('-', 1)
+                rows.update(range(int(first), int(last) + 1))
+            else:
+                rows.add(int(part))
+        return rows
+
+    @classmethod
+    def default_for(cls, aircraft, seat_classes):
+        """
+        Unsaved (layout, zones) for an aircraft without a template:
+        premium classes in front, rows shared evenly between classes.
+        """
+        layout = cls(aircraft=aircraft, columns="ABC-DEF" if aircraft.capacity >= 100 else "AB-CD")
+        seats_per_row = len(layout.columns.replace('-', ''))
+        rows = -(-aircraft.capacity // seats_per_row)
+
+        seat_classes = sorted(seat_classes, key=lambda seat_class: -seat_class.price_multiplier)
+        zones = []
+        first_row = 1
+        for i, seat_class in enumerate(seat_classes):
+            # The cheapest class takes the remaining rows
+            count = rows // len(seat_classes) if i < len(seat_classes) - 1 else rows - first_row + 1
+            if count <= 0:
+                continue
+            zones.append(SeatLayoutZone(seat_class=seat_class, first_row=first_row, last_row=first_row + count - 1))
+            first_row += count
+        return layout, zones
+
+    def seat_specs(self, zones, capacity=None):
+        """Field values of every seat of the layout (no schedule), front to back"""
+        exit_rows = self.parse_rows(self.exit_rows)
+        bulkhead_rows = self.parse_rows(self.bulkhead_rows)
+        legroom_rows = self.parse_rows(self.extra_legroom_rows)
+
+        specs = []
+        for zone in sorted(zones, key=lambda zone: zone.first_row):
+            groups = [group for group in (zone.columns or self.columns).split('-') if group]
+            for row in range(zone.first_row, zone.last_row + 1):
+                price_adjustment = Decimal('0.00')
+                if row in legroom_rows:
+                    price_adjustment += self.extra_legroom_price
+                if row in exit_rows:
+                    price_adjustment += self.exit_row_price
+                if row in bulkhead_rows:
+                    price_adjustment += self.bulkhead_price
+
+                for g, group in enumerate(groups):
+                    for position, letter in enumerate(group):
+                        if capacity is not None and len(specs) >= capacity:
+                            return specs
+                        specs.append({
+                            'seat_class_id': zone.seat_class_id,
+                            'seat_number': f"{row}{letter}",
+                            'row': row,
+                            'column': letter,
+                            'is_window': (g == 0 and position == 0) or (g == len(groups) - 1 and position == len(group) - 1),
+                            'is_aisle': (position == len(group) - 1 and g < len(groups) - 1) or (position == 0 and g > 0),
+                            'is_exit_row': row in exit_rows,
+                            'is_bulkhead': row in bulkhead_rows,
+                            'has_extra_legroom': row in legroom_rows,
+                            'price_adjustment': price_adjustment,
+                        })
+        return specs
+
+    @classmethod
+    def specs_for_aircraft(cls, aircraft):
+        """Seat specs from the aircraft's template, else the default grid"""
+        layout = cls.objects.filter(aircraft=aircraft).prefetch_related('zones').first()
+        if layout is not None:
+            return layout.seat_specs(layout.zones.all())
+
+        seat_classes = list(SeatClass.objects.filter(airline_id=aircraft.airline_id))
+        if not seat_classes:
+            # Fallback to default seat classes
+            seat_classes = list(SeatClass.objects.filter(airline__isnull=True))
+        if not seat_classes:
+            return []
+        layout, zones = cls.default_for(aircraft, seat_classes)
+        return layout.seat_specs(zones, capacity=aircraft.capacity)
+
+    @classmethod
+    def materialize(cls, schedules, refresh_calendar=True):
+        """
+        Create the seats (and seat inventory) of new schedules: one bulk
+        insert for all seats, one for the inventory rows. Returns seats created.
+        Pass refresh_calendar=False when the Schedule signals already
+        refresh the fare calendar days.
+        """
+        schedules = list(schedules)
+        specs_by_aircraft = {}
+        seats = []
+        inventory = {}
+
+        for schedule in schedules:
+            aircraft = schedule.flight.aircraft
+            if aircraft.id not in specs_by_aircraft:
+                specs_by_aircraft[aircraft.id] = cls.specs_for_aircraft(aircraft)
+
+            for spec in specs_by_aircraft[aircraft.id]:
+                seats.append(Seat(schedule_id=schedule.id, is_available=True, **spec))
+                counts = inventory.setdefault((schedule.id, spec['seat_class_id']), [0, None])
+                counts[0] += 1
+                if counts[1] is None or spec['price_adjustment'] < counts[1]:
+                    counts[1] = spec['price_adjustment']
+
+        if not seats:
+            return 0
+
+        now = timezone.now()
+        with transaction.atomic():
+            Seat.objects.bulk_create(seats, batch_size=2000)
+            SeatInventory.objects.bulk_create([
+                SeatInventory(
+                    schedule_id=schedule_id,
+                    seat_class_id=seat_class_id,
+                    total_seats=total,
+                    available_seats=total,
+                    min_price_adjustment=min_adjustment,
+                    updated_at=now,
+                )
+                for (schedule_id, seat_class_id), (total, min_adjustment) in inventory.items()
+            ], batch_size=2000)
+
+        if refresh_calendar:
+            FareCalendar.queue_refresh([schedule.id for schedule in schedules])
+        return len(seats)
+
+
+class SeatLayoutZone(models.Model):
+    """Rows of a seat layout sold as one seat class"""
+    layout = models.ForeignKey(SeatLayout, on_delete=models.CASCADE, related_name="zones")
+    seat_class = models.ForeignKey(SeatClass, on_delete=models.CASCADE, related_name="layout_zones")
+    first_row = models.PositiveIntegerField()
+    last_row = models.PositiveIntegerField()
+    columns = models.CharField(
+        max_length=20,
+        blank=True,
+        default="",
+        help_text="Seat letters for these rows if they differ from the layout (e.g. 'AC-DF')"
+    )
+
+    class Meta:
+        ordering = ['first_row']
+
+    def __str__(self):
+        return f"{self.seat_class.name}: rows {self.first_row}-{self.last_row}"
+
+    def clean(self):
+        if self.last_row < self.first_row:
+            raise ValidationError("last_row must not be before first_row")
+
+
 # ============================================================
 # AIRPORT (WITH DOMESTIC / INTERNATIONAL TYPE)
 # ============================================================
@@ -273,6 +470,12 @@ class Schedule(models.Model):
             models.Index(fields=['flight', 'departure_time']),
             # Add index for ML price queries
             models.Index(fields=['ml_base_price', 'status']),
+            # Stable (key, id) sorts of paginated search results
+            models.Index(fields=['status', 'departure_time', 'id'], name='schedule_sort_departure'),
+            models.Index('status', Coalesce('ml_base_price', 'price'), 'id', name='schedule_sort_price'),
+            models.Index('status', F('arrival_time') - F('departure_time'), 'id', name='schedule_sort_duration'),
+            # Airline sort: airlines by name (airline_sort_name), then their schedules
+            models.Index(fields=['status', 'flight', 'id'], name='schedule_sort_airline'),
         ]
 
     def __str__(self):
@@ -306,48 +509,83 @@ class Schedule(models.Model):
         return self.status == "Open"
     
     
+    def get_ml_flight_data(self):
+        """Flight data dict consumed by the ML price predictor"""
+        return {
+            'schedule_id': self.id,
+            'flight_number': self.flight.flight_number,
+            'airline_code': self.flight.airline.code,
+            'airline_name': self.flight.airline.name,
+            'origin': self.flight.route.origin_airport.code,
+            'destination': self.flight.route.destination_airport.code,
+            'departure_time': self.departure_time.isoformat(),
+            'arrival_time': self.arrival_time.isoformat(),
+            'total_stops': 0,
+            'is_domestic': self.flight.route.is_domestic,
+        }
+
+    def get_seat_counts(self):
+        """Total/available seats from SeatInventory (uses prefetched seat_inventory)"""
+        inventory = self.seat_inventory.all()
+        return {
+            'total_seats': sum(row.total_seats for row in inventory),
+            'available_seats': sum(row.available_seats for row in inventory),
+        }
+
     def update_ml_price(self, save=True):
         """Update the ML predicted price for this schedule"""
+        updated = Schedule.bulk_update_ml_prices([self], save=save)
+        if updated:
+            return True, self.ml_base_price
+        return False, None
+    
+    @classmethod
+    def bulk_update_ml_prices(cls, schedules, save=True):
+        """
+        Update ML predicted prices for many schedules at once.
+        Builds one feature matrix, makes a single model call and writes
+        the results back with one bulk_update. Returns the updated schedules.
+        """
+        schedules = list(schedules)
+        if not schedules:
+            return []
+        
         try:
             # Import inside the method to avoid circular imports
             from flightapp.ml.predictor import predictor
             
             # Check if model is loaded - if not, try to load it
             if not predictor.model:
-                print(f"⚠️ Schedule {self.id}: ML model not loaded, attempting to load...")
+                print(f"⚠️ ML model not loaded, attempting to load...")
                 predictor.load_model()
                 
                 if not predictor.model:
-                    print(f"❌ Schedule {self.id}: Failed to load ML model")
-                    return False, None
+                    print(f"❌ Failed to load ML model")
+                    return []
             
-            flight_data = {
-                'schedule_id': self.id,
-                'flight_number': self.flight.flight_number,
-                'airline_code': self.flight.airline.code,
-                'airline_name': self.flight.airline.name,
-                'origin': self.flight.route.origin_airport.code,
-                'destination': self.flight.route.destination_airport.code,
-                'departure_time': self.departure_time.isoformat(),
-                'arrival_time': self.arrival_time.isoformat(),
-                'total_stops': 0,
-                'is_domestic': self.flight.route.is_domestic,
-            }
+            flight_data_list = [schedule.get_ml_flight_data() for schedule in schedules]
+            predicted_prices = predictor.predict_prices(flight_data_list)
             
-            predicted_price = Decimal(str(predictor.predict_price(flight_data)))
-            self.ml_base_price = predicted_price
-            self.ml_price_updated_at = timezone.now()
+            now = timezone.now()
+            for schedule, predicted_price in zip(schedules, predicted_prices):
+                schedule.ml_base_price = Decimal(str(predicted_price)).quantize(Decimal('0.01'))
+                schedule.ml_price_updated_at = now
             
             if save:
-                self.save(update_fields=['ml_base_price', 'ml_price_updated_at'])
+                cls.objects.bulk_update(schedules, ['ml_base_price', 'ml_price_updated_at'])
+                FareCalendar.queue_refresh([schedule.id for schedule in schedules])
+
+                # Seat maps show the base price
+                from flightapp.services.seat_map import seat_maps
+                seat_maps.invalidate_many([schedule.id for schedule in schedules])
             
-            print(f"✅ Schedule {self.id}: ML price updated to ₱{predicted_price:,.2f}")
-            return True, predicted_price
+            print(f"✅ ML prices updated for {len(schedules)} schedules")
+            return schedules
         except Exception as e:
-            print(f"❌ Error updating ML price for schedule {self.id}: {e}")
+            print(f"❌ Error updating ML prices for {len(schedules)} schedules: {e}")
             import traceback
             traceback.print_exc()
-            return False, None
+            return []
         # ===================================================
 
 
@@ -396,6 +634,61 @@ class Seat(models.Model):
     def __str__(self):
         return f"{self.seat_number} - {self.seat_class.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember where the seat was counted in SeatInventory
+        instance._inventory_key = (instance.__dict__.get('schedule_id'), instance.__dict__.get('seat_class_id'))
+        instance._loaded_price_adjustment = instance.__dict__.get('price_adjustment')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the seat and keep SeatInventory counters in the same transaction"""
+        update_fields = kwargs.get('update_fields')
+
+        with transaction.atomic():
+            if self._state.adding:
+                super().save(*args, **kwargs)
+                SeatInventory.adjust(
+                    self.schedule_id, self.seat_class_id,
+                    total=1, available=1 if self.is_available else 0
+                )
+                self._inventory_key = (self.schedule_id, self.seat_class_id)
+                self._loaded_price_adjustment = self.price_adjustment
+                return
+
+            old_key = getattr(self, '_inventory_key', (self.schedule_id, self.seat_class_id))
+            new_key = (self.schedule_id, self.seat_class_id)
+
+            # Flip availability with a conditional UPDATE: the row lock makes
+            # concurrent reservations of the same seat count only once.
+            flipped = 0
+            if update_fields is None or 'is_available' in update_fields:
+                flipped = Seat.objects.filter(pk=self.pk).exclude(
+                    is_available=self.is_available
+                ).update(is_available=self.is_available)
+
+            super().save(*args, **kwargs)
+
+            if old_key != new_key:
+                # Seat moved to another schedule/class
+                was_available = self.is_available != bool(flipped)
+                SeatInventory.adjust(*old_key, total=-1, available=-1 if was_available else 0)
+                SeatInventory.adjust(*new_key, total=1, available=1 if self.is_available else 0)
+                self._inventory_key = new_key
+            elif flipped:
+                SeatInventory.adjust(*new_key, available=1 if self.is_available else -1)
+            elif self._price_adjustment_changed():
+                # Counts unchanged, refresh min_price_adjustment only
+                SeatInventory.adjust(*new_key)
+            self._loaded_price_adjustment = self.price_adjustment
+
+    def _price_adjustment_changed(self):
+        loaded = getattr(self, '_loaded_price_adjustment', None)
+        if loaded is None or self.price_adjustment is None:
+            return loaded != self.price_adjustment
+        return Decimal(str(loaded)) != Decimal(str(self.price_adjustment))
+
     @property
     def seat_code(self):
         """Return seat code like '1A'"""
@@ -432,6 +725,266 @@ class Seat(models.Model):
         return features
 
 
+class SeatInventory(models.Model):
+    """
+    Denormalized seat counts per schedule and seat class.
+    Maintained by Seat.save() / seat deletion, so search and pricing read
+    these numbers instead of counting app_seat rows.
+    Search reads one row per (schedule, seat class) from this table.
+    """
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name="seat_inventory")
+    seat_class = models.ForeignKey(SeatClass, on_delete=models.CASCADE, related_name="seat_inventory", null=True)
+    total_seats = models.PositiveIntegerField(default=0)
+    available_seats = models.PositiveIntegerField(default=0)
+    min_price_adjustment = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Cheapest price adjustment among available seats"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['schedule', 'seat_class'],
+                name='unique_inventory_per_schedule_class'
+            )
+        ]
+
+    def __str__(self):
+        seat_class = self.seat_class.name if self.seat_class else 'Unassigned'
+        return f"{self.schedule_id} {seat_class}: {self.available_seats}/{self.total_seats}"
+
+    @classmethod
+    def adjust(cls, schedule_id, seat_class_id, total=0, available=0):
+        """
+        Apply seat count deltas for one (schedule, seat class).
+        min_price_adjustment is recomputed in the same UPDATE.
+        """
+        if not schedule_id:
+            return
+
+        min_adjustment = Seat.objects.filter(
+            schedule_id=models.OuterRef('schedule_id'),
+            seat_class_id=models.OuterRef('seat_class_id'),
+            is_available=True,
+        ).values('schedule_id').annotate(
+            value=models.Min('price_adjustment')
+        ).values('value')
+
+        updated = cls.objects.filter(
+            schedule_id=schedule_id, seat_class_id=seat_class_id
+        ).update(
+            total_seats=models.F('total_seats') + total,
+            available_seats=models.F('available_seats') + available,
+            min_price_adjustment=models.Subquery(min_adjustment),
+            updated_at=timezone.now(),
+        )
+
+        # First seat of this class (or counters never built) - recount
+        if not updated and total >= 0:
+            cls.rebuild([schedule_id])
+        elif updated and (total or available):
+            FareCalendar.queue_refresh([schedule_id])
+
+    @classmethod
+    def adjust_seats(cls, seats, available):
+        """
+        Apply an available-seat delta per seat, grouped into one UPDATE per
+        (schedule, seat class) (after a bulk Seat.is_available update).
+        """
+        deltas = Counter((seat.schedule_id, seat.seat_class_id) for seat in seats)
+        # Same row order in every transaction
+        for (schedule_id, seat_class_id), count in sorted(deltas.items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+            cls.adjust(schedule_id, seat_class_id, available=available * count)
+
+    @classmethod
+    def rebuild(cls, schedule_ids):
+        """
+        Recount inventory for schedules from their seats (after bulk seat
+        writes). Rows are upserted rather than deleted and re-inserted, so a
+        concurrent recount or adjust() cannot hit the unique constraint.
+        """
+        schedule_ids = list(schedule_ids)
+        if not schedule_ids:
+            return
+
+        counts = Seat.objects.filter(schedule_id__in=schedule_ids).values(
+            'schedule_id', 'seat_class_id'
+        ).annotate(
+            total=models.Count('id'),
+            available=models.Count('id', filter=models.Q(is_available=True)),
+            min_adjustment=models.Min('price_adjustment', filter=models.Q(is_available=True)),
+        )
+
+        now = timezone.now()
+        rows = [
+            cls(
+                schedule_id=row['schedule_id'],
+                seat_class_id=row['seat_class_id'],
+                total_seats=row['total'],
+                available_seats=row['available'],
+                min_price_adjustment=row['min_adjustment'],
+                updated_at=now,
+            )
+            for row in counts
+        ]
+        with transaction.atomic():
+            # Classes with no seats left keep a zeroed row
+            cls.objects.filter(schedule_id__in=schedule_ids).update(
+                total_seats=0, available_seats=0, min_price_adjustment=None, updated_at=now
+            )
+            cls.objects.bulk_create(
+                [row for row in rows if row.seat_class_id is not None],
+                update_conflicts=True,
+                unique_fields=['schedule', 'seat_class'],
+                update_fields=['total_seats', 'available_seats', 'min_price_adjustment', 'updated_at'],
+            )
+            # A NULL seat class never conflicts in the unique constraint
+            for row in rows:
+                if row.seat_class_id is None:
+                    cls.objects.update_or_create(
+                        schedule_id=row.schedule_id,
+                        seat_class=None,
+                        defaults={
+                            'total_seats': row.total_seats,
+                            'available_seats': row.available_seats,
+                            'min_price_adjustment': row.min_price_adjustment,
+                        },
+                    )
+
+        FareCalendar.queue_refresh(schedule_ids)
+
+
+class FareCalendar(models.Model):
+    """
+    Precomputed low-fare calendar: cheapest ML base price and open seats per
+    route, departure day and seat class (seat classes are grouped by name
+    across airlines). Kept current by FareCalendar.refresh() whenever a
+    schedule, its ML price or its seat inventory changes, so a month of fares
+    is one range scan of the unique index.
+    """
+    origin = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="fare_calendar_departures")
+    destination = models.ForeignKey(Airport, on_delete=models.CASCADE, related_name="fare_calendar_arrivals")
+    date = models.DateField()
+    seat_class_name = models.CharField(max_length=50)
+    min_base_price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Cheapest base price among schedules with open seats in this class"
+    )
+    available_seats = models.PositiveIntegerField(default=0)
+    schedule_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['origin', 'destination', 'date', 'seat_class_name'],
+                name='unique_fare_per_route_date_class'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.origin_id}-{self.destination_id} {self.date} {self.seat_class_name}: {self.min_base_price}"
+
+    @classmethod
+    def keys_for_schedules(cls, schedule_ids):
+        """{(origin_id, destination_id, date)} the schedules currently fall on"""
+        rows = Schedule.objects.filter(id__in=list(schedule_ids)).values_list(
+            'flight__route__origin_airport_id',
+            'flight__route__destination_airport_id',
+            'departure_time',
+        )
+        return {
+            (origin_id, destination_id, timezone.localtime(departure_time).date())
+            for origin_id, destination_id, departure_time in rows
+        }
+
+    @classmethod
+    def queue_refresh(cls, schedule_ids=(), keys=()):
+        """Refresh the days of these schedules (and extra keys) after commit"""
+        schedule_ids = [schedule_id for schedule_id in schedule_ids if schedule_id]
+        keys = set(keys)
+        if not schedule_ids and not keys:
+            return
+
+        def refresh():
+            try:
+                cls.refresh(keys | cls.keys_for_schedules(schedule_ids))
+            except Exception as e:
+                logger.exception("Fare calendar refresh failed: %s", e)
+
+        transaction.on_commit(refresh)
+
+    @classmethod
+    def refresh(cls, keys):
+        """Recompute the rows of these (origin_id, destination_id, date) keys"""
+        keys = set(keys)
+        if not keys:
+            return
+
+        # One aggregate over SeatInventory for every day being refreshed
+        days = models.Q()
+        for origin_id, destination_id, day in keys:
+            days |= models.Q(
+                schedule__flight__route__origin_airport_id=origin_id,
+                schedule__flight__route__destination_airport_id=destination_id,
+                schedule__departure_time__date=day,
+            )
+
+        base_price = models.functions.Coalesce('schedule__ml_base_price', 'schedule__price')
+        open_seats = models.Q(available_seats__gt=0)
+        rows = SeatInventory.objects.filter(
+            days, schedule__status='Open', seat_class__isnull=False
+        ).values(
+            origin_id=models.F('schedule__flight__route__origin_airport_id'),
+            destination_id=models.F('schedule__flight__route__destination_airport_id'),
+            day=models.functions.TruncDate('schedule__departure_time'),
+            class_name=models.F('seat_class__name'),
+        ).annotate(
+            min_open_price=models.Min(base_price, filter=open_seats),
+            min_price=models.Min(base_price),
+            available=models.Sum('available_seats'),
+            schedules=models.Count('schedule_id', distinct=True),
+        )
+
+        now = timezone.now()
+        fares = [
+            cls(
+                origin_id=row['origin_id'],
+                destination_id=row['destination_id'],
+                date=row['day'],
+                seat_class_name=row['class_name'],
+                # Sold-out days still show a price, flagged by available_seats=0
+                min_base_price=row['min_open_price'] if row['min_open_price'] is not None else row['min_price'],
+                available_seats=row['available'] or 0,
+                schedule_count=row['schedules'],
+                updated_at=now,
+            )
+            for row in rows
+        ]
+
+        with transaction.atomic():
+            if fares:
+                cls.objects.bulk_create(
+                    fares,
+                    update_conflicts=True,
+                    unique_fields=['origin', 'destination', 'date', 'seat_class_name'],
+                    update_fields=['min_base_price', 'available_seats', 'schedule_count', 'updated_at'],
+                )
+
+            # Drop classes / days that no longer have open schedules
+            stale = models.Q()
+            for origin_id, destination_id, day in keys:
+                stale |= models.Q(origin_id=origin_id, destination_id=destination_id, date=day)
+            cls.objects.filter(stale, updated_at__lt=now).delete()
+
+
 class SeatClassFeature(models.Model):
     """Model for storing seat class features dynamically"""
     seat_class = models.ForeignKey(SeatClass, on_delete=models.CASCADE, related_name='features')
@@ -1325,6 +1878,151 @@ class BookingDetail(models.Model):
         """Get total price including insurance"""
         return self.price + self.insurance_cost + self.tax_amount
 
+class SeatHold(models.Model):
+    """
+    Short-lived hold on a seat while its booking waits for payment.
+    The seat is unavailable during the hold. Payment turns it into a firm
+    assignment (SeatHold.confirm); an expired hold gives the seat back
+    (SeatHold.release, run in batches by the seat hold sweeper).
+    """
+    seat = models.OneToOneField(Seat, on_delete=models.CASCADE, related_name="hold")
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="seat_holds")
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name="seat_holds")
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Seat {self.seat_id} held for booking {self.booking_id} until {self.expires_at}"
+
+    @classmethod
+    def ttl(cls):
+        from django.conf import settings
+        return timezone.timedelta(seconds=getattr(settings, 'SEAT_HOLD_TTL_SECONDS', 900))
+
+    @classmethod
+    def place(cls, seat_id, booking):
+        """
+        Hold a seat for a pending booking. Returns the seat, or None when it
+        is taken (booked, or held by another booking).
+        """
+        with transaction.atomic():
+            seat = Seat.objects.select_for_update(of=('self',)).select_related('seat_class').filter(pk=seat_id).first()
+            if seat is None:
+                return None
+
+            held_by_booking = cls.objects.filter(seat=seat, booking=booking).exists()
+            if not seat.is_available and not held_by_booking:
+                return None
+
+            if seat.is_available:
+                seat.is_available = False
+                seat.save()  # Also decrements SeatInventory
+
+            cls.objects.update_or_create(
+                seat=seat,
+                defaults={
+                    'booking': booking,
+                    'schedule_id': seat.schedule_id,
+                    'expires_at': timezone.now() + cls.ttl(),
+                }
+            )
+            return seat
+
+    @classmethod
+    def place_many(cls, seat_ids, booking):
+        """
+        Hold several seats for a pending booking: one lock, one seat UPDATE,
+        one hold INSERT and one inventory UPDATE per seat class. Returns
+        {seat id: seat} of the seats held; taken seats are left out. Seat
+        signals do not fire, so callers refresh seat maps and cached searches.
+        """
+        seat_ids = {seat_id for seat_id in seat_ids if seat_id}
+        if not seat_ids:
+            return {}
+
+        with transaction.atomic():
+            seats = list(
+                Seat.objects.select_for_update(of=('self',)).select_related('seat_class').filter(
+                    pk__in=seat_ids
+                ).order_by('id')
+            )
+            held = set(
+                cls.objects.filter(seat__in=seats, booking=booking).values_list('seat_id', flat=True)
+            )
+            placed = {seat.id: seat for seat in seats if seat.is_available or seat.id in held}
+            if not placed:
+                return {}
+
+            newly_taken = [seat for seat in placed.values() if seat.is_available]
+            if newly_taken:
+                Seat.objects.filter(id__in=[seat.id for seat in newly_taken]).update(is_available=False)
+                for seat in newly_taken:
+                    seat.is_available = False
+
+            expires_at = timezone.now() + cls.ttl()
+            cls.objects.bulk_create(
+                [
+                    cls(seat=seat, booking=booking, schedule_id=seat.schedule_id, expires_at=expires_at)
+                    for seat in placed.values()
+                ],
+                update_conflicts=True,
+                unique_fields=['seat'],
+                update_fields=['booking', 'schedule', 'expires_at'],
+            )
+            SeatInventory.adjust_seats(newly_taken, available=-1)
+        return placed
+
+    @classmethod
+    def confirm(cls, booking):
+        """Payment received: the booking's held seats become firm"""
+        deleted, _ = cls.objects.filter(booking=booking).delete()
+        return deleted
+
+    @classmethod
+    def release(cls, holds, limit=None):
+        """
+        Drop holds in bulk and give their seats back: one UPDATE for the
+        seats, one for the pending booking details pointing at them and one
+        inventory UPDATE per seat class. Holds of confirmed
+        bookings are only dropped. Holds locked by a concurrent payment are
+        skipped. Returns (holds dropped, seats released, schedule ids).
+        """
+        with transaction.atomic():
+            rows = holds.select_for_update(skip_locked=True).order_by('expires_at').values_list(
+                'id', 'seat_id', 'schedule_id', 'booking_id', 'booking__status'
+            )
+            rows = list(rows[:limit] if limit else rows)
+            if not rows:
+                return 0, 0, set()
+
+            cls.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+            released = [row for row in rows if row[4] != 'Confirmed']
+            if not released:
+                return len(rows), 0, set()
+
+            seat_ids = [row[1] for row in released]
+            schedule_ids = {row[2] for row in released}
+            # Only seats actually given back change the counters
+            freed = list(
+                Seat.objects.select_for_update().filter(id__in=seat_ids, is_available=False).only(
+                    'id', 'schedule_id', 'seat_class_id'
+                ).order_by('id')
+            )
+            Seat.objects.filter(id__in=[seat.id for seat in freed]).update(is_available=True)
+            BookingDetail.objects.filter(
+                seat_id__in=seat_ids,
+                booking_id__in={row[3] for row in released},
+            ).update(seat=None)
+            SeatInventory.adjust_seats(freed, available=1)
+
+        return len(rows), len(freed), schedule_ids
+
+    @classmethod
+    def release_expired(cls, now=None, limit=None):
+        return cls.release(cls.objects.filter(expires_at__lte=now or timezone.now()), limit=limit)
+
+
 # ============================================================
 # SIGNAL TO CREATE INSURANCE RECORD WHEN ADDED
 # ============================================================
@@ -1364,51 +2062,21 @@ def create_insurance_record_if_needed(sender, instance, created, **kwargs):
 @receiver(post_save, sender=Schedule)
 def create_seats_for_schedule(sender, instance, created, **kwargs):
     """
-    Auto-generate seats when a new schedule is created.
+    Auto-generate seats when a new schedule is created, from the aircraft's
+    seat layout template (one bulk insert).
     """
     if created:
-        from django.db import transaction
-        
-        # Import the models directly instead of using apps.get_model
-        from .models import SeatClass, Seat
-        
-        aircraft = instance.flight.aircraft
-        
-        with transaction.atomic():
-            # Get airline's seat classes or default classes
-            seat_classes = SeatClass.objects.filter(
-                airline=instance.flight.airline
-            ).order_by('price_multiplier')
-            
-            if not seat_classes.exists():
-                # Fallback to default seat classes
-                seat_classes = SeatClass.objects.filter(airline__isnull=True)
-            
-            if seat_classes.exists():
-                # Distribute seats across classes
-                total_capacity = aircraft.capacity
-                seats_per_class = total_capacity // seat_classes.count()
-                remaining_seats = total_capacity % seat_classes.count()
-                
-                seat_number = 1
-                seats_to_create = []
-                
-                for i, seat_class in enumerate(seat_classes):
-                    # Add extra seats to first class if uneven distribution
-                    class_capacity = seats_per_class + (1 if i < remaining_seats else 0)
-                    
-                    for j in range(class_capacity):
-                        seats_to_create.append(Seat(
-                            schedule=instance,
-                            seat_class=seat_class,
-                            seat_number=f"{seat_number:03d}",
-                            row=None,  # Add required fields
-                            column=None,
-                            is_available=True
-                        ))
-                        seat_number += 1
-                
-                Seat.objects.bulk_create(seats_to_create)
+        # The Schedule post_save receiver in flightapp.signals refreshes the fare calendar
+        SeatLayout.materialize([instance], refresh_calendar=False)
+
+
+@receiver(post_delete, sender=Seat)
+def release_seat_inventory(sender, instance, **kwargs):
+    """Remove a deleted seat from its SeatInventory counters"""
+    SeatInventory.adjust(
+        instance.schedule_id, instance.seat_class_id,
+        total=-1, available=-1 if instance.is_available else 0
+    )
 
 
 # ============================================================
@@ -1628,6 +2296,71 @@ class TrackLog(models.Model):
         return f"{self.user.username} - {self.action}"
 
 
+# ============================================================
+# CACHE VERSIONS
+# ============================================================
+class DataVersion(models.Model):
+    """
+    Version token of a dataset cached in memory by every worker process
+    (reference data, tax rules, ...), replaced when the dataset changes.
+    Read through flightapp/services/data_versions.py.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    token = models.CharField(max_length=32)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} @ {self.token}"
+
+
+
+class RedeemedPriceQuote(models.Model):
+    """
+    A search price quote used by a booking (flightapp/services/price_quotes.py).
+    Inserted inside the booking transaction: the unique quote_id makes each
+    quote single-use across every worker process. Rows are purged once the
+    quote has expired.
+    """
+    quote_id = models.CharField(max_length=32, unique=True)
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name="redeemed_price_quotes")
+    expires_at = models.DateTimeField(db_index=True)
+    redeemed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.quote_id} ({self.schedule_id})"
+
+
+class SeatMapVersion(models.Model):
+    """
+    Seat-map version of a schedule, bumped inside the transaction of every
+    seat change (flightapp/services/seat_map.py). Kept apart from Schedule
+    so a full Schedule.save() cannot write back an older number.
+    """
+    schedule = models.OneToOneField(
+        Schedule, on_delete=models.CASCADE, primary_key=True, related_name="seat_map_version"
+    )
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.schedule_id} v{self.version}"
+
+    @classmethod
+    def bump(cls, schedule_ids):
+        """Next version for these schedules, in the current transaction"""
+        schedule_ids = sorted({schedule_id for schedule_id in schedule_ids if schedule_id})
+        if not schedule_ids:
+            return
+
+        versions = cls.objects.filter(schedule_id__in=schedule_ids)
+        if versions.update(version=F('version') + 1) < len(schedule_ids):
+            # First change of some schedule; bumping twice only skips a number
+            cls.objects.bulk_create(
+                [cls(schedule_id=schedule_id) for schedule_id in schedule_ids],
+                ignore_conflicts=True,
+            )
+            versions.update(version=F('version') + 1)
+
+
 # ============================================================
 # UTILITY FUNCTIONS FOR SEAT BOOKING
 # ============================================================
@@ -1645,7 +2378,7 @@ def reserve_seat_with_lock(seat_id, booking_detail_id):
             if not seat.is_available:
                 raise ValueError("Seat is already booked")
             
-            # Update seat availability
+            # Update seat availability (and SeatInventory, same transaction)
             seat.is_available = False
             seat.save()
             
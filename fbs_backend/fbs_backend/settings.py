@@ -160,6 +160,99 @@ CACHES = {
     }
 }
 
+# Shared schedule search results (seconds); also invalidated on schedule/seat changes
+SCHEDULE_SEARCH_CACHE_TTL = 60
+
+# Cursor-paginated search (?sort=price|departure|duration|airline, prefix '-' for descending)
+SCHEDULE_SEARCH_PAGE_SIZE = 20
+SCHEDULE_SEARCH_MAX_PAGE_SIZE = 100
+SCHEDULE_SEARCH_MAX_FLEX_DAYS = 7      # widest ?flex_days=N window
+
+# Background ML price refresh (flightapp/ml/price_refresh.py)
+ML_PRICE_TTL_SECONDS = 3600             # stored ML price validity
+ML_PRICE_REFRESH_AHEAD_SECONDS = 600    # refresh this long before expiry
+ML_PRICE_REFRESH_INTERVAL = 60          # seconds between scheduler ticks
+ML_PRICE_REFRESH_BATCH_SIZE = 200       # schedules per model call
+ML_PRICE_REFRESH_IN_PROCESS = True      # False when running refresh_ml_prices as a worker; an advisory lock keeps one refresher at a time
+
+# Signed search price quotes redeemed by create_booking (flightapp/services/price_quotes.py)
+PRICE_QUOTE_TTL_SECONDS = 900           # how long a searched price can be booked
+PRICE_QUOTE_REQUIRED = True             # False accepts client prices when no quote is sent
+
+# Connecting-itinerary search (flightapp/services/connection_search.py)
+CONNECTION_MIN_MINUTES = 45             # minimum connection time
+CONNECTION_MAX_LAYOVER_MINUTES = 360    # longest layover offered
+CONNECTION_INDEX_TTL = 600              # seconds before an unchanged day is rebuilt anyway
+
+# Compact seat maps with delta polling (flightapp/services/seat_map.py)
+SEAT_MAP_HISTORY_TTL = 1800             # seconds a seat-map version can be diffed against
+
+# Seat availability push (flightapp/services/seat_events.py): /api/seat-stream/ (SSE), /api/seat-updates/ (long-poll)
+SEAT_EVENT_BROKER = 'flightapp.services.seat_events.LocalSeatEventBroker'  # in-process fan-out
+SEAT_EVENT_POLL_SECONDS = 2             # listeners re-read the seat-map version (DB) this often
+SEAT_STREAM_HEARTBEAT_SECONDS = 15
+SEAT_STREAM_MAX_SECONDS = 300           # EventSource reconnects and resumes via Last-Event-ID
+SEAT_STREAM_MAX_CONNECTIONS = 20        # open streams per process (each holds a worker thread); beyond it 503
+
+# Seat holds during checkout (app.models.SeatHold, flightapp/services/seat_holds.py)
+SEAT_HOLD_TTL_SECONDS = 900             # unpaid bookings keep their seats this long
+SEAT_HOLD_SWEEP_INTERVAL = 60           # seconds between expiry sweeps
+SEAT_HOLD_SWEEP_BATCH_SIZE = 500        # holds released per transaction
+SEAT_HOLD_SWEEP_IN_PROCESS = True       # False when running release_seat_holds as a worker
+
+# Automatic seat assignment for passengers without a selected seat (flightapp/services/seat_assignment.py)
+SEAT_AUTO_ASSIGN = True
+
+# Recurring timetables (flightapp/services/timetable.py, manage.py generate_timetable)
+TIMETABLE_BATCH_SIZE = 500              # schedules (and their seats) written per transaction
+
+# Reference data served from memory with ETags (flightapp/services/reference_data.py)
+REFERENCE_DATA_MAX_VARIANTS = 64        # query-string variants kept per dataset
+
+# In-memory caches of every worker check their version tokens (app.DataVersion)
+# at most this often (seconds): how long another worker's change can take to show
+DATA_VERSION_CHECK_SECONDS = 2
+
+# Cross-process sliding-window demand counters (flightapp/services/demand_tracker.py)
+DEMAND_TRACKER_PATH = BASE_DIR / 'demand.sqlite3'
+
+# Hot-path logging: pricing and booking creation log per flight/passenger at
+# DEBUG; QUIET_HOT_PATHS keeps them at WARNING (defaults to on when DEBUG is off)
+QUIET_HOT_PATHS = config('QUIET_HOT_PATHS', default=not DEBUG, cast=bool)
+
+# Sampled pricing traces (flightapp/ml/pricing_trace.py), read via /api/pricing-traces/
+PRICING_TRACE_SAMPLE_RATE = config('PRICING_TRACE_SAMPLE_RATE', default=0, cast=int)  # 1 in N searches, 0 = off
+PRICING_TRACE_BUFFER_SIZE = 1000        # flights kept in the ring buffer
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'flightapp.pricing': {
+            'handlers': ['console'],
+            'level': 'WARNING' if QUIET_HOT_PATHS else 'DEBUG',
+            'propagate': False,
+        },
+        'flightapp.booking': {
+            'handlers': ['console'],
+            'level': 'WARNING' if QUIET_HOT_PATHS else 'DEBUG',
+            'propagate': False,
+        },
+    },
+}
+
 # Session configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 3600  # 1 hour
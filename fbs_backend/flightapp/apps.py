@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class FlightappConfig(AppConfig):
     name = 'flightapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
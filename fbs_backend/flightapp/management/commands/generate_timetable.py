@@ -0,0 +1,175 @@
+# flightapp/management/commands/generate_timetable.py
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from app.models import Flight
+from flightapp.services.timetable import timetable, TimetablePattern
+
+
+class Command(BaseCommand):
+    help = 'Create the schedules (and seats) of a recurring timetable in bulk; safe to re-run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--flight',
+            action='append',
+            default=[],
+            help='Flight number (repeat for several flights)',
+        )
+        parser.add_argument(
+            '--all-flights',
+            action='store_true',
+            help='Apply the pattern to every flight',
+        )
+        parser.add_argument(
+            '--days',
+            default='daily',
+            help="Weekdays: 'daily', 'mon,wed,fri', 'mon-fri' or ISO digits like '135' (default: daily)",
+        )
+        parser.add_argument(
+            '--times',
+            help="Departure times, e.g. '08:00,17:30'",
+        )
+        parser.add_argument(
+            '--start',
+            help='First date YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--end',
+            help='Last date YYYY-MM-DD (default: start + --weeks)',
+        )
+        parser.add_argument(
+            '--weeks',
+            type=int,
+            default=26,
+            help='Length of the timetable when --end is not given (default: 26)',
+        )
+        parser.add_argument(
+            '--duration',
+            type=int,
+            help="Block time in minutes (default: the flight's latest schedule)",
+        )
+        parser.add_argument(
+            '--price',
+            help='Schedule price (default: route base price)',
+        )
+        parser.add_argument(
+            '--file',
+            help='JSON list of timetable lines with the keys flight, days, times, start, end, duration, price',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be created',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Schedules per transaction (default: TIMETABLE_BATCH_SIZE)',
+        )
+
+    def _date(self, value, default):
+        if not value:
+            return default
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid date: {value}")
+
+    def _pattern(self, flight, line):
+        start = self._date(line.get('start'), timezone.localdate())
+        end = self._date(line.get('end'), start + timedelta(weeks=line.get('weeks') or 26) - timedelta(days=1))
+        if end < start:
+            raise CommandError(f"End date {end} is before start date {start}")
+        duration = line.get('duration')
+        price = line.get('price')
+        if price is not None:
+            # Schedule.price is DecimalField(max_digits=10, decimal_places=2)
+            try:
+                price = Decimal(str(price))
+                valid = price.is_finite() and 0 <= price < 10 ** 8
+            except InvalidOperation:
+                valid = False
+            if not valid:
+                raise CommandError(f"Invalid price: {line.get('price')}")
+        return TimetablePattern(
+            flight=flight,
+            weekdays=timetable.parse_weekdays(line.get('days')),
+            departure_times=timetable.parse_times(line.get('times') or ''),
+            start_date=start,
+            end_date=end,
+            duration=timedelta(minutes=int(duration)) if duration else None,
+            price=price,
+        )
+
+    def handle(self, *args, **options):
+        if options['file']:
+            try:
+                with open(options['file']) as f:
+                    lines = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read timetable file: {e}")
+        else:
+            if not options['times']:
+                raise CommandError('--times is required (or use --file)')
+            if not options['flight'] and not options['all_flights']:
+                raise CommandError('Give --flight or --all-flights (or use --file)')
+            line = {
+                'days': options['days'],
+                'times': options['times'],
+                'start': options['start'],
+                'end': options['end'],
+                'weeks': options['weeks'],
+                'duration': options['duration'],
+                'price': options['price'],
+            }
+            if options['all_flights']:
+                lines = [dict(line, flight=None)]
+            else:
+                lines = [dict(line, flight=number) for number in options['flight']]
+
+        flights = {
+            flight.flight_number: flight
+            for flight in Flight.objects.select_related(
+                'aircraft', 'route__origin_airport', 'route__destination_airport'
+            )
+        }
+
+        patterns = []
+        try:
+            for line in lines:
+                if line.get('flight') is None:
+                    patterns.extend(self._pattern(flight, line) for flight in flights.values())
+                    continue
+                flight = flights.get(line['flight'])
+                if flight is None:
+                    raise CommandError(f"Flight {line['flight']} not found")
+                patterns.append(self._pattern(flight, line))
+
+            started = time.monotonic()
+            result = timetable.generate(
+                patterns, dry_run=options['dry_run'], batch_size=options['batch_size']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.monotonic() - started
+        if result['dry_run']:
+            self.stdout.write(
+                f"🔍 Dry run: {result['created']} schedules ({result['seats']} seats) would be created, "
+                f"{result['existing']} of {result['planned']} departures already exist"
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Created {result['created']} schedules and {result['seats']} seats in {elapsed:.2f}s "
+                f"({result['existing']} of {result['planned']} departures already existed)"
+            )
+        )
@@ -0,0 +1,54 @@
+# flightapp/management/commands/refresh_ml_prices.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from flightapp.ml.price_refresh import price_refresh_scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run the ML price refresh scheduler (set ML_PRICE_REFRESH_IN_PROCESS = False in the web process)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Refresh everything currently due, then exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Seconds between ticks (default: ML_PRICE_REFRESH_INTERVAL)',
+        )
+    
+    def handle(self, *args, **options):
+        # Force load the ML model before processing schedules
+        self.stdout.write("🔄 Loading ML model...")
+        from flightapp.ml.predictor import predictor
+        if not predictor.model:
+            predictor.load_model()
+        if not predictor.model:
+            self.stdout.write(self.style.ERROR("❌ Failed to load ML model"))
+            return
+        self.stdout.write(self.style.SUCCESS("✅ ML Model loaded successfully!"))
+        
+        if options['once']:
+            started = time.monotonic()
+            refreshed = price_refresh_scheduler.run_once()
+            if refreshed is None:
+                self.stdout.write(self.style.WARNING("⚠️ Another process is refreshing ML prices, nothing done"))
+                return
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Refreshed {refreshed} schedules in {time.monotonic() - started:.2f}s"
+                )
+            )
+            return
+        
+        self.stdout.write("🔁 Refreshing ML prices ahead of expiry (Ctrl+C to stop)...")
+        try:
+            price_refresh_scheduler.run_forever(interval=options['interval'])
+        except KeyboardInterrupt:
+            price_refresh_scheduler.stop()
+            self.stdout.write("Stopped")
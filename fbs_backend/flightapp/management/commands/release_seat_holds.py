@@ -0,0 +1,41 @@
+# flightapp/management/commands/release_seat_holds.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from flightapp.services.seat_holds import seat_hold_sweeper
+
+
+class Command(BaseCommand):
+    help = 'Release expired seat holds (set SEAT_HOLD_SWEEP_IN_PROCESS = False in the web process)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Release everything currently expired, then exit',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Seconds between sweeps (default: SEAT_HOLD_SWEEP_INTERVAL)',
+        )
+    
+    def handle(self, *args, **options):
+        if options['once']:
+            started = time.monotonic()
+            released = seat_hold_sweeper.run_once()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✅ Released {released} seats in {time.monotonic() - started:.2f}s"
+                )
+            )
+            return
+        
+        self.stdout.write("🔁 Releasing expired seat holds (Ctrl+C to stop)...")
+        try:
+            seat_hold_sweeper.run_forever(interval=options['interval'])
+        except KeyboardInterrupt:
+            seat_hold_sweeper.stop()
+            self.stdout.write("Stopped")
@@ -1,10 +1,14 @@
 # flightapp/management/commands/update_ml_prices.py
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import time
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from django.db import connections
 from django.db.models import Q
 from app.models import Schedule
 from decimal import Decimal
 from datetime import timedelta
+from flightapp.ml.price_refresh import init_refresh_worker, refresh_schedule_chunk
 
 class Command(BaseCommand):
     help = 'Update ML predicted prices for all open schedules'
@@ -26,6 +30,18 @@ class Command(BaseCommand):
             type=int,
             help='Update specific schedule ID only',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Worker processes, each loading the model once (default: 1, in-process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Schedules per model call / bulk_update (default: 500)',
+        )
     
     def handle(self, *args, **options):
         # Force load the ML model before processing schedules
@@ -63,53 +79,68 @@ class Command(BaseCommand):
                     Q(ml_price_updated_at__lt=cutoff_time)
                 )
         
-        total = schedules.count()
+        schedule_ids = []
+        skipped = 0
+        for schedule_id, flight_number, departure_time in schedules.values_list(
+            'id', 'flight__flight_number', 'departure_time'
+        ):
+            # Skip if departure is in the past
+            if departure_time < timezone.now():
+                skipped += 1
+                self.stdout.write(
+                    self.style.WARNING(f"  ⏭️  {flight_number}: Departure in past, skipping")
+                )
+                continue
+            schedule_ids.append(schedule_id)
+        
+        total = len(schedule_ids) + skipped
         if total == 0:
             self.stdout.write(self.style.SUCCESS("No schedules need updating"))
             return
         
         self.stdout.write(f"Found {total} schedules to update...")
         
+        chunk_size = max(options['chunk_size'], 1)
+        workers = max(options['workers'], 1)
+        chunks = [
+            schedule_ids[i:i + chunk_size]
+            for i in range(0, len(schedule_ids), chunk_size)
+        ]
+        
         updated = 0
         failed = 0
-        skipped = 0
+        started = time.monotonic()
         
-        for i, schedule in enumerate(schedules, 1):
-            try:
-                # Show progress
-                if i % 10 == 0:
-                    self.stdout.write(f"  Progress: {i}/{total}")
-                
-                # Skip if departure is in the past
-                if schedule.departure_time < timezone.now():
-                    skipped += 1
-                    self.stdout.write(
-                        self.style.WARNING(f"  ⏭️  {schedule.flight.flight_number}: Departure in past, skipping")
-                    )
-                    continue
-                
-                # Update ML price
-                success, price = schedule.update_ml_price(save=True)
-                
-                if success:
-                    updated += 1
+        self.stdout.write(
+            f"  Predicting prices for {len(schedule_ids)} schedules "
+            f"in {len(chunks)} chunks of {chunk_size} ({workers} worker{'s' if workers > 1 else ''})..."
+        )
+        
+        for chunk_index, rows, chunk_failed, seconds in self._run_chunks(chunks, workers):
+            updated += len(rows)
+            failed += chunk_failed
+            
+            # Per-schedule lines only with -v 2 (a season is thousands of rows)
+            if options['verbosity'] >= 2:
+                for flight_number, price, departure_time in rows:
                     self.stdout.write(
                         self.style.SUCCESS(
-                            f"  ✓ {schedule.flight.flight_number}: "
-                            f"₱{price:,.2f} ({schedule.departure_time.strftime('%Y-%m-%d %H:%M')})"
+                            f"  ✓ {flight_number}: "
+                            f"₱{price:,.2f} ({departure_time.strftime('%Y-%m-%d %H:%M')})"
                         )
                     )
-                else:
-                    failed += 1
-                    self.stdout.write(
-                        self.style.ERROR(f"  ✗ {schedule.id}: Failed to update")
-                    )
-                    
-            except Exception as e:
-                failed += 1
-                self.stdout.write(
-                    self.style.ERROR(f"  ✗ {schedule.id}: {str(e)[:100]}")
+            
+            rate = len(rows) / seconds if seconds > 0 else 0
+            style = self.style.SUCCESS if not chunk_failed else self.style.ERROR
+            self.stdout.write(
+                style(
+                    f"  {'✓' if not chunk_failed else '✗'} chunk {chunk_index + 1}/{len(chunks)}: "
+                    f"{len(rows)} updated, {chunk_failed} failed in {seconds:.2f}s ({rate:,.1f}/s)"
                 )
+            )
+        
+        elapsed = time.monotonic() - started
+        throughput = updated / elapsed if elapsed > 0 else 0
         
         # Summary
         self.stdout.write("\n" + "=" * 60)
@@ -119,7 +150,26 @@ class Command(BaseCommand):
                 f"   Total: {total}\n"
                 f"   Updated: {updated}\n"
                 f"   Failed: {failed}\n"
-                f"   Skipped: {skipped}"
+                f"   Skipped: {skipped}\n"
+                f"   Time: {elapsed:.2f}s ({throughput:,.1f} schedules/s)"
             )
         )
-        self.stdout.write("=" * 60)
\ No newline at end of file
+        self.stdout.write("=" * 60)
+    
+    def _run_chunks(self, chunks, workers):
+        """Yield refresh_schedule_chunk results, in-process or from a process pool"""
+        if workers == 1 or len(chunks) <= 1:
+            for chunk_index, chunk in enumerate(chunks):
+                yield refresh_schedule_chunk(chunk_index, chunk)
+            return
+        
+        # Children must open their own database connections
+        connections.close_all()
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_refresh_worker) as pool:
+            futures = [
+                pool.submit(refresh_schedule_chunk, chunk_index, chunk)
+                for chunk_index, chunk in enumerate(chunks)
+            ]
+            for future in as_completed(futures):
+                yield future.result()
@@ -3,8 +3,58 @@ import random
 import hashlib
 from datetime import datetime, timedelta
 from decimal import Decimal
+import logging
 import numpy as np
 
+from .pricing_trace import pricing_trace
+
+logger = logging.getLogger('flightapp.pricing')
+
+class PricingContext:
+    """
+    Per-request pricing inputs shared by every flight in a search:
+    the user's booking count / loyalty tier, session hash and current time.
+    """
+    
+    def __init__(self, user=None, session_id=None, now=None):
+        self.user = user
+        self.session_id = session_id
+        self.now = now or datetime.now()
+        self.session_hash = self.hash_session(session_id) if session_id else None
+        self.booking_count = self._count_bookings(user)
+        self.loyalty_tier = self._loyalty_tier(user, self.booking_count)
+    
+    @staticmethod
+    def hash_session(session_id):
+        """Stable per-session hash used by the randomization factor"""
+        hash_input = f"random_{session_id}"
+        return int(hashlib.md5(hash_input.encode()).hexdigest()[:8], 16)
+    
+    @staticmethod
+    def _count_bookings(user):
+        if not user or user.is_anonymous:
+            return None
+        try:
+            from app.models import Booking
+            return Booking.objects.filter(user=user).count()
+        except:
+            return None
+    
+    @staticmethod
+    def _loyalty_tier(user, booking_count):
+        if not user or user.is_anonymous:
+            return 'anonymous'
+        if booking_count is None:
+            return 'returning'
+        if booking_count == 0:
+            return 'new'
+        elif booking_count >= 5:
+            return 'loyal'
+        elif booking_count >= 2:
+            return 'regular'
+        return 'returning'
+
+
 class DynamicPricingService:
     """Dynamic pricing based on user, session, and real-time factors"""
     
@@ -34,73 +84,111 @@ class DynamicPricingService:
                 if self._predictor and self._predictor.model:
                     # Only log once at startup
                     if not hasattr(self, '_logged_connected'):
-                        print("✅ DynamicPricing: ML model connected")
+                        logger.info("DynamicPricing: ML model connected")
                         self._logged_connected = True
             except ImportError:
                 self._predictor = None
         return self._predictor
 
 
-    def get_price_for_user(self, flight_data, user=None, session_id=None):
+    def get_price_for_user(self, flight_data, user=None, session_id=None, base_price=None):
         """
         Generate different prices for different users/sessions
+        Pass base_price (e.g. the stored ML base price) to skip the model call.
+        For many flights in one request use build_context() + price_many().
         """
-        # 1. Get base ML prediction
-        base_price = self.get_base_ml_price(flight_data)
-        
-        # 2. Apply dynamic factors
-        price = base_price
-        
-        # DEBUG: Print base price
-        print(f"📊 Base price: ₱{base_price:.2f}")
-        
-        # User-specific factors
-        user_factor = self.get_user_factor(user, flight_data)
-        price *= user_factor
-        print(f"👤 User factor: {user_factor:.3f} → ₱{price:.2f}")
-        
-        # Session-specific factors
-        session_factor = self.get_session_factor(session_id, flight_data)
-        price *= session_factor
-        print(f"🆔 Session factor: {session_factor:.3f} → ₱{price:.2f}")
-        
-        # Real-time demand factor
-        demand_factor = self.get_demand_factor(flight_data)
-        price *= demand_factor
-        print(f"📈 Demand factor: {demand_factor:.3f} → ₱{price:.2f}")
-        
-        # Time-based factor
-        time_factor = self.get_time_factor(flight_data)
-        price *= time_factor
-        print(f"⏰ Time factor: {time_factor:.3f} → ₱{price:.2f}")
+        context = self.build_context(user=user, session_id=session_id)
+        return self.price_many([flight_data], context, base_prices=[base_price])[0]
+    
+    def build_context(self, user=None, session_id=None):
+        """Build the per-request PricingContext (one booking-count query per user)"""
+        return PricingContext(user=user, session_id=session_id)
+    
+    def price_many(self, flights, context, base_prices=None):
+        """
+        Price a list of flight_data dicts for one user/session.
+        base_prices (optional, same order) skip the model call per flight.
+        Session visit and flight demand counters are read with one query each
+        and session visits are recorded with one atomic write.
+        """
+        if base_prices is None:
+            base_prices = [None] * len(flights)
         
-        # Inventory factor
-        inventory_factor = self.get_inventory_factor(flight_data)
-        price *= inventory_factor
-        print(f"💺 Inventory factor: {inventory_factor:.3f} → ₱{price:.2f}")
+        visit_counts = self._get_session_visit_counts(context, flights)
+        demand_counts = self._get_flight_demand_counts(flights)
         
-        # Randomization
-        random_factor = self.get_randomization_factor(session_id)
-        price *= random_factor
-        print(f"🎲 Random factor: {random_factor:.3f} → ₱{price:.2f}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        trace = pricing_trace.should_sample()
         
-        # 4. Round to nice number
-        final_price = self.round_price(price)
+        results = []
+        for flight_data, base_price in zip(flights, base_prices):
+            # 1. Get base ML prediction
+            if base_price is None:
+                base_price = self.get_base_ml_price(flight_data)
+            
+            # 2. Apply dynamic factors
+            price = base_price
+            
+            
+            # User-specific factors
+            user_factor = self.get_user_factor(context.user, flight_data, context=context)
+            price *= user_factor
+            
+            # Session-specific factors
+            session_factor = self.get_session_factor(
+                context.session_id, flight_data, context=context, visit_counts=visit_counts
+            )
+            price *= session_factor
+            
+            # Real-time demand factor
+            demand_factor = self.get_demand_factor(flight_data, context=context, demand_counts=demand_counts)
+            price *= demand_factor
+            
+            # Time-based factor
+            time_factor = self.get_time_factor(flight_data)
+            price *= time_factor
+            
+            # Inventory factor
+            inventory_factor = self.get_inventory_factor(flight_data)
+            price *= inventory_factor
+            
+            # Randomization
+            random_factor = self.get_randomization_factor(context.session_id, context=context)
+            price *= random_factor
+            
+            # 4. Round to nice number
+            final_price = self.round_price(price)
+            
+            result = {
+                'base_price': float(base_price),
+                'final_price': float(final_price),
+                'factors_applied': {
+                    'user_factor': float(user_factor),
+                    'session_factor': float(session_factor),
+                    'demand_factor': float(demand_factor),
+                    'time_factor': float(time_factor),
+                    'inventory_factor': float(inventory_factor),
+                    'randomization': float(random_factor)
+                }
+            }
+            results.append(result)
+            
+            # One structured line per flight (off in quiet mode)
+            if debug:
+                logger.debug(
+                    "price schedule=%s flight=%s base=%.2f user=%.3f session=%.3f "
+                    "demand=%.3f time=%.3f inventory=%.3f random=%.3f final=%.2f",
+                    flight_data.get('schedule_id'), flight_data.get('flight_number'),
+                    base_price, user_factor, session_factor, demand_factor,
+                    time_factor, inventory_factor, random_factor, final_price
+                )
+            if trace:
+                pricing_trace.record(flight_data, result)
         
-        print(f"💰 FINAL PRICE: ₱{final_price:.2f}\n")
+        if visit_counts is not None:
+            self._record_session_visits(context, flights)
         
-        return {
-            'base_price': float(base_price),
-            'final_price': float(final_price),
-            'factors_applied': {
-                'user_factor': float(user_factor),
-                'session_factor': float(session_factor),
-                'demand_factor': float(demand_factor),
-                'time_factor': float(time_factor),
-                'inventory_factor': float(inventory_factor),
-                'randomization': float(random_factor)
-            }
-        }
+        return results
     
     def get_base_ml_price(self, flight_data):
         """Get base price from ML model - returns 0 if fails"""
@@ -115,27 +203,57 @@ class DynamicPricingService:
         """Fallback base price calculation - now returns 0"""
         return 0.0
     
-    def get_user_factor(self, user, flight_data):
+    # Price factor per loyalty tier (see PricingContext.loyalty_tier)
+    LOYALTY_FACTORS = {
+        'anonymous': 1.05,
+        'new': 1.03,
+        'returning': 1.0,
+        'regular': 0.97,
+        'loyal': 0.92,
+    }
+    
+    def get_user_factor(self, user, flight_data, context=None):
         """Different prices based on user history/loyalty"""
-        if not user or user.is_anonymous:
-            return 1.05
-        
+        if context is None:
+            context = self.build_context(user=user)
+        return self.LOYALTY_FACTORS.get(context.loyalty_tier, 1.0)
+    
+    def _session_flight_key(self, session_id, flight_data):
+        from flightapp.services.demand_tracker import demand_tracker
+        return demand_tracker.session_flight_key(session_id, flight_data.get('flight_number', ''))
+    
+    def _get_session_visit_counts(self, context, flights):
+        """Session visits (last hour) for these flights (one read)"""
+        if not context.session_id:
+            return None
         try:
-            from app.models import Booking
-            previous_bookings = Booking.objects.filter(user=user).count()
-            
-            if previous_bookings == 0:
-                return 1.03
-            elif previous_bookings >= 5:
-                return 0.92
-            elif previous_bookings >= 2:
-                return 0.97
+            from flightapp.services.demand_tracker import demand_tracker
+            keys = [self._session_flight_key(context.session_id, f) for f in flights]
+            return demand_tracker.counts(keys, window='1h')
+        except:
+            return None
+    
+    def _record_session_visits(self, context, flights):
+        """Record one visit per priced flight (one atomic write)"""
+        try:
+            from flightapp.services.demand_tracker import demand_tracker
+            demand_tracker.record(
+                [self._session_flight_key(context.session_id, f) for f in flights]
+            )
         except:
             pass
-        
-        return 1.0
     
-    def get_session_factor(self, session_id, flight_data):
+    def _get_flight_demand_counts(self, flights):
+        """Searches in the last hour for these flights (one read)"""
+        try:
+            from flightapp.services.demand_tracker import demand_tracker
+            return demand_tracker.flight_demand(
+                {f.get('flight_number', '') for f in flights}, window='1h'
+            )
+        except:
+            return None
+    
+    def get_session_factor(self, session_id, flight_data, context=None, visit_counts=None):
         """Different prices for each browsing session"""
         if not session_id:
             return 1.0
@@ -145,27 +263,33 @@ class DynamicPricingService:
         factor = 0.98 + (hash_value % 5) / 100
         
         try:
-            from django.core.cache import cache
-            cache_key = f"session_flight_{session_id}_{flight_data.get('flight_number', '')}"
-            visit_count = cache.get(cache_key, 0)
+            visit_key = self._session_flight_key(session_id, flight_data)
+            if visit_counts is not None:
+                # Batched by price_many(): visits are recorded once at the end
+                visit_count = visit_counts.get(visit_key, 0)
+                visit_counts[visit_key] = visit_count + 1
+            else:
+                from flightapp.services.demand_tracker import demand_tracker
+                visit_count = demand_tracker.counts([visit_key], window='1h')[visit_key]
+                demand_tracker.record([visit_key])
             
             if visit_count > 0:
                 factor *= (1 + (min(visit_count, 5) * 0.01))
-            
-            cache.set(cache_key, visit_count + 1, 3600)
         except:
             pass
         
         return factor
     
-    def get_demand_factor(self, flight_data):
+    def get_demand_factor(self, flight_data, context=None, demand_counts=None):
         """Real-time demand pricing"""
         factor = 1.0
         
         try:
-            from django.core.cache import cache
-            flight_key = f"flight_demand_{flight_data.get('flight_number', '')}"
-            search_count = cache.get(flight_key, 0)
+            # Searches for this flight in the last hour, across all workers
+            flight_number = flight_data.get('flight_number', '')
+            if demand_counts is None:
+                demand_counts = self._get_flight_demand_counts([flight_data]) or {}
+            search_count = demand_counts.get(flight_number, 0)
             
             if search_count > 100:
                 factor *= 1.15
@@ -181,7 +305,8 @@ class DynamicPricingService:
             if isinstance(departure, str):
                 departure = datetime.fromisoformat(departure.replace('Z', '+00:00'))
             
-            days_until = (departure - datetime.now()).days
+            now = context.now if context else datetime.now()
+            days_until = (departure - now).days
             
             if days_until < 3:
                 factor *= 1.25
@@ -224,40 +349,45 @@ class DynamicPricingService:
     def get_inventory_factor(self, flight_data):
         """Inventory-based pricing"""
         try:
-            from app.models import Seat
+            # Seat counts are passed in by search; otherwise read SeatInventory
+            total_seats = flight_data.get('total_seats')
+            available_seats = flight_data.get('available_seats')
             
             schedule_id = flight_data.get('schedule_id')
-            if schedule_id:
-                available_seats = Seat.objects.filter(
-                    schedule_id=schedule_id,
-                    is_available=True
-                ).count()
+            if total_seats is None and schedule_id:
+                from django.db.models import Sum
+                from app.models import SeatInventory
                 
-                total_seats = Seat.objects.filter(
-                    schedule_id=schedule_id
-                ).count()
+                counts = SeatInventory.objects.filter(schedule_id=schedule_id).aggregate(
+                    total=Sum('total_seats'),
+                    available=Sum('available_seats')
+                )
+                total_seats = counts['total'] or 0
+                available_seats = counts['available'] or 0
+            
+            if total_seats:
+                occupancy_rate = 1 - (available_seats / total_seats)
                 
-                if total_seats > 0:
-                    occupancy_rate = 1 - (available_seats / total_seats)
-                    
-                    if occupancy_rate > 0.8:
-                        return 1.20
-                    elif occupancy_rate > 0.6:
-                        return 1.10
-                    elif occupancy_rate < 0.2:
-                        return 0.90
+                if occupancy_rate > 0.8:
+                    return 1.20
+                elif occupancy_rate > 0.6:
+                    return 1.10
+                elif occupancy_rate < 0.2:
+                    return 0.90
         except:
             pass
         
         return 1.0
     
-    def get_randomization_factor(self, session_id):
+    def get_randomization_factor(self, session_id, context=None):
         """Add small randomization to prevent price matching"""
         if not session_id:
             return 1.0 + (random.random() * 0.04 - 0.02)
         
-        hash_input = f"random_{session_id}"
-        hash_value = int(hashlib.md5(hash_input.encode()).hexdigest()[:8], 16)
+        if context is not None and context.session_id == session_id:
+            hash_value = context.session_hash
+        else:
+            hash_value = PricingContext.hash_session(session_id)
         return 0.98 + (hash_value % 5) / 100
     
 
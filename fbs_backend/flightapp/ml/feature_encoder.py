@@ -0,0 +1,164 @@
+# flightapp/ml/feature_encoder.py
+import re
+import threading
+from datetime import datetime
+
+import numpy as np
+
+
+class FeatureEncoder:
+    """
+    Feature encoder compiled once from feature_mapping.json.
+
+    Holds exact-match lookup tables (airline / airport code / city -> column
+    index) and writes numeric features straight into NumPy float32 rows, so a
+    prediction never builds dicts or DataFrames.
+    """
+
+    # Numeric (non one-hot) feature columns produced for every flight
+    NUMERIC_COLUMNS = (
+        'Total_Stops',
+        'Journey_day',
+        'Journey_month',
+        'Dep_hour',
+        'Dep_min',
+        'Arrival_hour',
+        'Arrival_min',
+        'Duration_hours',
+        'Duration_mins',
+    )
+
+    # Cap on memoized fallback lookups (inputs can come from the public API)
+    MAX_LOOKUP_SIZE = 512
+
+    # "Source_Manila (MNL)" -> ("Manila", "MNL")
+    _AIRPORT_LABEL = re.compile(r'^(?P<city>.+?)\s*\((?P<code>[A-Za-z0-9]+)\)$')
+
+    def __init__(self, feature_mapping):
+        self.feature_columns = list(feature_mapping['feature_columns'])
+        self.n_features = len(self.feature_columns)
+
+        column_index = {col: i for i, col in enumerate(self.feature_columns)}
+        self._numeric_index = [column_index.get(col) for col in self.NUMERIC_COLUMNS]
+
+        self._airline_index = self._compile_lookup(
+            feature_mapping.get('airline_codes', {}), column_index
+        )
+        self._source_index = self._compile_lookup(
+            feature_mapping.get('source_codes', {}), column_index, prefix='Source_'
+        )
+        self._destination_index = self._compile_lookup(
+            feature_mapping.get('destination_codes', {}), column_index, prefix='Destination_'
+        )
+
+        # Preallocated single-row buffer per thread (reused by encode())
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+    def _compile_lookup(self, codes, column_index, prefix=None):
+        """Build {lowercase key: column index} from a mapping section"""
+        lookup = {}
+        for key, col in codes.items():
+            idx = column_index.get(col)
+            if idx is None:
+                continue
+            lookup.setdefault(key.strip().lower(), idx)
+
+        # Airport columns also answer to their bare city name and code
+        if prefix:
+            for col, idx in column_index.items():
+                if not col.startswith(prefix):
+                    continue
+                label = col[len(prefix):]
+                lookup.setdefault(label.lower(), idx)
+                match = self._AIRPORT_LABEL.match(label)
+                if match:
+                    lookup.setdefault(match.group('city').lower(), idx)
+                    lookup.setdefault(match.group('code').lower(), idx)
+
+        return lookup
+
+    @classmethod
+    def _resolve(cls, lookup, value):
+        """
+        Column index for value, or None.
+        Exact match first; unseen values fall back to the legacy substring
+        match once and the answer is memoized in the same table.
+        """
+        if not value:
+            return None
+        key = value.strip().lower()
+        try:
+            return lookup[key]
+        except KeyError:
+            pass
+
+        idx = None
+        for known, known_idx in list(lookup.items()):
+            if known in key or key in known:
+                idx = known_idx
+                break
+        if len(lookup) < cls.MAX_LOOKUP_SIZE:
+            lookup[key] = idx
+        return idx
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _parse_time(value):
+        if isinstance(value, str):
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return value
+
+    def encode_into(self, row, flight_data):
+        """Write one flight's features into row (a float32 vector, zeroed here)"""
+        row.fill(0)
+
+        dep_time = self._parse_time(flight_data.get('departure_time'))
+        arr_time = self._parse_time(flight_data.get('arrival_time'))
+        duration = arr_time - dep_time
+
+        values = (
+            flight_data.get('total_stops', 0),
+            dep_time.day,
+            dep_time.month,
+            dep_time.hour,
+            dep_time.minute,
+            arr_time.hour,
+            arr_time.minute,
+            duration.seconds // 3600,
+            (duration.seconds % 3600) // 60,
+        )
+        for idx, value in zip(self._numeric_index, values):
+            if idx is not None:
+                row[idx] = value
+
+        for lookup, value in (
+            (self._airline_index, flight_data.get('airline_name', '')),
+            (self._source_index, flight_data.get('origin', '')),
+            (self._destination_index, flight_data.get('destination', '')),
+        ):
+            idx = self._resolve(lookup, value)
+            if idx is not None:
+                row[idx] = 1
+
+        return row
+
+    def encode(self, flight_data):
+        """Encode one flight into this thread's preallocated (1, n) matrix"""
+        matrix = getattr(self._local, 'row', None)
+        if matrix is None:
+            matrix = np.zeros((1, self.n_features), dtype=np.float32)
+            self._local.row = matrix
+        self.encode_into(matrix[0], flight_data)
+        return matrix
+
+    def encode_batch(self, flight_data_list):
+        """Encode many flights into one (len, n) float32 matrix"""
+        matrix = np.empty((len(flight_data_list), self.n_features), dtype=np.float32)
+        for row, flight_data in zip(matrix, flight_data_list):
+            self.encode_into(row, flight_data)
+        return matrix
@@ -1,7 +1,7 @@
 # flightapp/ml/predictor.py
+import logging
 import pickle
 import numpy as np
-import pandas as pd
 from datetime import datetime
 from decimal import Decimal
 import json
@@ -10,6 +10,10 @@ import sys
 import random
 from pathlib import Path
 
+from .feature_encoder import FeatureEncoder
+
+logger = logging.getLogger('flightapp.pricing')
+
 class FlightPricePredictor:
     """Service to predict flight prices using trained XGBoost model"""
     
@@ -17,6 +21,7 @@ class FlightPricePredictor:
     _instance = None
     _model = None
     _feature_mapping = None
+    _encoder = None
     _initialized = False
     
     def __new__(cls):
@@ -30,6 +35,7 @@ class FlightPricePredictor:
         if not FlightPricePredictor._initialized:
             self.model = None
             self.feature_mapping = None
+            self.encoder = None
             
             # Check if we should skip loading (migrations only)
             if not self._is_migration_command():
@@ -38,6 +44,7 @@ class FlightPricePredictor:
                 # Cache at class level
                 FlightPricePredictor._model = self.model
                 FlightPricePredictor._feature_mapping = self.feature_mapping
+                FlightPricePredictor._encoder = self.encoder
             else:
                 print("⚙️ Running migration command - skipping model load")
             
@@ -46,6 +53,7 @@ class FlightPricePredictor:
             # Restore from class-level cache
             self.model = FlightPricePredictor._model
             self.feature_mapping = FlightPricePredictor._feature_mapping
+            self.encoder = FlightPricePredictor._encoder
 
     def _is_migration_command(self):
         """Check if we're running a database migration command that could conflict"""
@@ -104,96 +112,63 @@ class FlightPricePredictor:
                     self.feature_mapping = json.load(file)
                     # Cache at class level
                     FlightPricePredictor._feature_mapping = self.feature_mapping
+                # Compile lookup tables once - reused by every prediction
+                self.encoder = FeatureEncoder(self.feature_mapping)
+                FlightPricePredictor._encoder = self.encoder
                 print("✅ Feature mapping loaded from feature_mapping.json")
                 print(f"   Loaded {len(self.feature_mapping.get('feature_columns', []))} feature columns")
             else:
                 print(f"❌ Feature mapping file not found at: {mapping_path}")
                 self.feature_mapping = FlightPricePredictor._feature_mapping
+                self.encoder = FlightPricePredictor._encoder
                 
         except Exception as e:
             print(f"❌ Failed to load feature mapping: {e}")
             self.feature_mapping = FlightPricePredictor._feature_mapping
+            self.encoder = FlightPricePredictor._encoder
     
-    def prepare_features(self, flight_data):
-        """
-        Convert flight data into feature vector for prediction
-        Uses feature_mapping.json for column mapping
-        """
-        # Restore from cache if needed
+    def _restore_from_cache(self):
+        """Restore model and encoder from the class-level cache if needed"""
         if not self.model and FlightPricePredictor._model:
             self.model = FlightPricePredictor._model
         if not self.feature_mapping and FlightPricePredictor._feature_mapping:
             self.feature_mapping = FlightPricePredictor._feature_mapping
+        if not self.encoder and FlightPricePredictor._encoder:
+            self.encoder = FlightPricePredictor._encoder
+        if not self.encoder and self.feature_mapping:
+            self.encoder = FeatureEncoder(self.feature_mapping)
+            FlightPricePredictor._encoder = self.encoder
+    
+    def prepare_features(self, flight_data):
+        """
+        Convert flight data into a (1, n_features) float32 matrix
+        Uses the encoder compiled from feature_mapping.json
+        """
+        self._restore_from_cache()
         
-        if not self.model or not self.feature_mapping:
+        if not self.model or not self.encoder:
             return None
         
         try:
-            # Create feature vector with zeros
-            features = {col: 0 for col in self.feature_mapping['feature_columns']}
-            
-            # 1. Total Stops
-            features['Total_Stops'] = flight_data.get('total_stops', 0)
-            
-            # 2. Journey day/month from departure time
-            dep_time = flight_data.get('departure_time')
-            if isinstance(dep_time, str):
-                dep_time = datetime.fromisoformat(dep_time.replace('Z', '+00:00'))
-            
-            features['Journey_day'] = dep_time.day
-            features['Journey_month'] = dep_time.month
-            
-            # 3. Departure hour/minute
-            features['Dep_hour'] = dep_time.hour
-            features['Dep_min'] = dep_time.minute
-            
-            # 4. Arrival hour/minute
-            arr_time = flight_data.get('arrival_time')
-            if isinstance(arr_time, str):
-                arr_time = datetime.fromisoformat(arr_time.replace('Z', '+00:00'))
-            
-            features['Arrival_hour'] = arr_time.hour
-            features['Arrival_min'] = arr_time.minute
-            
-            # 5. Duration
-            duration = arr_time - dep_time
-            features['Duration_hours'] = duration.seconds // 3600
-            features['Duration_mins'] = (duration.seconds % 3600) // 60
-            
-            # 6. Airline one-hot encoding
-            airline_name = flight_data.get('airline_name', '')
-            for airline_key, airline_col in self.feature_mapping['airline_codes'].items():
-                if airline_key.lower() in airline_name.lower() or airline_name.lower() in airline_key.lower():
-                    if airline_col in features:
-                        features[airline_col] = 1
-                        break
-            
-            # 7. Source one-hot encoding
-            origin = flight_data.get('origin', '')
-            for source_key, source_col in self.feature_mapping['source_codes'].items():
-                if source_key in origin or origin in source_key:
-                    if source_col in features:
-                        features[source_col] = 1
-                        break
-            
-            # 8. Destination one-hot encoding
-            destination = flight_data.get('destination', '')
-            for dest_key, dest_col in self.feature_mapping['destination_codes'].items():
-                if dest_key in destination or destination in dest_key:
-                    if dest_col in features:
-                        features[dest_col] = 1
-                        break
-            
-            # Convert to DataFrame for prediction
-            df = pd.DataFrame([features])
-            
-            # Ensure columns are in the right order
-            df = df[self.feature_mapping['feature_columns']]
-            
-            return df
-            
+            return self.encoder.encode(flight_data)
         except Exception as e:
-            print(f"❌ Error preparing features: {e}")
+            logger.error("Error preparing features: %s", e)
+            return None
+    
+    def prepare_features_batch(self, flight_data_list):
+        """
+        Convert a list of flights into one float32 feature matrix (one row per flight)
+        Returns None if the model/mapping is unavailable or any row fails
+        """
+        self._restore_from_cache()
+        
+        if not self.model or not self.encoder:
+            return None
+        
+        try:
+            return self.encoder.encode_batch(flight_data_list)
+        except Exception as e:
+            logger.error("Error preparing features: %s", e)
             return None
     
     def predict_price(self, flight_data):
@@ -201,38 +176,44 @@ class FlightPricePredictor:
         Predict base price for a flight using XGBoost
         Returns RAW prediction - NO ROUNDING!
         """
-        # Restore from cache if needed
-        if not self.model and FlightPricePredictor._model:
-            self.model = FlightPricePredictor._model
-        if not self.feature_mapping and FlightPricePredictor._feature_mapping:
-            self.feature_mapping = FlightPricePredictor._feature_mapping
+        prices = self.predict_prices([flight_data])
+        predicted_price = prices[0] if prices else 0.0
+        
+        logger.debug("xgboost prediction=%.2f", predicted_price)
+        
+        return predicted_price
+    
+    def predict_prices(self, flight_data_list):
+        """
+        Predict base prices for many flights with a single XGBoost call
+        Returns a list of RAW predictions in input order (0.0 on failure)
+        """
+        flight_data_list = list(flight_data_list)
+        if not flight_data_list:
+            return []
+        
+        self._restore_from_cache()
         
         if not self.model:
-            return 0.0
+            return [0.0] * len(flight_data_list)
         
         try:
-            features_df = self.prepare_features(flight_data)
-            if features_df is None:
-                return 0.0
-            
-            # XGBoost prediction - RAW value
-            predicted_price = self.model.predict(features_df)[0]
-            
-            # XGBoost sometimes returns weird types
-            if hasattr(predicted_price, 'item'):
-                predicted_price = predicted_price.item()
-            
-            # Ensure positive price
-            predicted_price = max(predicted_price, 0)
+            if len(flight_data_list) == 1:
+                features = self.prepare_features(flight_data_list[0])
+            else:
+                features = self.prepare_features_batch(flight_data_list)
+            if features is None:
+                return [0.0] * len(flight_data_list)
             
-            # Print raw prediction (remove in production)
-            print(f"💰 XGBoost: ₱{predicted_price:.2f}")
+            # XGBoost prediction - RAW values, one model call for the whole batch
+            predictions = self.model.predict(features)
             
-            return float(predicted_price)
+            # XGBoost sometimes returns weird types; ensure positive prices
+            return [max(float(price), 0.0) for price in predictions]
             
         except Exception as e:
-            print(f"❌ XGBoost prediction error: {e}")
-            return 0.0
+            logger.error("XGBoost prediction error: %s", e)
+            return [0.0] * len(flight_data_list)
     
     def predict_seat_class_price(self, base_price, seat_class_name):
         """Predict price with seat class adjustment"""
@@ -0,0 +1,319 @@
+# flightapp/ml/price_refresh.py
+import heapq
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+
+from flightapp.services.demand_tracker import demand_tracker
+
+logger = logging.getLogger('flightapp.pricing')
+
+
+class PriceRefreshScheduler:
+    """
+    Background refresh of Schedule.ml_base_price.
+
+    Schedules whose stored price is missing or close to expiry are ranked in
+    a priority queue (departure proximity, search demand, price age) and
+    refreshed in batches ahead of expiry, so search only reads stored prices.
+    Runs as a daemon thread in the web process, or via the refresh_ml_prices
+    management command as a separate worker. Every tick takes a PostgreSQL
+    advisory lock first, so with several web workers (or a worker next to
+    the command) only one process refreshes at a time and the others skip.
+    Refresh requests go through the shared demand store, so a search in any
+    process bumps the schedule in the queue of whichever process refreshes.
+    """
+
+    _instance = None
+    _initialized = False
+
+    # Weights of the priority score (higher score = refreshed first)
+    PROXIMITY_WEIGHT = 3.0
+    DEMAND_WEIGHT = 1.0
+    AGE_WEIGHT = 2.0
+    MISSING_PRICE_BONUS = 10.0
+
+    # Upper bound on schedules ranked per tick
+    MAX_CANDIDATES = 5000
+
+    # pg advisory lock key held while a tick runs ('mlpr')
+    LOCK_KEY = 0x6d6c7072
+
+    # Refresh requests count for this demand window
+    REQUEST_WINDOW = '5m'
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not PriceRefreshScheduler._initialized:
+            self._lock = threading.Lock()
+            self._thread = None
+            self._stop = threading.Event()
+            self._wakeup = threading.Event()
+            PriceRefreshScheduler._initialized = True
+
+    # ------------------------------------------------------------------
+    # Settings
+    # ------------------------------------------------------------------
+    @property
+    def price_ttl(self):
+        """Seconds a stored ML price stays valid"""
+        return getattr(settings, 'ML_PRICE_TTL_SECONDS', 3600)
+
+    @property
+    def refresh_ahead(self):
+        """Refresh prices this many seconds before they expire"""
+        return getattr(settings, 'ML_PRICE_REFRESH_AHEAD_SECONDS', 600)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'ML_PRICE_REFRESH_INTERVAL', 60)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'ML_PRICE_REFRESH_BATCH_SIZE', 200)
+
+    # ------------------------------------------------------------------
+    # Priority queue
+    # ------------------------------------------------------------------
+    def priority(self, departure_time, price_updated_at, has_price, searches, now):
+        """Priority score of one schedule (higher = more urgent)"""
+        hours_to_departure = max((departure_time - now).total_seconds() / 3600, 0)
+        proximity = 1 / (1 + hours_to_departure / 24)
+
+        demand = math.log1p(searches)
+
+        if not has_price or price_updated_at is None:
+            age = 2.0 + self.MISSING_PRICE_BONUS
+        else:
+            age = min((now - price_updated_at).total_seconds() / self.price_ttl, 2.0)
+
+        return (
+            self.PROXIMITY_WEIGHT * proximity +
+            self.DEMAND_WEIGHT * demand +
+            self.AGE_WEIGHT * age
+        )
+
+    def build_queue(self, now=None):
+        """Heap of (-priority, schedule_id) for every schedule due for refresh"""
+        from app.models import Schedule
+
+        now = now or timezone.now()
+        due_before = now - timedelta(seconds=max(self.price_ttl - self.refresh_ahead, 0))
+
+        # Requested schedules have a missing or expired price, so they are
+        # due anyway; the request only moves them up the queue
+        rows = list(
+            Schedule.objects.filter(
+                status='Open',
+                departure_time__gte=now,
+            ).filter(
+                Q(ml_base_price__isnull=True) |
+                Q(ml_price_updated_at__isnull=True) |
+                Q(ml_price_updated_at__lt=due_before)
+            ).order_by('departure_time').values_list(
+                'id', 'departure_time', 'ml_price_updated_at', 'ml_base_price', 'flight__flight_number'
+            )[:self.MAX_CANDIDATES]
+        )
+
+        # Searches in the last hour (ScheduleViewSet.track_search_demand)
+        demand = demand_tracker.flight_demand({row[4] for row in rows}, window='1h')
+        requests = demand_tracker.counts(
+            [self.request_key(row[0]) for row in rows], window=self.REQUEST_WINDOW
+        )
+
+        queue = []
+        for schedule_id, departure_time, updated_at, ml_base_price, flight_number in rows:
+            score = self.priority(
+                departure_time, updated_at, ml_base_price is not None,
+                demand.get(flight_number, 0), now
+            )
+            if requests.get(self.request_key(schedule_id)):
+                score += self.MISSING_PRICE_BONUS
+            queue.append((-score, schedule_id))
+
+        heapq.heapify(queue)
+        return queue
+
+    @staticmethod
+    def request_key(schedule_id):
+        return f"ml_refresh:{schedule_id}"
+
+    def request_refresh(self, schedule_ids):
+        """
+        Ask for a refresh of these schedules at the next tick (one write to
+        the shared demand store, seen by the refreshing process)
+        """
+        schedule_ids = [schedule_id for schedule_id in schedule_ids if schedule_id]
+        if not schedule_ids:
+            return
+        demand_tracker.record([self.request_key(schedule_id) for schedule_id in schedule_ids])
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+    def refresh_batch(self, schedule_ids):
+        """Refresh one batch (one model call + one bulk_update); returns count"""
+        from app.models import Schedule
+        from flightapp.services.search_cache import schedule_search_cache
+
+        schedules = list(
+            Schedule.objects.filter(id__in=schedule_ids).select_related(
+                'flight__airline',
+                'flight__route__origin_airport__country',
+                'flight__route__destination_airport__country',
+            )
+        )
+        updated = Schedule.bulk_update_ml_prices(schedules, save=True)
+
+        # bulk_update sends no signals - drop cached searches showing old prices
+        for key in {
+            (s.flight.route.origin_airport.code, s.flight.route.destination_airport.code, s.departure_time)
+            for s in updated
+        }:
+            schedule_search_cache.invalidate(*key)
+
+        return len(updated)
+
+    def _try_lock(self):
+        """Take the refresh lock on this thread's connection (False if held elsewhere)"""
+        if connection.vendor != 'postgresql':
+            return True
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [self.LOCK_KEY])
+            return cursor.fetchone()[0]
+
+    def _unlock(self):
+        if connection.vendor != 'postgresql':
+            return
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [self.LOCK_KEY])
+        except DatabaseError:
+            # A broken connection has released the lock already
+            pass
+
+    def run_once(self, max_batches=None):
+        """
+        Rank due schedules and refresh them batch by batch; returns count,
+        or None when another process holds the refresh lock
+        """
+        if not self._try_lock():
+            return None
+        try:
+            queue = self.build_queue()
+            refreshed = 0
+            batches = 0
+
+            while queue and (max_batches is None or batches < max_batches):
+                batch = [heapq.heappop(queue)[1] for _ in range(min(self.batch_size, len(queue)))]
+                refreshed += self.refresh_batch(batch)
+                batches += 1
+
+            return refreshed
+        finally:
+            self._unlock()
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+    def ensure_started(self):
+        """Start the in-process refresh thread once (if enabled in settings)"""
+        if not getattr(settings, 'ML_PRICE_REFRESH_IN_PROCESS', True):
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self.run_forever, name='ml-price-refresh', daemon=True
+            )
+            self._thread.start()
+            logger.info("ML price refresh scheduler started")
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def run_forever(self, interval=None):
+        """Refresh loop used by the thread and the refresh_ml_prices command"""
+        interval = interval or self.interval
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                close_old_connections()
+                refreshed = self.run_once()
+                if refreshed:
+                    logger.info(
+                        "ML price refresh: %s schedules in %.2fs", refreshed, time.monotonic() - started
+                    )
+            except Exception as e:
+                logger.exception("ML price refresh failed: %s", e)
+            finally:
+                close_old_connections()
+
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+
+
+# Singleton instance
+price_refresh_scheduler = PriceRefreshScheduler()
+
+
+# ----------------------------------------------------------------------
+# Process-pool workers (update_ml_prices --workers N)
+# Module-level so they can be pickled; no model imports at import time.
+# ----------------------------------------------------------------------
+def init_refresh_worker():
+    """Pool initializer: set up Django and load the ML model once per worker"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+    from flightapp.ml.predictor import predictor
+    if not predictor.model:
+        predictor.load_model()
+
+
+def refresh_schedule_chunk(chunk_index, schedule_ids):
+    """
+    Refresh one chunk of schedules (one model call + one bulk_update).
+    Returns (chunk_index, updated rows, failed count, seconds); updated rows
+    are (flight_number, ml_base_price, departure_time) tuples for reporting.
+    """
+    from app.models import Schedule
+
+    started = time.monotonic()
+    close_old_connections()
+
+    schedules = list(
+        Schedule.objects.filter(id__in=schedule_ids).select_related(
+            'flight__airline',
+            'flight__route__origin_airport',
+            'flight__route__destination_airport',
+        )
+    )
+    updated = Schedule.bulk_update_ml_prices(schedules, save=True)
+
+    rows = [
+        (schedule.flight.flight_number, float(schedule.ml_base_price), schedule.departure_time)
+        for schedule in updated
+    ]
+    return chunk_index, rows, len(schedule_ids) - len(rows), time.monotonic() - started
@@ -0,0 +1,110 @@
+# flightapp/ml/pricing_trace.py
+import itertools
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+
+class PricingTraceBuffer:
+    """
+    Opt-in sampled pricing traces.
+
+    1 in PRICING_TRACE_SAMPLE_RATE pricing requests records every factor of
+    every flight it prices into a fixed-size float64 ring buffer (one row per
+    flight), so traces cost nothing on unsampled requests and never allocate
+    per record.
+    """
+
+    FIELDS = (
+        'recorded_at',
+        'schedule_id',
+        'base_price',
+        'user_factor',
+        'session_factor',
+        'demand_factor',
+        'time_factor',
+        'inventory_factor',
+        'randomization',
+        'final_price',
+    )
+
+    def __init__(self, size=None, sample_rate=None):
+        self._size = size
+        self._sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._requests = itertools.count(1)
+        self._rows = None
+        self._next = 0
+        self._filled = 0
+
+    @property
+    def size(self):
+        return self._size or getattr(settings, 'PRICING_TRACE_BUFFER_SIZE', 1000)
+
+    @property
+    def sample_rate(self):
+        """Trace 1 in N requests; 0 disables tracing"""
+        if self._sample_rate is not None:
+            return self._sample_rate
+        return getattr(settings, 'PRICING_TRACE_SAMPLE_RATE', 0)
+
+    def should_sample(self):
+        """Decide once per pricing request"""
+        rate = self.sample_rate
+        if not rate or rate < 1:
+            return False
+        return next(self._requests) % rate == 0
+
+    def record(self, flight_data, result):
+        """Append one priced flight (result is a price_many() entry)"""
+        factors = result['factors_applied']
+        values = (
+            time.time(),
+            flight_data.get('schedule_id') or 0,
+            result['base_price'],
+            factors['user_factor'],
+            factors['session_factor'],
+            factors['demand_factor'],
+            factors['time_factor'],
+            factors['inventory_factor'],
+            factors['randomization'],
+            result['final_price'],
+        )
+        with self._lock:
+            if self._rows is None or len(self._rows) != self.size:
+                self._rows = np.zeros((self.size, len(self.FIELDS)), dtype=np.float64)
+                self._next = 0
+                self._filled = 0
+            self._rows[self._next] = values
+            self._next = (self._next + 1) % len(self._rows)
+            self._filled = min(self._filled + 1, len(self._rows))
+
+    def snapshot(self, limit=None):
+        """Recorded traces, oldest first, as dicts"""
+        with self._lock:
+            if self._rows is None or not self._filled:
+                return []
+            start = (self._next - self._filled) % len(self._rows)
+            order = [(start + i) % len(self._rows) for i in range(self._filled)]
+            rows = self._rows[order].copy()
+
+        if limit:
+            rows = rows[-limit:]
+
+        traces = []
+        for row in rows:
+            trace = dict(zip(self.FIELDS, row.tolist()))
+            trace['schedule_id'] = int(trace['schedule_id'])
+            traces.append(trace)
+        return traces
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+            self._filled = 0
+
+
+# Singleton instance
+pricing_trace = PricingTraceBuffer()
@@ -100,35 +100,37 @@ class ScheduleSerializer(serializers.ModelSerializer):
     price_age_hours = serializers.SerializerMethodField()
     # ============================================
     
+    def _available_inventory(self, obj):
+        """SeatInventory rows with seats left, one per class name (prefetch-friendly)"""
+        rows = {}
+        for row in obj.seat_inventory.all():
+            if row.available_seats > 0:
+                name = row.seat_class.name if row.seat_class else 'Economy'
+                rows.setdefault(name, row)
+        return [rows[name] for name in sorted(rows)]
+    
     def get_available_classes(self, obj):
         """Get unique seat classes with available seats"""
-        from app.models import Seat
-        seat_classes = Seat.objects.filter(
-            schedule=obj,
-            is_available=True
-        ).values_list('seat_class__name', flat=True).distinct()
-        return list(seat_classes)
+        return [
+            row.seat_class.name if row.seat_class else 'Economy'
+            for row in self._available_inventory(obj)
+        ]
     
     def get_seat_classes(self, obj):
         """Get seat classes with details"""
-        from app.models import Seat
-        seat_classes = Seat.objects.filter(
-            schedule=obj,
-            is_available=True
-        ).select_related('seat_class').distinct('seat_class__name')
-        
         return [
             {
-                'name': seat.seat_class.name if seat.seat_class else 'Economy',
-                'price_multiplier': float(seat.seat_class.price_multiplier) if seat.seat_class else 1.0
+                'name': row.seat_class.name if row.seat_class else 'Economy',
+                'price_multiplier': float(row.seat_class.price_multiplier) if row.seat_class else 1.0,
+                'available_seats': row.available_seats,
+                'min_price_adjustment': float(row.min_price_adjustment or 0)
             }
-            for seat in seat_classes
+            for row in self._available_inventory(obj)
         ]
     
     def get_available_seats(self, obj):
         """Get total available seats count"""
-        from app.models import Seat
-        return Seat.objects.filter(schedule=obj, is_available=True).count()
+        return obj.get_seat_counts()['available_seats']
     
     def get_is_domestic(self, obj):
         """Check if flight is domestic"""
@@ -637,6 +639,7 @@ class SelectedFlightSerializer(serializers.Serializer):
     departure_time = serializers.CharField(required=False, allow_blank=True)  # Changed from DateTimeField
     airline = serializers.CharField(max_length=100, required=False, allow_blank=True)
     airline_code = serializers.CharField(max_length=10, required=False, allow_blank=True)
+    price_quote = serializers.CharField(required=False, allow_blank=True)  # Signed quote from search
 
 class ReturnAddonDataSerializer(serializers.Serializer):
     """Serializer for return flight add-on data"""
@@ -667,7 +670,8 @@ class CreateBookingSerializer(serializers.Serializer):
     addons = AddonDataSerializer(required=False)
     return_addons = ReturnAddonDataSerializer(required=False, allow_null=True)  
     passengerCount = serializers.DictField(required=False)
-    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=True)  # Make this REQUIRED
+    # Informational only: the booking total is computed server-side
+    total_amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     
     def validate(self, data):
         """Custom validation for booking data"""
@@ -686,9 +690,9 @@ class CreateBookingSerializer(serializers.Serializer):
         if data.get('trip_type') == 'round_trip' and not data.get('selectedReturn'):
             raise serializers.ValidationError("Return flight is required for round trips")
         
-        # Validate total_amount is present and positive
+        # Validate total_amount is positive when sent
         total_amount = data.get('total_amount')
-        if not total_amount or total_amount <= Decimal('0.00'):
+        if total_amount is not None and total_amount <= Decimal('0.00'):
             raise serializers.ValidationError("Total amount must be a positive number")
         
         return data
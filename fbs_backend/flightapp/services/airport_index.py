@@ -0,0 +1,180 @@
+# flightapp/services/airport_index.py
+import heapq
+import re
+import threading
+import unicodedata
+
+from .data_versions import data_versions
+
+
+class AirportIndex:
+    """
+    Process-level autocomplete index over airports.
+
+    Every word of an airport's code, city, name and country is indexed by
+    all of its prefixes, plus a trigram index used for words with no prefix
+    match (typos).
+    A query is a few dict lookups and a top-K selection of the candidates,
+    so clients get ranked top-K matches without downloading the airport
+    table. The index is built on first use in each process and rebuilt
+    after Airport/Country changes (version token shared by every process,
+    flightapp/services/data_versions.py).
+    """
+
+    _instance = None
+    _initialized = False
+
+    VERSION_KEY = 'airport_index_version'
+
+    # Score of a query word matching a field (exact match scores double)
+    FIELD_WEIGHTS = {
+        'code': 8.0,
+        'city': 4.0,
+        'name': 2.0,
+        'country': 1.0,
+    }
+    TRIGRAM_WEIGHT = 0.5
+    MIN_TRIGRAM_SIMILARITY = 0.5
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not AirportIndex._initialized:
+            self._lock = threading.Lock()
+            # (version, airports, prefix index, trigram index), swapped as a whole
+            self._index = None
+            AirportIndex._initialized = True
+
+    # ------------------------------------------------------------------
+    # Text
+    # ------------------------------------------------------------------
+    @staticmethod
+    def normalize(text):
+        """Lowercase ASCII words ('Lapu-Lapu City' -> ['lapu', 'lapu', 'city'])"""
+        text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+        return re.findall(r'[a-z0-9]+', text.lower())
+
+    @staticmethod
+    def trigrams(word):
+        padded = f"  {word} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def build(self):
+        """Index every airport (one query); returns the new index"""
+        from app.models import Airport
+
+        version = data_versions.get(self.VERSION_KEY)
+        airports = []
+        prefixes = {}
+        trigrams = {}
+
+        rows = Airport.objects.select_related('country').order_by('code')
+        for position, airport in enumerate(rows):
+            airports.append({
+                'id': airport.id,
+                'code': airport.code,
+                'name': airport.name,
+                'city': airport.city,
+                'country': airport.country.name if airport.country else None,
+                'country_code': airport.country.code if airport.country else None,
+                'airport_type': airport.airport_type,
+            })
+
+            fields = {
+                'code': airport.code,
+                'city': airport.city,
+                'name': airport.name,
+                'country': airport.country.name if airport.country else '',
+            }
+            for field, text in fields.items():
+                for word in self.normalize(text):
+                    for length in range(1, len(word) + 1):
+                        matches = prefixes.setdefault(word[:length], {})
+                        weight = self.FIELD_WEIGHTS[field] * (2 if length == len(word) else 1)
+                        # Best field/weight this prefix reaches for the airport
+                        if weight > matches.get(position, 0):
+                            matches[position] = weight
+                    for trigram in self.trigrams(word):
+                        trigrams.setdefault(trigram, set()).add(position)
+
+        index = (version, airports, prefixes, trigrams)
+        with self._lock:
+            self._index = index
+        return index
+
+    def _current(self):
+        index = self._index
+        if index is None or data_versions.get(self.VERSION_KEY) != index[0]:
+            index = self.build()
+        return index
+
+    def invalidate(self):
+        """Rebuild in every process at its next query, after commit"""
+        def drop():
+            with self._lock:
+                self._index = None
+
+        data_versions.bump(self.VERSION_KEY, on_bump=drop)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def _word_scores(self, word, prefixes, trigrams):
+        """{airport position: score} for one query word"""
+        scores = prefixes.get(word)
+        if scores or len(word) < 3:
+            return scores or {}
+
+        # No prefix match (typo): trigram similarity against indexed words
+        scores = {}
+        query_trigrams = self.trigrams(word)
+        counts = {}
+        for trigram in query_trigrams:
+            for position in trigrams.get(trigram, ()):
+                counts[position] = counts.get(position, 0) + 1
+        for position, shared in counts.items():
+            similarity = shared / len(query_trigrams)
+            if similarity >= self.MIN_TRIGRAM_SIMILARITY:
+                scores[position] = max(scores.get(position, 0), self.TRIGRAM_WEIGHT * similarity)
+        return scores
+
+    def search(self, query, limit=10):
+        """Ranked matches; every query word must match some field"""
+        words = self.normalize(query)
+        if not words:
+            return []
+
+        _, airports, prefixes, trigrams = self._current()
+
+        totals = None
+        for word in words:
+            scores = self._word_scores(word, prefixes, trigrams)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {
+                    position: totals[position] + score
+                    for position, score in scores.items()
+                    if position in totals
+                }
+            if not totals:
+                return []
+
+        # Airports are indexed in code order, so position breaks ties by code
+        ranked = heapq.nsmallest(limit, totals.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            {**airports[position], 'score': round(score, 2)}
+            for position, score in ranked
+        ]
+
+
+# Singleton instance
+airport_index = AirportIndex()
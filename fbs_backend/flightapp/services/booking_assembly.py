@@ -0,0 +1,395 @@
+# flightapp/services/booking_assembly.py
+import logging
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from .price_quotes import price_quotes
+from .seat_events import seat_events
+from .tax_engine import tax_engine
+
+booking_logger = logging.getLogger('flightapp.booking')
+
+
+class BookingAssembler:
+    """
+    Builds the passengers, booking details, add-ons and taxes of a booking
+    in memory and writes them with one bulk statement per table.
+
+    Everything the request refers to (schedules, selected seats, seat
+    classes, baggage/meal/assistance options and their add-ons) is read up
+    front with one query per table and taxes come from the compiled tax
+    rules (flightapp/services/tax_engine.py); the selected seats are held
+    with one lock (SeatHold.place_many). Bulk writes bypass the per-row
+    signals, so seat maps and cached searches are refreshed explicitly.
+    """
+
+    _instance = None
+    _initialized = False
+
+    # request add-on key -> (AddOn field, option model)
+    ADDON_KINDS = [
+        ('baggage', 'baggage_option', 'BaggageOption'),
+        ('meals', 'meal_option', 'MealOption'),
+        ('wheelchair', 'assistance_service', 'AssistanceService'),
+    ]
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not BookingAssembler._initialized:
+            BookingAssembler._initialized = True
+
+    # ------------------------------------------------------------------
+    # Request data
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _id(value):
+        """Option/seat id from an int, a numeric string or {'id': ...}"""
+        if isinstance(value, dict):
+            value = value.get('id')
+        if isinstance(value, bool) or value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def passenger_key(passenger, passenger_data):
+        """Key of a passenger in the add-on/seat maps of the request"""
+        if passenger_data and passenger_data.get('key'):
+            return passenger_data['key']
+        return f"{passenger.first_name}_{passenger.last_name}"
+
+    @staticmethod
+    def _date_of_birth(value):
+        if not value:
+            return None
+        try:
+            # Remove timezone if present
+            return datetime.strptime(str(value).split('T')[0], '%Y-%m-%d').date()
+        except ValueError:
+            booking_logger.warning("Could not parse date of birth %s, using None", value)
+            return None
+
+    def passengers(self, passengers_data):
+        """Unsaved PassengerInfo rows from the validated passenger data"""
+        from app.models import PassengerInfo
+
+        return [
+            PassengerInfo(
+                first_name=pax_data.get('first_name', ''),
+                last_name=pax_data.get('last_name', ''),
+                middle_name=pax_data.get('middle_name', ''),
+                title=pax_data.get('title', 'MR'),
+                date_of_birth=self._date_of_birth(pax_data.get('date_of_birth', '')),
+                nationality=pax_data.get('nationality', 'Philippines'),
+                passport_number=pax_data.get('passport_number', ''),
+                passenger_type=pax_data.get('type', 'Adult'),
+            )
+            for pax_data in passengers_data
+        ]
+
+    @staticmethod
+    def _legs(data, trip_type, fares):
+        """[(is_return, selected flight, fare)] of the trip"""
+        legs = [(False, data.get('selectedOutbound') or {}, fares.get('depart'))]
+        if trip_type == 'round_trip':
+            legs.append((True, data.get('selectedReturn') or {}, fares.get('return')))
+        return legs
+
+    @staticmethod
+    def _fare(fare, class_fares, seat_class):
+        """Verified fare of a seat class: its quoted fare, else the selected flight's"""
+        if seat_class is not None:
+            quoted = class_fares.get(price_quotes.class_key(seat_class.name))
+            if quoted is not None:
+                return quoted
+        return fare
+
+    @staticmethod
+    def _addon_source(addons_data, is_return):
+        if is_return and 'return_addons' in addons_data:
+            return addons_data.get('return_addons') or {}
+        return addons_data
+
+    # ------------------------------------------------------------------
+    # Lookups (one query per table)
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _schedules(schedule_ids):
+        from app.models import Schedule
+
+        return Schedule.objects.select_related(
+            'flight__airline',
+            'flight__aircraft',
+            'flight__route__origin_airport__country',
+            'flight__route__destination_airport__country',
+        ).in_bulk(schedule_ids)
+
+    @staticmethod
+    def _seat_classes(airline_ids):
+        """{airline id: [seat classes by id]}"""
+        from app.models import SeatClass
+
+        classes = {}
+        for seat_class in SeatClass.objects.filter(airline_id__in=airline_ids).order_by('id'):
+            classes.setdefault(seat_class.airline_id, []).append(seat_class)
+        return classes
+
+    def _addons(self, wanted, airline_by_option):
+        """
+        {(field, option id): AddOn} for the wanted options (one query per
+        option table, one for their add-ons); add-ons that do not exist yet
+        are created with one bulk insert.
+        """
+        from app.models import AddOn, BaggageOption, MealOption, AssistanceService
+
+        option_models = {
+            'BaggageOption': BaggageOption,
+            'MealOption': MealOption,
+            'AssistanceService': AssistanceService,
+        }
+        options = {}
+        for _, field, model_name in self.ADDON_KINDS:
+            ids = {option_id for kind_field, option_id in wanted if kind_field == field}
+            if not ids:
+                continue
+            options[field] = option_models[model_name].objects.in_bulk(ids)
+            for option_id in ids - set(options[field]):
+                booking_logger.warning("%s with ID %s not found", model_name, option_id)
+
+        addons = {}
+        existing = Q()
+        for field, by_id in options.items():
+            if by_id:
+                existing |= Q(**{f'{field}__in': list(by_id)})
+        if existing:
+            for addon in AddOn.objects.filter(existing).order_by('id'):
+                for field in options:
+                    option_id = getattr(addon, f'{field}_id')
+                    if option_id in options[field]:
+                        addons.setdefault((field, option_id), addon)
+
+        missing = []
+        for field, by_id in options.items():
+            for option_id, option in by_id.items():
+                if (field, option_id) in addons:
+                    continue
+                addon = AddOn(airline=airline_by_option.get((field, option_id)), price=option.price)
+                setattr(addon, field, option)
+                if field == 'baggage_option':
+                    addon.name = f"Extra Baggage {option.formatted_weight}"
+                elif field == 'meal_option':
+                    addon.name = f"Meal: {option.name}"
+                else:
+                    addon.name = f"Assistance: {option.name}"
+                    addon.included = option.is_included
+                addons[(field, option_id)] = addon
+                missing.append(addon)
+
+        if missing:
+            AddOn.objects.bulk_create(missing)
+        return addons
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+    def assemble(self, booking, data, passengers_data, trip_type='one_way', fares=None, class_fares=None):
+        """
+        Create the passengers and booking details of a booking (one per
+        passenger and leg) with their seats, add-ons and taxes.
+        fares maps 'depart'/'return' to the verified fare (client price if
+        missing) and class_fares to the verified fare of each seat class;
+        a selected seat adds its price_adjustment to the fare of its class.
+        Returns (passengers, booking details, booking taxes).
+        """
+        from app.models import (
+            PassengerInfo, BookingDetail, BookingTax, Seat, SeatHold
+        )
+
+        fares = fares or {}
+        class_fares = class_fares or {}
+        addons_data = data.get('addons', {}) or {}
+        seats_data = addons_data.get('seats', {}) or {}
+        passengers = self.passengers(passengers_data)
+        keys = [
+            self.passenger_key(passenger, passengers_data[index])
+            for index, passenger in enumerate(passengers)
+        ]
+
+        # 1. Resolve everything the request refers to
+        legs = []
+        for is_return, selected_flight, fare in self._legs(data, trip_type, fares):
+            schedule_id = self._id(selected_flight.get('schedule_id') or selected_flight.get('id'))
+            if not schedule_id:
+                booking_logger.error("No schedule ID found for %s flight", 'return' if is_return else 'depart')
+            legs.append((is_return, selected_flight, fare, schedule_id))
+
+        schedules = self._schedules({leg[3] for leg in legs if leg[3]})
+        legs = [leg + (schedules.get(leg[3]),) for leg in legs]
+        for is_return, _, _, schedule_id, schedule in legs:
+            if schedule_id and schedule is None:
+                booking_logger.error("%s schedule with ID %s not found", 'Return' if is_return else 'Depart', schedule_id)
+
+        seat_classes = self._seat_classes(
+            {schedule.flight.airline_id for schedule in schedules.values()}
+        )
+
+        wanted_seats = [self._id(seats_data.get(key)) for key in keys]
+        wanted_addons = set()
+        airline_by_option = {}
+        for is_return, _, _, _, schedule in legs:
+            if schedule is None:
+                continue
+            source = self._addon_source(addons_data, is_return)
+            for kind, field, _ in self.ADDON_KINDS:
+                selections = source.get(kind) or {}
+                for key in keys:
+                    option_id = self._id(selections.get(key))
+                    if option_id:
+                        wanted_addons.add((field, option_id))
+                        airline_by_option.setdefault((field, option_id), schedule.flight.airline)
+
+        # 2. Hold the selected seats (depart leg); a seat goes to one passenger
+        with transaction.atomic():
+            held = {}
+            depart_leg = legs[0]
+            if depart_leg[4] is not None:
+                held = SeatHold.place_many(wanted_seats, booking)
+            return_seats = {}
+            if len(legs) > 1 and any(wanted_seats):
+                return_seats = Seat.objects.select_related('seat_class').in_bulk(
+                    {seat_id for seat_id in wanted_seats if seat_id}
+                )
+
+            addons = self._addons(wanted_addons, airline_by_option) if wanted_addons else {}
+
+            # 3. Build the rows
+            PassengerInfo.objects.bulk_create(passengers)
+
+            details = []
+            detail_addons = []
+            given_seats = set()
+            for index, passenger in enumerate(passengers):
+                key = keys[index]
+                seat_id = wanted_seats[index]
+                for is_return, selected_flight, fare, schedule_id, schedule in legs:
+                    if schedule is None:
+                        continue
+
+                    seat = None
+                    seat_class = None
+                    if seat_id:
+                        if not is_return:
+                            seat = held.get(seat_id) if seat_id not in given_seats else None
+                            if seat is None:
+                                booking_logger.warning(
+                                    "Seat %s is not available, passenger left unseated", seat_id
+                                )
+                            else:
+                                given_seats.add(seat_id)
+                            seat_class = seat.seat_class if seat else None
+                        else:
+                            # The return leg takes the class of the selected seat
+                            return_seat = return_seats.get(seat_id)
+                            seat_class = return_seat.seat_class if return_seat else None
+
+                    if not seat_class:
+                        fare_type = (selected_flight.get('class_type', 'Economy') or '').lower()
+                        seat_class = next(
+                            (
+                                candidate for candidate in seat_classes.get(schedule.flight.airline_id, [])
+                                if fare_type in candidate.name.lower()
+                            ),
+                            None
+                        )
+
+                    price = self._fare(
+                        fare, class_fares.get('return' if is_return else 'depart') or {}, seat_class
+                    )
+                    detail = BookingDetail(
+                        booking=booking,
+                        passenger=passenger,
+                        schedule=schedule,
+                        seat=seat,
+                        seat_class=seat_class,
+                        price=price if price is not None else Decimal(str(selected_flight.get('price', 0))),
+                        tax_amount=Decimal('0.00'),
+                        passenger_type=passenger.passenger_type,
+                        status='pending',
+                    )
+                    if seat and price is None:
+                        # No verified fare: same rule as BookingDetail.save() for new details with a seat
+                        detail.price = detail._calculate_price().quantize(Decimal('0.01'))
+                    elif seat:
+                        detail.price = price + (seat.price_adjustment or Decimal('0.00'))
+                    details.append(detail)
+
+                    source = self._addon_source(addons_data, is_return)
+                    for kind, field, _ in self.ADDON_KINDS:
+                        addon = addons.get((field, self._id((source.get(kind) or {}).get(key))))
+                        if addon is not None:
+                            detail_addons.append((detail, addon))
+
+            if not details:
+                return passengers, [], []
+
+            booking_taxes = tax_engine.apply(booking, details)
+
+            # 4. One bulk write per table
+            BookingDetail.objects.bulk_create(details)
+            if detail_addons:
+                through = BookingDetail.addons.through
+                through.objects.bulk_create(
+                    [
+                        through(bookingdetail_id=detail.id, addon_id=addon.id)
+                        for detail, addon in detail_addons
+                    ],
+                    ignore_conflicts=True,
+                )
+            if booking_taxes:
+                BookingTax.objects.bulk_create(booking_taxes)
+
+            if held:
+                seat_events.seats_changed({seat.schedule_id for seat in held.values()})
+
+        booking_logger.debug(
+            "Assembled booking %s: %s passengers, %s details, %s add-on links, %s taxes",
+            booking.id, len(passengers), len(details), len(detail_addons), len(booking_taxes)
+        )
+        return passengers, details, booking_taxes
+
+    @staticmethod
+    def totals(booking, details, booking_taxes):
+        """
+        Store the booking's fare, tax and total amounts (one query for the
+        add-on prices, one UPDATE). The payable total is fares + taxes +
+        add-ons as computed here; a total sent by the client is never used.
+        """
+        from app.models import BookingDetail
+
+        addons_total = BookingDetail.addons.through.objects.filter(
+            bookingdetail__booking=booking,
+            addon__included=False,
+        ).aggregate(total=Sum('addon__price'))['total'] or Decimal('0.00')
+
+        booking.base_fare_total = sum((detail.price for detail in details), Decimal('0.00'))
+        booking.insurance_total = Decimal('0.00')
+        booking.tax_total = sum((tax.amount for tax in booking_taxes), Decimal('0.00'))
+        booking.total_amount = (
+            booking.base_fare_total + booking.insurance_total + booking.tax_total + addons_total
+        )
+        booking.save(update_fields=['base_fare_total', 'insurance_total', 'tax_total', 'total_amount'])
+
+
+# Singleton instance
+booking_assembly = BookingAssembler()
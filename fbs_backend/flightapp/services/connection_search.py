@@ -0,0 +1,286 @@
+# flightapp/services/connection_search.py
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .data_versions import data_versions
+
+
+class Leg:
+    """One scheduled direct flight in the connection index"""
+
+    __slots__ = (
+        'schedule_id', 'flight_number', 'airline_code',
+        'origin', 'destination', 'departure_time', 'arrival_time',
+    )
+
+    def __init__(self, schedule_id, flight_number, airline_code, origin, destination,
+                 departure_time, arrival_time):
+        self.schedule_id = schedule_id
+        self.flight_number = flight_number
+        self.airline_code = airline_code
+        self.origin = origin
+        self.destination = destination
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+
+
+class ConnectionSearch:
+    """
+    Connecting-itinerary search over the route graph.
+
+    Keeps an in-memory timetable per departure day: open schedules grouped by
+    origin airport and sorted by departure time. Itineraries of up to two
+    stops are found by walking that graph with bisect lookups, honouring the
+    minimum connection time and maximum layover. Only the days a changed
+    schedule was or is on are rebuilt (one query per day); other processes
+    notice through a per-day version token (flightapp/services/data_versions.py),
+    and CONNECTION_INDEX_TTL rebuilds a day regardless. Prices and
+    seat availability are read for the candidate legs in one query.
+    """
+
+    _instance = None
+    _initialized = False
+
+    KEY_PREFIX = 'connection_index_version'
+
+    # Upper bound on itineraries priced per search
+    MAX_CANDIDATES = 500
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not ConnectionSearch._initialized:
+            self._lock = threading.Lock()
+            # day -> {'version', 'built_at', 'departures': {airport: ([times], [legs])}}
+            self._days = {}
+            ConnectionSearch._initialized = True
+
+    # ------------------------------------------------------------------
+    # Settings
+    # ------------------------------------------------------------------
+    @property
+    def min_connection(self):
+        return timedelta(minutes=getattr(settings, 'CONNECTION_MIN_MINUTES', 45))
+
+    @property
+    def max_layover(self):
+        return timedelta(minutes=getattr(settings, 'CONNECTION_MAX_LAYOVER_MINUTES', 360))
+
+    @property
+    def index_ttl(self):
+        """Seconds before a day is rebuilt even without a change"""
+        return getattr(settings, 'CONNECTION_INDEX_TTL', 600)
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _version_key(self, day):
+        return f"{self.KEY_PREFIX}:{day.isoformat()}"
+
+    def _build_day(self, day):
+        """Timetable of one departure day (one query)"""
+        from app.models import Schedule
+
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        rows = Schedule.objects.filter(
+            status='Open',
+            departure_time__gte=start,
+            departure_time__lt=start + timedelta(days=1),
+        ).order_by('departure_time').values_list(
+            'id',
+            'flight__flight_number',
+            'flight__airline__code',
+            'flight__route__origin_airport__code',
+            'flight__route__destination_airport__code',
+            'departure_time',
+            'arrival_time',
+        )
+
+        departures = {}
+        for row in rows:
+            leg = Leg(*row)
+            times, legs = departures.setdefault(leg.origin, ([], []))
+            times.append(leg.departure_time)
+            legs.append(leg)
+        return departures
+
+    def _day(self, day):
+        """Departures of a day, rebuilt if it changed or expired"""
+        version = data_versions.get(self._version_key(day))
+        entry = self._days.get(day)
+        if (
+            entry is not None and
+            entry['version'] == version and
+            time.monotonic() - entry['built_at'] < self.index_ttl
+        ):
+            return entry['departures']
+
+        departures = self._build_day(day)
+        with self._lock:
+            self._days[day] = {
+                'version': version,
+                'built_at': time.monotonic(),
+                'departures': departures,
+            }
+        return departures
+
+    def _departures(self, airport, earliest, latest, days):
+        """Legs leaving airport within [earliest, latest]"""
+        day = timezone.localtime(earliest).date()
+        last_day = timezone.localtime(latest).date()
+        found = []
+        while day <= last_day:
+            if day not in days:
+                days[day] = self._day(day)
+            times, legs = days[day].get(airport, ([], []))
+            start = bisect.bisect_left(times, earliest)
+            end = bisect.bisect_right(times, latest)
+            found.extend(legs[start:end])
+            day += timedelta(days=1)
+        return found
+
+    def invalidate(self, departure_time):
+        """Rebuild the day of a departure at its next search, after commit"""
+        day = (
+            timezone.localtime(departure_time).date()
+            if timezone.is_aware(departure_time) else departure_time.date()
+        )
+
+        def drop():
+            with self._lock:
+                self._days.pop(day, None)
+
+        data_versions.bump(self._version_key(day), on_bump=drop)
+
+    def invalidate_schedule(self, schedule_id):
+        """Rebuild the day a schedule departs on"""
+        from app.models import Schedule
+
+        departure_time = Schedule.objects.filter(pk=schedule_id).values_list(
+            'departure_time', flat=True
+        ).first()
+        if departure_time:
+            self.invalidate(departure_time)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def find_paths(self, origin, destination, day, max_stops=2):
+        """Lists of legs from origin to destination departing on day"""
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        days = {}
+        paths = []
+
+        def extend(path):
+            if len(paths) >= self.MAX_CANDIDATES:
+                return
+            last = path[-1]
+            if last.destination == destination:
+                paths.append(path)
+                return
+            if len(path) > max_stops:
+                return
+
+            visited = {leg.origin for leg in path}
+            for leg in self._departures(
+                last.destination,
+                last.arrival_time + self.min_connection,
+                last.arrival_time + self.max_layover,
+                days
+            ):
+                if leg.destination not in visited:
+                    extend(path + [leg])
+
+        for leg in self._departures(origin, start, start + timedelta(days=1) - timedelta(microseconds=1), days):
+            extend([leg])
+
+        return paths
+
+    def search(self, origin, destination, day, max_stops=2, passengers=1, sort='best', limit=20):
+        """Ranked itineraries with prices and seats for every leg"""
+        from app.models import Schedule
+
+        paths = self.find_paths(origin, destination, day, max_stops)
+        if not paths:
+            return []
+
+        # Price and seats of every candidate leg in one query
+        leg_ids = {leg.schedule_id for path in paths for leg in path}
+        details = {
+            row['id']: row
+            for row in Schedule.objects.filter(id__in=leg_ids).values(
+                'id', 'ml_base_price', 'price'
+            ).annotate(available_seats=Sum('seat_inventory__available_seats'))
+        }
+
+        itineraries = []
+        for path in paths:
+            legs = []
+            for leg in path:
+                detail = details.get(leg.schedule_id)
+                if detail is None or (detail['available_seats'] or 0) < passengers:
+                    break
+                legs.append((leg, detail))
+            else:
+                itineraries.append(self._itinerary(legs))
+
+        if sort == 'price':
+            key = lambda it: (it['total_price'], it['duration_minutes'])
+        elif sort == 'duration':
+            key = lambda it: (it['duration_minutes'], it['total_price'])
+        else:
+            key = lambda it: (it['total_stops'], it['duration_minutes'], it['total_price'])
+
+        itineraries.sort(key=key)
+        return itineraries[:limit]
+
+    def _itinerary(self, legs):
+        first, last = legs[0][0], legs[-1][0]
+        layovers = [
+            {
+                'airport': arriving.destination,
+                'minutes': int((departing.departure_time - arriving.arrival_time).total_seconds() // 60),
+            }
+            for (arriving, _), (departing, _) in zip(legs, legs[1:])
+        ]
+        leg_rows = [
+            {
+                'schedule_id': leg.schedule_id,
+                'flight_number': leg.flight_number,
+                'airline_code': leg.airline_code,
+                'origin': leg.origin,
+                'destination': leg.destination,
+                'departure_time': leg.departure_time.isoformat(),
+                'arrival_time': leg.arrival_time.isoformat(),
+                # Stored ML price, or the schedule price until the first refresh
+                'price': float(detail['ml_base_price'] or detail['price']),
+                'available_seats': detail['available_seats'] or 0,
+            }
+            for leg, detail in legs
+        ]
+        return {
+            'total_stops': len(legs) - 1,
+            'origin': first.origin,
+            'destination': last.destination,
+            'departure_time': first.departure_time.isoformat(),
+            'arrival_time': last.arrival_time.isoformat(),
+            'duration_minutes': int((last.arrival_time - first.departure_time).total_seconds() // 60),
+            'total_price': round(sum(row['price'] for row in leg_rows), 2),
+            'layovers': layovers,
+            'legs': leg_rows,
+        }
+
+
+# Singleton instance
+connection_search = ConnectionSearch()
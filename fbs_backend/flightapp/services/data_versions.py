@@ -0,0 +1,106 @@
+# flightapp/services/data_versions.py
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+class DataVersions:
+    """
+    Version tokens of in-memory caches, shared by every worker process.
+
+    Each worker keeps its own copy of slowly changing data (reference data,
+    tax rules, the connection and airport indexes) keyed by a version token.
+    The tokens live in the database (app.DataVersion), so a change saved by
+    one process reaches all of them. A process checks the tokens it uses
+    with one query at most every DATA_VERSION_CHECK_SECONDS, which bounds
+    how long another process can serve stale data.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not DataVersions._initialized:
+            self._lock = threading.Lock()
+            # key -> (token, monotonic time it was read)
+            self._tokens = {}
+            DataVersions._initialized = True
+
+    @property
+    def check_interval(self):
+        """Seconds a process trusts the tokens it has read"""
+        return getattr(settings, 'DATA_VERSION_CHECK_SECONDS', 2)
+
+    @staticmethod
+    def _new_token():
+        return uuid.uuid4().hex
+
+    def get(self, key):
+        """Current token of a key"""
+        return self.get_many([key])[key]
+
+    def get_many(self, keys):
+        """{key: token}, reading the expired ones with one query"""
+        from app.models import DataVersion
+
+        now = time.monotonic()
+        tokens = {}
+        stale = []
+        for key in keys:
+            cached = self._tokens.get(key)
+            if cached is not None and now - cached[1] < self.check_interval:
+                tokens[key] = cached[0]
+            else:
+                stale.append(key)
+        if not stale:
+            return tokens
+
+        found = dict(DataVersion.objects.filter(key__in=stale).values_list('key', 'token'))
+        missing = [key for key in stale if key not in found]
+        if missing:
+            # First use: agree on one token across processes
+            DataVersion.objects.bulk_create(
+                [DataVersion(key=key, token=self._new_token()) for key in missing],
+                ignore_conflicts=True,
+            )
+            found.update(DataVersion.objects.filter(key__in=missing).values_list('key', 'token'))
+
+        with self._lock:
+            for key in stale:
+                self._tokens[key] = (found[key], now)
+        tokens.update((key, found[key]) for key in stale)
+        return tokens
+
+    def bump(self, key, on_bump=None):
+        """
+        Replace a key's token after commit (every process sees it within
+        check_interval, this one immediately); on_bump runs afterwards.
+        """
+        def bump():
+            from app.models import DataVersion
+
+            token = self._new_token()
+            updated = DataVersion.objects.filter(key=key).update(token=token, updated_at=timezone.now())
+            if not updated:
+                DataVersion.objects.bulk_create([DataVersion(key=key, token=token)], ignore_conflicts=True)
+            with self._lock:
+                self._tokens.pop(key, None)
+            if on_bump is not None:
+                on_bump()
+
+        transaction.on_commit(bump)
+
+
+# Singleton instance
+data_versions = DataVersions()
@@ -0,0 +1,173 @@
+# flightapp/services/demand_tracker.py
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger('flightapp.pricing')
+
+
+class DemandTracker:
+    """
+    Sliding-window demand counters shared by every worker process.
+
+    Counts live in a local SQLite file as one row per (key, minute bucket).
+    Increments are atomic UPSERTs, and a window count is the sum of the
+    buckets inside it, so gunicorn workers all see the same demand.
+    """
+
+    # Window name -> length in minutes
+    WINDOWS = {
+        '5m': 5,
+        '1h': 60,
+        '24h': 1440,
+    }
+
+    # Buckets older than the longest window are purged at most this often (seconds)
+    PURGE_INTERVAL = 600
+
+    def __init__(self, path=None):
+        self._path = path
+        self._local = threading.local()
+        self._last_purge = 0
+        self._schema_ready = False
+
+    @property
+    def path(self):
+        return str(self._path or getattr(settings, 'DEMAND_TRACKER_PATH', 'demand.sqlite3'))
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    @staticmethod
+    def route_key(origin, destination):
+        return f"route:{origin}-{destination}"
+
+    @staticmethod
+    def flight_key(flight_number):
+        return f"flight:{flight_number}"
+
+    @staticmethod
+    def session_flight_key(session_id, flight_number):
+        return f"session:{session_id}:{flight_number}"
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _connection(self):
+        """One SQLite connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if not self._schema_ready:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS demand_buckets ('
+                    ' key TEXT NOT NULL,'
+                    ' bucket INTEGER NOT NULL,'
+                    ' count INTEGER NOT NULL,'
+                    ' PRIMARY KEY (key, bucket)'
+                    ') WITHOUT ROWID'
+                )
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _bucket(now=None):
+        return int((now or time.time()) // 60)
+
+    def record(self, keys, now=None):
+        """Atomically add one hit per key (repeated keys add more)"""
+        increments = Counter(key for key in keys if key)
+        if not increments:
+            return
+
+        bucket = self._bucket(now)
+        try:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(
+                    'INSERT INTO demand_buckets (key, bucket, count) VALUES (?, ?, ?) '
+                    'ON CONFLICT (key, bucket) DO UPDATE SET count = count + excluded.count',
+                    [(key, bucket, count) for key, count in increments.items()]
+                )
+                self._purge_if_due(conn, bucket)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        except Exception as e:
+            logger.warning("Demand tracking failed: %s", e)
+
+    def _purge_if_due(self, conn, bucket):
+        if time.time() - self._last_purge < self.PURGE_INTERVAL:
+            return
+        conn.execute(
+            'DELETE FROM demand_buckets WHERE bucket <= ?',
+            (bucket - max(self.WINDOWS.values()),)
+        )
+        self._last_purge = time.time()
+
+    def windows(self, keys, now=None):
+        """{key: {'5m': n, '1h': n, '24h': n}} for every key (one query)"""
+        keys = list({key for key in keys if key})
+        result = {key: {name: 0 for name in self.WINDOWS} for key in keys}
+        if not keys:
+            return result
+
+        bucket = self._bucket(now)
+        names = list(self.WINDOWS)
+        sums = ', '.join(
+            'SUM(CASE WHEN bucket > ? THEN count ELSE 0 END)' for _ in names
+        )
+        params = [bucket - self.WINDOWS[name] for name in names]
+        params += keys
+        params.append(bucket - max(self.WINDOWS.values()))
+
+        try:
+            rows = self._connection().execute(
+                f'SELECT key, {sums} FROM demand_buckets '
+                f'WHERE key IN ({", ".join("?" for _ in keys)}) AND bucket > ? '
+                f'GROUP BY key',
+                params
+            ).fetchall()
+        except Exception as e:
+            logger.warning("Demand lookup failed: %s", e)
+            return result
+
+        for row in rows:
+            result[row[0]] = dict(zip(names, (value or 0 for value in row[1:])))
+        return result
+
+    def counts(self, keys, window='1h', now=None):
+        """{key: hits in window} for every key"""
+        return {
+            key: values[window]
+            for key, values in self.windows(keys, now=now).items()
+        }
+
+    # ------------------------------------------------------------------
+    # Search demand
+    # ------------------------------------------------------------------
+    def record_search(self, origin, destination, flight_numbers, now=None):
+        """Count one search for a route and each listed flight (one write)"""
+        keys = [self.flight_key(flight_number) for flight_number in flight_numbers]
+        if origin and destination:
+            keys.append(self.route_key(origin, destination))
+        self.record(keys, now=now)
+
+    def flight_demand(self, flight_numbers, window='1h', now=None):
+        """{flight_number: searches in window}"""
+        flight_numbers = list(flight_numbers)
+        counts = self.counts([self.flight_key(n) for n in flight_numbers], window=window, now=now)
+        return {n: counts.get(self.flight_key(n), 0) for n in flight_numbers}
+
+
+# Singleton instance
+demand_tracker = DemandTracker()
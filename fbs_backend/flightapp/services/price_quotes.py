@@ -0,0 +1,153 @@
+# flightapp/services/price_quotes.py
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.db import IntegrityError, transaction
+
+
+class PriceQuoteError(Exception):
+    """A price quote that cannot be redeemed (invalid, expired, used, mismatched)"""
+
+
+class PriceQuoteStore:
+    """
+    Signed, time-boxed price quotes.
+
+    Search issues one quote per schedule row: a signed token covering the
+    schedule, the price of every seat class shown, and an expiry. Booking
+    redeems the token instead of re-running ML and dynamic pricing, and gets
+    a verified price back. Tokens are self-contained (any worker can verify
+    them); the store only remembers redeemed quotes, as app.RedeemedPriceQuote
+    rows inserted in the booking transaction, so a quote is used once across
+    all workers. Rows are purged once their quote would have expired anyway.
+    """
+
+    SALT = 'flightapp.price_quote'
+
+    # Redemptions of expired quotes are deleted at most this often (seconds)
+    PURGE_INTERVAL = 600
+    _last_purge = 0
+
+    # Key of the row-level price in a quote (no seat class selected)
+    DEFAULT_CLASS = ''
+
+    @property
+    def ttl(self):
+        """Seconds a quote stays redeemable"""
+        return getattr(settings, 'PRICE_QUOTE_TTL_SECONDS', 900)
+
+    @staticmethod
+    def class_key(seat_class):
+        return (seat_class or '').strip().lower()
+
+    def issue(self, schedule_id, price, seat_class_prices=None, now=None):
+        """
+        Quote a search row.
+        Returns {'price_id', 'price_quote', 'price_expires_at'} to merge into the row.
+        """
+        now = now or time.time()
+        quote_id = uuid.uuid4().hex[:16]
+        expires_at = int(now + self.ttl)
+
+        prices = {self.DEFAULT_CLASS: str(price)}
+        for seat_class, seat_class_price in (seat_class_prices or {}).items():
+            prices[self.class_key(seat_class)] = str(seat_class_price)
+
+        token = signing.dumps(
+            {'q': quote_id, 's': int(schedule_id), 'p': prices, 'e': expires_at},
+            salt=self.SALT,
+            compress=True
+        )
+        return {
+            'price_id': quote_id,
+            'price_quote': token,
+            'price_expires_at': expires_at,
+        }
+
+    def _check(self, token, schedule_id, seat_class=None, now=None, check_used=True):
+        """Return (quote, Decimal price) or raise PriceQuoteError"""
+        try:
+            quote = signing.loads(token, salt=self.SALT)
+        except signing.BadSignature:
+            raise PriceQuoteError('Invalid price quote')
+
+        if quote['e'] < (now or time.time()):
+            raise PriceQuoteError('Price quote has expired, please search again')
+
+        if quote['s'] != int(schedule_id):
+            raise PriceQuoteError('Price quote does not match the selected flight')
+
+        class_key = self.class_key(seat_class)
+        if class_key not in quote['p']:
+            raise PriceQuoteError(f'Price quote does not cover seat class {seat_class}')
+
+        if check_used:
+            from app.models import RedeemedPriceQuote
+            if RedeemedPriceQuote.objects.filter(quote_id=quote['q']).exists():
+                raise PriceQuoteError('Price quote has already been used')
+
+        return quote, Decimal(quote['p'][class_key])
+
+    def _mark_redeemed(self, quote):
+        """
+        Record a redemption in the current transaction. The unique quote_id
+        makes a concurrent redemption of the same quote wait for this one and
+        fail once it commits.
+        """
+        from app.models import RedeemedPriceQuote
+
+        try:
+            with transaction.atomic():
+                RedeemedPriceQuote.objects.create(
+                    quote_id=quote['q'],
+                    schedule_id=quote['s'],
+                    expires_at=datetime.fromtimestamp(quote['e'], tz=dt_timezone.utc),
+                )
+        except IntegrityError:
+            raise PriceQuoteError('Price quote has already been used')
+        self._purge_if_due()
+
+    def _purge_if_due(self):
+        from app.models import RedeemedPriceQuote
+
+        if time.time() - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = time.time()
+        RedeemedPriceQuote.objects.filter(
+            expires_at__lt=datetime.fromtimestamp(time.time(), tz=dt_timezone.utc)
+        ).delete()
+
+    def verify(self, token, schedule_id, seat_class=None, now=None):
+        """Price of a valid quote for this schedule and seat class, without using it up"""
+        return self._check(token, schedule_id, seat_class, now)[1]
+
+    def redeem(self, token, schedule_id, seat_class=None):
+        """
+        Verify a quote and mark it used in the surrounding transaction (a
+        rolled-back booking leaves the quote redeemable). Returns the Decimal price.
+        """
+        return self.redeem_fares(token, schedule_id, seat_class)[0]
+
+    def redeem_fares(self, token, schedule_id, seat_class=None):
+        """
+        redeem() that also returns the quoted fare of every seat class of the
+        row, for passengers whose seat is in another class:
+        (Decimal price, {seat class key: Decimal price}).
+        """
+        quote, price = self._check(token, schedule_id, seat_class, check_used=False)
+        self._mark_redeemed(quote)
+
+        class_fares = {
+            class_key: Decimal(class_price)
+            for class_key, class_price in quote['p'].items()
+            if class_key != self.DEFAULT_CLASS
+        }
+        return price, class_fares
+
+
+# Singleton instance
+price_quotes = PriceQuoteStore()
@@ -0,0 +1,144 @@
+# flightapp/services/reference_data.py
+import hashlib
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from .data_versions import data_versions
+
+
+class ReferenceDataCache:
+    """
+    Versioned cache of rarely changing reference data (countries, airports,
+    add-on catalogues, seat-class features).
+
+    Every dataset has a version token (flightapp/services/data_versions.py),
+    replaced after commit whenever one of its models is saved or deleted;
+    other processes see the new token within DATA_VERSION_CHECK_SECONDS.
+    Each process
+    keeps the rendered JSON of every (dataset, query string) it served with
+    the version it was built at, so a repeat request is a cache lookup and a
+    byte copy. The ETag is derived from the version, so a client sending
+    If-None-Match gets a 304 before anything is built or read.
+    """
+
+    _instance = None
+    _initialized = False
+
+    KEY_PREFIX = 'reference_data_version'
+
+    # dataset -> models whose changes invalidate it
+    DATASETS = {
+        'countries': ('app.Country',),
+        'airports': ('app.Airport', 'app.Country'),
+        'meal_options': ('app.MealOption', 'app.Airline'),
+        'baggage_options': ('app.BaggageOption', 'app.Airline'),
+        'assistance_services': ('app.AssistanceService', 'app.Airline'),
+        'seat_class_features': ('app.SeatClass', 'app.SeatClassFeature'),
+    }
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not ReferenceDataCache._initialized:
+            self._lock = threading.Lock()
+            # dataset -> {variant: (version, etag, body)}
+            self._entries = {}
+            self._renderer = JSONRenderer()
+            ReferenceDataCache._initialized = True
+
+    @property
+    def max_variants(self):
+        """Query-string variants kept per dataset (e.g. ?airline=, ?search=)"""
+        return getattr(settings, 'REFERENCE_DATA_MAX_VARIANTS', 64)
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+    def _version_key(self, dataset):
+        return f"{self.KEY_PREFIX}:{dataset}"
+
+    def version(self, dataset):
+        return data_versions.get(self._version_key(dataset))
+
+    def models(self):
+        """Model classes that invalidate some dataset"""
+        labels = {label for labels in self.DATASETS.values() for label in labels}
+        return [apps.get_model(label) for label in sorted(labels)]
+
+    def invalidate(self, dataset):
+        """New version of a dataset in every process, after commit"""
+        def drop():
+            with self._lock:
+                self._entries.pop(dataset, None)
+
+        data_versions.bump(self._version_key(dataset), on_bump=drop)
+
+    def invalidate_model(self, model):
+        """Invalidate every dataset built from model"""
+        label = model._meta.label
+        for dataset, labels in self.DATASETS.items():
+            if label in labels:
+                self.invalidate(dataset)
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+    @staticmethod
+    def variant(request):
+        """Canonical query string, so ?b=1&a=2 and ?a=2&b=1 share an entry"""
+        params = sorted(
+            (key, value)
+            for key in request.GET
+            for value in request.GET.getlist(key)
+        )
+        return '&'.join(f"{key}={value}" for key, value in params)
+
+    @staticmethod
+    def etag(dataset, version, variant):
+        digest = hashlib.sha1(variant.encode()).hexdigest()[:12]
+        return f'"{dataset}-{version}-{digest}"'
+
+    def _response(self, body, etag, status=200):
+        response = HttpResponse(body, status=status, content_type='application/json')
+        response['ETag'] = etag
+        # Clients may keep the copy but must revalidate (cheap 304) every time
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def respond(self, request, dataset, build):
+        """
+        JSON response for a dataset; build() returns the data and is only
+        called when this process has no copy of the current version.
+        """
+        version = self.version(dataset)
+        variant = self.variant(request)
+        etag = self.etag(dataset, version, variant)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return self._response(b'', etag, status=304)
+
+        entry = self._entries.get(dataset, {}).get(variant)
+        if entry is None or entry[0] != version:
+            body = self._renderer.render(build())
+            entry = (version, etag, body)
+            with self._lock:
+                variants = self._entries.setdefault(dataset, {})
+                if variant not in variants and len(variants) >= self.max_variants:
+                    variants.clear()
+                variants[variant] = entry
+
+        return self._response(entry[2], entry[1])
+
+
+# Singleton instance
+reference_data = ReferenceDataCache()
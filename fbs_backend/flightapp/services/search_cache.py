@@ -0,0 +1,109 @@
+# flightapp/services/search_cache.py
+import copy
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .data_versions import data_versions
+
+
+class ScheduleSearchCache:
+    """
+    Shared cache of schedule search results.
+
+    Entries are keyed by the normalized origin/destination/date query and hold
+    the serialized schedule rows plus the inputs needed to price them (stored
+    ML base price, flight data). Per-user dynamic pricing is applied by the
+    caller after a hit, so one entry serves every user.
+
+    Each query key has a version token shared by every process
+    (flightapp/services/data_versions.py); schedule and seat changes replace
+    the token after commit, which invalidates the entry (including one being
+    built concurrently) in this process at once and in the others within
+    DATA_VERSION_CHECK_SECONDS.
+    """
+
+    KEY_PREFIX = 'schedule_search'
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'SCHEDULE_SEARCH_CACHE_TTL', 60)
+
+    def normalize_query(self, origin, destination, departure):
+        """Return (origin, destination, date) for a cacheable search, else None"""
+        if not (origin and destination and departure):
+            return None
+
+        clean_date = departure.split('T')[0].strip()
+        try:
+            date.fromisoformat(clean_date)
+        except ValueError:
+            return None
+
+        origin, destination = origin.strip(), destination.strip()
+        # Airport codes only: every query key gets a shared version row
+        if not all(code.isalnum() and len(code) <= 10 for code in (origin, destination)):
+            return None
+
+        return (origin, destination, clean_date)
+
+    def _entry_key(self, query, variant=None):
+        key = f"{self.KEY_PREFIX}:{':'.join(query)}"
+        return f"{key}:{variant}" if variant else key
+
+    def _version_key(self, query):
+        return f"{self.KEY_PREFIX}_version:{':'.join(query)}"
+
+    def lookup(self, query, variant=None):
+        """
+        Return (entries, version).
+        entries is a private copy of the cached rows, or None on a miss;
+        pass version back to store() after rebuilding.
+        variant separates results of the same query (e.g. one sorted page);
+        all variants share the query's version, so they are invalidated together.
+        """
+        version = data_versions.get(self._version_key(query))
+
+        cached = cache.get(self._entry_key(query, variant))
+        if cached and cached['version'] == version:
+            return copy.deepcopy(cached['entries']), version
+
+        return None, version
+
+    def store(self, query, version, entries, variant=None):
+        """Cache entries unless the query was invalidated while they were built"""
+        if version is None or data_versions.get(self._version_key(query)) != version:
+            return
+        cache.set(
+            self._entry_key(query, variant),
+            {'version': version, 'entries': entries},
+            self.timeout
+        )
+
+    def invalidate(self, origin, destination, departure_time):
+        """Invalidate the cached search containing a flight, after commit"""
+        query = (
+            origin,
+            destination,
+            timezone.localtime(departure_time).date().isoformat()
+            if timezone.is_aware(departure_time) else departure_time.date().isoformat()
+        )
+        data_versions.bump(self._version_key(query))
+
+    def invalidate_schedule(self, schedule_id):
+        """Invalidate the cached search containing a schedule"""
+        from app.models import Schedule
+
+        row = Schedule.objects.filter(pk=schedule_id).values_list(
+            'flight__route__origin_airport__code',
+            'flight__route__destination_airport__code',
+            'departure_time',
+        ).first()
+        if row:
+            self.invalidate(*row)
+
+
+# Singleton instance
+schedule_search_cache = ScheduleSearchCache()
@@ -0,0 +1,154 @@
+# flightapp/services/search_pagination.py
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+
+
+class InvalidCursor(ValueError):
+    """Cursor that cannot be decoded or belongs to another sort"""
+
+
+class ScheduleSearchPaginator:
+    """
+    Keyset (cursor) pagination of schedule search results.
+
+    Every sort is a stable (key, id) pair backed by a Schedule index, so a
+    page is one ORDER BY ... LIMIT query no matter how wide the search is,
+    and pages do not shift when schedules are added or removed.
+    Price sorts by the stored base price (ML price, else schedule price):
+    the per-user dynamic price is only computed for the visible page, so
+    the displayed prices need not be in order (rows carry 'sort_price').
+    Airline sorts by airline name through airline_sort_name and
+    schedule_sort_airline; the other sorts lead with status like the
+    search filter.
+    """
+
+    # sort name -> (annotation, how the cursor stores the key)
+    SORTS = {
+        'price': (Coalesce('ml_base_price', 'price'), 'decimal'),
+        'departure': (F('departure_time'), 'datetime'),
+        'duration': (F('arrival_time') - F('departure_time'), 'timedelta'),
+        'airline': (F('flight__airline__name'), 'string'),
+    }
+
+    DEFAULT_SORT = 'departure'
+    SORT_KEY = 'search_sort_key'
+
+    @property
+    def default_page_size(self):
+        return getattr(settings, 'SCHEDULE_SEARCH_PAGE_SIZE', 20)
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'SCHEDULE_SEARCH_MAX_PAGE_SIZE', 100)
+
+    def parse_sort(self, sort):
+        """Return (name, descending) for 'price', '-price', ..."""
+        sort = (sort or self.DEFAULT_SORT).strip()
+        descending = sort.startswith('-')
+        name = sort.lstrip('-')
+        if name not in self.SORTS:
+            raise InvalidCursor(f"Unknown sort '{sort}', use one of: {', '.join(self.SORTS)}")
+        return name, descending
+
+    def parse_page_size(self, page_size):
+        if not page_size:
+            return self.default_page_size
+        try:
+            return min(max(int(page_size), 1), self.max_page_size)
+        except (TypeError, ValueError):
+            raise InvalidCursor('page_size must be an integer')
+
+    # ------------------------------------------------------------------
+    # Cursors
+    # ------------------------------------------------------------------
+    def _dump_key(self, value, kind):
+        if kind == 'datetime':
+            return value.isoformat()
+        if kind == 'timedelta':
+            return value.total_seconds()
+        return str(value)
+
+    def _load_key(self, value, kind):
+        """Cursor key back to its sort value; raises ValueError if malformed"""
+        if kind == 'timedelta':
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError('duration key must be a number')
+            return timedelta(seconds=value)
+        if not isinstance(value, str):
+            raise ValueError('cursor key must be a string')
+        if kind == 'decimal':
+            value = Decimal(value)
+            if not value.is_finite():
+                raise ValueError('price key must be a finite number')
+            return value
+        if kind == 'datetime':
+            return datetime.fromisoformat(value)
+        return value
+
+    def encode(self, sort, key, schedule_id):
+        name, _ = self.parse_sort(sort)
+        payload = {'s': sort, 'k': self._dump_key(key, self.SORTS[name][1]), 'i': schedule_id}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+    def decode(self, cursor, sort):
+        """Return (key, schedule_id) of the last row of the previous page"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(payload, dict) or not isinstance(payload.get('s'), str):
+                raise ValueError('cursor payload must be an object with a sort')
+            name, _ = self.parse_sort(payload['s'])
+            key = self._load_key(payload['k'], self.SORTS[name][1])
+            if isinstance(payload['i'], bool) or not isinstance(payload['i'], int):
+                raise ValueError('cursor id must be an integer')
+            schedule_id = payload['i']
+        except (ValueError, KeyError, TypeError, AttributeError,
+                ArithmeticError, InvalidOperation, binascii.Error, UnicodeError):
+            raise InvalidCursor('Invalid cursor')
+        if payload['s'] != sort:
+            raise InvalidCursor('Cursor was issued for a different sort')
+        return key, schedule_id
+
+    # ------------------------------------------------------------------
+    # Paging
+    # ------------------------------------------------------------------
+    def page(self, queryset, sort=None, cursor=None, page_size=None):
+        """Return (schedules on this page, next cursor or None)"""
+        sort = sort or self.DEFAULT_SORT
+        name, descending = self.parse_sort(sort)
+        page_size = self.parse_page_size(page_size)
+        expression = self.SORTS[name][0]
+
+        queryset = queryset.annotate(**{self.SORT_KEY: expression})
+
+        if cursor:
+            key, last_id = self.decode(cursor, sort)
+            after = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.SORT_KEY}__{after}': key}) |
+                Q(**{self.SORT_KEY: key, f'id__{after}': last_id})
+            )
+
+        prefix = '-' if descending else ''
+        schedules = list(
+            queryset.order_by(f'{prefix}{self.SORT_KEY}', f'{prefix}id')[:page_size + 1]
+        )
+
+        next_cursor = None
+        if len(schedules) > page_size:
+            schedules = schedules[:page_size]
+            last = schedules[-1]
+            next_cursor = self.encode(sort, getattr(last, self.SORT_KEY), last.id)
+
+        return schedules, next_cursor
+
+
+# Singleton instance
+schedule_search_paginator = ScheduleSearchPaginator()
@@ -0,0 +1,257 @@
+# flightapp/services/seat_assignment.py
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .seat_events import seat_events
+
+
+class SeatAssignmentEngine:
+    """
+    Automatic seat assignment for passengers who did not pick a seat.
+
+    Works per schedule over the free seats of the Seat row/column grid,
+    split into runs of adjacent seats (a missing or taken seat, or an aisle
+    between two aisle seats, ends a run). A party is seated together in one
+    run when possible, otherwise in as few runs as possible near each other;
+    an infant always sits next to its linked adult. Children, infants and
+    adults travelling with an infant are never put on an exit row.
+
+    Each schedule is one batch: the free seats are locked with a single
+    SELECT ... FOR UPDATE SKIP LOCKED, and seats, holds and booking details
+    are written with one bulk statement each.
+    """
+
+    _instance = None
+    _initialized = False
+
+    RESTRICTED_TYPES = ('Child', 'Infant')
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not SeatAssignmentEngine._initialized:
+            SeatAssignmentEngine._initialized = True
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'SEAT_AUTO_ASSIGN', True)
+
+    # ------------------------------------------------------------------
+    # Party
+    # ------------------------------------------------------------------
+    def units(self, details):
+        """
+        Split a party into seating units: [adult, infant] pairs (the infant's
+        linked adult, else the next adult without an infant) and singles.
+        """
+        adults = [d for d in details if d.passenger.passenger_type == 'Adult']
+        infants = [d for d in details if d.passenger.passenger_type == 'Infant']
+        by_passenger = {d.passenger_id: d for d in adults}
+
+        partner = {}
+        unlinked = []
+        for infant in infants:
+            adult = by_passenger.get(infant.passenger.linked_adult_id)
+            if adult is not None and adult.id not in partner:
+                partner[adult.id] = infant
+            else:
+                unlinked.append(infant)
+        for adult in adults:
+            if unlinked and adult.id not in partner:
+                partner[adult.id] = unlinked.pop(0)
+
+        units = []
+        for detail in details:
+            if detail.passenger.passenger_type == 'Infant':
+                continue
+            if detail.id in partner:
+                units.append([detail, partner[detail.id]])
+            else:
+                units.append([detail])
+        # More infants than adults: seated on their own
+        units.extend([infant] for infant in unlinked)
+        return units
+
+    def restricted(self, unit):
+        """Unit that may not sit on an exit row"""
+        return any(d.passenger.passenger_type in self.RESTRICTED_TYPES for d in unit)
+
+    # ------------------------------------------------------------------
+    # Grid
+    # ------------------------------------------------------------------
+    def runs(self, seats):
+        """
+        Runs of adjacent free seats, front rows first. Seats without a
+        row/column are one run in seat-number order.
+        Each run is {'row', 'exit', 'seats'}.
+        """
+        rows = {}
+        unplaced = []
+        for seat in seats:
+            if seat.row and seat.column:
+                rows.setdefault(seat.row, []).append(seat)
+            else:
+                unplaced.append(seat)
+
+        runs = []
+        for row in sorted(rows):
+            columns = sorted(rows[row], key=lambda seat: seat.column)
+            current = [columns[0]]
+            for previous, seat in zip(columns, columns[1:]):
+                gap = ord(seat.column) - ord(previous.column) != 1
+                aisle = previous.is_aisle and seat.is_aisle
+                if gap or aisle or previous.is_exit_row != seat.is_exit_row:
+                    runs.append({'row': row, 'exit': current[0].is_exit_row, 'seats': current})
+                    current = [seat]
+                else:
+                    current.append(seat)
+            runs.append({'row': row, 'exit': current[0].is_exit_row, 'seats': current})
+
+        if unplaced:
+            unplaced.sort(key=lambda seat: (len(seat.seat_number), seat.seat_number))
+            # Exit-row seats still have to be kept apart
+            for exit_row in (False, True):
+                group = [seat for seat in unplaced if seat.is_exit_row == exit_row]
+                if group:
+                    runs.append({'row': None, 'exit': exit_row, 'seats': group})
+        return runs
+
+    def place(self, units, runs):
+        """{detail id: seat} for a party (consumes seats from runs)"""
+        assignment = {}
+
+        def take(unit, run):
+            for detail in unit:
+                assignment[detail.id] = run['seats'].pop(0)
+
+        # 1. Whole party in one run
+        size = sum(len(unit) for unit in units)
+        party_restricted = any(self.restricted(unit) for unit in units)
+        for run in runs:
+            if len(run['seats']) >= size and not (run['exit'] and party_restricted):
+                for unit in units:
+                    take(unit, run)
+                return assignment
+
+        # 2. As few runs as possible, close to the rows already used
+        pending = list(units)
+        anchor = None
+        while pending:
+            best = None
+            for position, run in enumerate(runs):
+                free = len(run['seats'])
+                count = 0
+                for unit in pending:
+                    if len(unit) > free or (run['exit'] and self.restricted(unit)):
+                        break
+                    free -= len(unit)
+                    count += 1
+                if not count:
+                    continue
+                distance = abs(run['row'] - anchor) if anchor and run['row'] else 0
+                score = (-count, distance, position)
+                if best is None or score < best[0]:
+                    best = (score, run, count)
+            if best is None:
+                break
+            _, run, count = best
+            for unit in pending[:count]:
+                take(unit, run)
+            pending = pending[count:]
+            anchor = run['row'] or anchor
+
+        # 3. Anything left: single free seats (an infant may end up apart)
+        for unit in pending:
+            for detail in unit:
+                for run in runs:
+                    if run['seats'] and not (run['exit'] and self.restricted(unit)):
+                        assignment[detail.id] = run['seats'].pop(0)
+                        break
+        return assignment
+
+    # ------------------------------------------------------------------
+    # Assignment
+    # ------------------------------------------------------------------
+    def assign(self, booking, details):
+        """
+        Seat every booking detail without a seat. Seats of a pending
+        booking are held (SeatHold) until payment. Returns the number of
+        passengers seated.
+        """
+        from app.models import Seat, SeatHold, SeatInventory, BookingDetail
+
+        if not self.enabled:
+            return 0
+
+        by_schedule = {}
+        for detail in details:
+            if detail.seat_id is None:
+                by_schedule.setdefault(detail.schedule_id, []).append(detail)
+        if not by_schedule:
+            return 0
+
+        hold = booking.status == 'Pending'
+        expires_at = timezone.now() + SeatHold.ttl()
+        seated = []
+
+        with transaction.atomic():
+            for schedule_id, party in by_schedule.items():
+                class_ids = {detail.seat_class_id for detail in party}
+                free = Seat.objects.select_for_update(of=('self',), skip_locked=True).filter(
+                    schedule_id=schedule_id, is_available=True
+                )
+                if None not in class_ids:
+                    free = free.filter(seat_class_id__in=class_ids)
+                free = list(free.order_by('row', 'column', 'id'))
+
+                assignment = {}
+                by_class = {}
+                for detail in party:
+                    by_class.setdefault(detail.seat_class_id, []).append(detail)
+                for seat_class_id, class_party in by_class.items():
+                    class_seats = [
+                        seat for seat in free
+                        if seat_class_id is None or seat.seat_class_id == seat_class_id
+                    ]
+                    placed = self.place(self.units(class_party), self.runs(class_seats))
+                    assignment.update(placed)
+                    taken = {seat.id for seat in placed.values()}
+                    free = [seat for seat in free if seat.id not in taken]
+
+                if not assignment:
+                    continue
+
+                for detail in party:
+                    seat = assignment.get(detail.id)
+                    if seat is not None:
+                        detail.seat = seat
+                        if detail.seat_class_id is None:
+                            detail.seat_class_id = seat.seat_class_id
+                        seated.append(detail)
+
+                seat_ids = [seat.id for seat in assignment.values()]
+                Seat.objects.filter(id__in=seat_ids).update(is_available=False)
+                if hold:
+                    SeatHold.objects.bulk_create([
+                        SeatHold(
+                            seat=seat, booking=booking, schedule_id=schedule_id, expires_at=expires_at
+                        )
+                        for seat in assignment.values()
+                    ])
+                SeatInventory.adjust_seats(assignment.values(), available=-1)
+
+            if seated:
+                BookingDetail.objects.bulk_update(seated, ['seat', 'seat_class'])
+                seat_events.seats_changed({detail.schedule_id for detail in seated})
+
+        return len(seated)
+
+
+# Singleton instance
+seat_assignment = SeatAssignmentEngine()
@@ -0,0 +1,272 @@
+# flightapp/services/seat_events.py
+import json
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .search_cache import schedule_search_cache
+from .seat_map import seat_maps
+
+
+class Subscription:
+    """One listener of a schedule's seat changes"""
+
+    def __init__(self, schedule_id):
+        self.schedule_id = schedule_id
+        self._queue = queue.Queue(maxsize=100)
+
+    def notify(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # The listener re-reads the seat map anyway; one pending wakeup is enough
+            pass
+
+    def wait(self, timeout):
+        """Pending events (waits up to timeout seconds for the first one)"""
+        try:
+            events = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class LocalSeatEventBroker:
+    """
+    In-process fan-out of seat events to the subscribers of a schedule.
+    Only wakes listeners in the publishing process. Every listener also
+    re-reads the schedule's seat-map version from the database each
+    SEAT_EVENT_POLL_SECONDS, so changes committed by other processes
+    arrive within that interval instead of immediately.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, schedule_id):
+        subscription = Subscription(schedule_id)
+        with self._lock:
+            self._subscribers.setdefault(schedule_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.schedule_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.schedule_id]
+
+    def publish(self, schedule_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(schedule_id, ()))
+        for subscription in subscribers:
+            subscription.notify(event)
+
+    def subscriber_count(self, schedule_id=None):
+        with self._lock:
+            if schedule_id is not None:
+                return len(self._subscribers.get(schedule_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class SeatStream:
+    """
+    Iterator of an SSE stream holding one of the process's stream slots.
+    The slot is given back when the response is closed, even if the
+    stream never started.
+    """
+
+    def __init__(self, events, release):
+        self._events = events
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        try:
+            self._events.close()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class SeatEvents:
+    """
+    Pushes seat availability changes to open seat maps.
+
+    Seat saves (reserve_seat_with_lock, booking creation, cancellation,
+    admin edits) publish an event for the schedule after commit. Listeners
+    (SSE stream or long-poll) wake up and answer with the seat-map delta
+    since the client's version (flightapp/services/seat_map.py), so the
+    pushed data is the same compact format clients already poll.
+    The broker is pluggable (SEAT_EVENT_BROKER); the default is in-process.
+
+    A listener occupies a worker thread while it waits: a long-poll for at
+    most 60 seconds, a stream for up to SEAT_STREAM_MAX_SECONDS. Open
+    streams are capped per process by SEAT_STREAM_MAX_CONNECTIONS; beyond
+    it open_stream() returns None and clients fall back to long-polling.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not SeatEvents._initialized:
+            self._broker = None
+            self._streams_lock = threading.Lock()
+            self._open_streams = 0
+            SeatEvents._initialized = True
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            broker_class = getattr(
+                settings, 'SEAT_EVENT_BROKER',
+                'flightapp.services.seat_events.LocalSeatEventBroker'
+            )
+            self._broker = import_string(broker_class)()
+        return self._broker
+
+    @property
+    def poll_interval(self):
+        """Seconds between seat-map version checks while waiting"""
+        return getattr(settings, 'SEAT_EVENT_POLL_SECONDS', 2)
+
+    @property
+    def heartbeat_interval(self):
+        return getattr(settings, 'SEAT_STREAM_HEARTBEAT_SECONDS', 15)
+
+    @property
+    def max_stream_seconds(self):
+        """Streams end after this long; EventSource reconnects with Last-Event-ID"""
+        return getattr(settings, 'SEAT_STREAM_MAX_SECONDS', 300)
+
+    @property
+    def max_streams(self):
+        """Open SSE streams allowed per process"""
+        return getattr(settings, 'SEAT_STREAM_MAX_CONNECTIONS', 20)
+
+    def open_streams(self):
+        return self._open_streams
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish(self, schedule_id, event=None):
+        """Notify the schedule's listeners after commit"""
+        if not schedule_id:
+            return
+        event = event or {}
+        transaction.on_commit(lambda: self.broker.publish(schedule_id, event))
+
+    def seats_changed(self, schedule_ids):
+        """
+        Seats of these schedules changed with bulk updates (no Seat signals):
+        new seat-map versions, cached searches dropped, listeners notified.
+        """
+        schedule_ids = set(schedule_ids)
+        seat_maps.invalidate_many(schedule_ids)
+        for schedule_id in schedule_ids:
+            schedule_search_cache.invalidate_schedule(schedule_id)
+            self.publish(schedule_id)
+
+    def seat_changed(self, seat):
+        self.publish(seat.schedule_id, {
+            'seat_id': seat.pk,
+            'seat_number': seat.seat_number,
+            'is_available': seat.is_available,
+        })
+
+    # ------------------------------------------------------------------
+    # Listening
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _has_news(payload, since):
+        if payload is None or since is None:
+            return True
+        changes = payload.get('changes')
+        if changes is None:
+            # Full map (new layout or history expired)
+            return True
+        return bool(changes['available'] or changes['taken']) or payload['version'] != since
+
+    def wait(self, schedule_id, since=None, layout_version=None, timeout=25):
+        """
+        Long-poll: the seat-map payload as soon as it differs from the
+        client's version, or the unchanged payload after timeout seconds.
+        """
+        subscription = self.broker.subscribe(schedule_id)
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                payload = seat_maps.seat_map(schedule_id, since=since, layout_version=layout_version)
+                remaining = deadline - time.monotonic()
+                if self._has_news(payload, since) or remaining <= 0:
+                    return payload
+                subscription.wait(min(self.poll_interval, remaining))
+        finally:
+            self.broker.unsubscribe(subscription)
+
+    def open_stream(self, schedule_id, since=None, layout_version=None):
+        """A SeatStream of stream(), or None when every stream slot is taken"""
+        with self._streams_lock:
+            if self._open_streams >= self.max_streams:
+                return None
+            self._open_streams += 1
+
+        def release():
+            with self._streams_lock:
+                self._open_streams -= 1
+
+        return SeatStream(self.stream(schedule_id, since=since, layout_version=layout_version), release)
+
+    def stream(self, schedule_id, since=None, layout_version=None):
+        """Server-sent events: one 'seats' event per seat-map change"""
+        subscription = self.broker.subscribe(schedule_id)
+        try:
+            started = last_sent = time.monotonic()
+            yield f"retry: {self.poll_interval * 1000}\n\n"
+            while time.monotonic() - started < self.max_stream_seconds:
+                payload = seat_maps.seat_map(schedule_id, since=since, layout_version=layout_version)
+                if payload is None:
+                    yield f"event: error\ndata: {json.dumps({'error': 'Schedule not found'})}\n\n"
+                    return
+
+                if self._has_news(payload, since):
+                    since = payload['version']
+                    layout_version = payload['layout_version']
+                    last_sent = time.monotonic()
+                    yield f"id: {since}:{layout_version}\nevent: seats\ndata: {json.dumps(payload)}\n\n"
+                elif time.monotonic() - last_sent >= self.heartbeat_interval:
+                    last_sent = time.monotonic()
+                    yield ": keepalive\n\n"
+
+                subscription.wait(self.poll_interval)
+        finally:
+            self.broker.unsubscribe(subscription)
+
+
+# Singleton instance
+seat_events = SeatEvents()
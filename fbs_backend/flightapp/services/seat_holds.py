@@ -0,0 +1,121 @@
+# flightapp/services/seat_holds.py
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .seat_events import seat_events
+
+booking_logger = logging.getLogger('flightapp.booking')
+
+
+class SeatHoldSweeper:
+    """
+    Releases expired seat holds (app.models.SeatHold) in batches.
+
+    Seats of abandoned checkouts go back on sale with bulk updates and one
+    inventory UPDATE per seat class; the seat maps, cached searches and open
+    seat-map listeners of the affected schedules are refreshed after commit.
+    Runs as a daemon thread in the web process, or via the
+    release_seat_holds management command as a separate worker.
+    """
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not SeatHoldSweeper._initialized:
+            self._lock = threading.Lock()
+            self._thread = None
+            self._stop = threading.Event()
+            SeatHoldSweeper._initialized = True
+
+    @property
+    def interval(self):
+        return getattr(settings, 'SEAT_HOLD_SWEEP_INTERVAL', 60)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'SEAT_HOLD_SWEEP_BATCH_SIZE', 500)
+
+    # ------------------------------------------------------------------
+    # Release
+    # ------------------------------------------------------------------
+    def release(self, holds, limit=None):
+        """Release a queryset of holds; returns seats released"""
+        from app.models import SeatHold
+
+        _, released, schedule_ids = SeatHold.release(holds, limit=limit)
+        seat_events.seats_changed(schedule_ids)
+        return released
+
+    def release_booking(self, booking):
+        """Give back the seats a (cancelled) pending booking holds"""
+        return self.release(booking.seat_holds.all())
+
+    def run_once(self):
+        """Release every expired hold, batch by batch; returns seats released"""
+        from app.models import SeatHold
+
+        total = 0
+        while True:
+            dropped, released, schedule_ids = SeatHold.release_expired(limit=self.batch_size)
+            seat_events.seats_changed(schedule_ids)
+            total += released
+            # A short batch means nothing is left (or the rest is locked by payments)
+            if dropped < self.batch_size:
+                return total
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+    def ensure_started(self):
+        """Start the in-process sweeper thread once (if enabled in settings)"""
+        if not getattr(settings, 'SEAT_HOLD_SWEEP_IN_PROCESS', True):
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self.run_forever, name='seat-hold-sweeper', daemon=True
+            )
+            self._thread.start()
+            booking_logger.info("Seat hold sweeper started")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self, interval=None):
+        """Sweep loop used by the thread and the release_seat_holds command"""
+        interval = interval or self.interval
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                close_old_connections()
+                released = self.run_once()
+                if released:
+                    booking_logger.info(
+                        "Released %s expired seat holds in %.2fs", released, time.monotonic() - started
+                    )
+            except Exception as e:
+                booking_logger.exception("Seat hold sweep failed: %s", e)
+            finally:
+                close_old_connections()
+
+            self._stop.wait(interval)
+
+
+# Singleton instance
+seat_hold_sweeper = SeatHoldSweeper()
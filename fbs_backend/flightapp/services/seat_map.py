@@ -0,0 +1,255 @@
+# flightapp/services/seat_map.py
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class SeatMapCache:
+    """
+    Compact seat maps: a static layout plus an availability bitset.
+
+    The layout (seat ids, numbers, rows, columns, classes, feature masks)
+    is identified by a digest of its content, so clients fetch it once per
+    schedule. Availability is a bitset over the layout's seat order with a
+    per-schedule version number kept in the database (app.SeatMapVersion),
+    bumped in the same transaction as every seat change and read in the same
+    query as the seats, so every process agrees on what a version contains.
+    Snapshots of recent versions are kept in the cache, so a client polling
+    with ?since=<version> receives only the seats that changed (usually
+    nothing) instead of the whole map. With a per-process cache a client
+    whose version this process never built gets the full map instead.
+    """
+
+    _instance = None
+    _initialized = False
+
+    SNAPSHOT_PREFIX = 'seat_map_snapshot'
+    LAYOUT_PREFIX = 'seat_map_layout'
+
+    # Bit order of a seat's feature mask
+    FEATURES = [
+        ('has_extra_legroom', 'Extra Legroom'),
+        ('is_exit_row', 'Exit Row'),
+        ('is_bulkhead', 'Bulkhead'),
+        ('is_window', 'Window'),
+        ('is_aisle', 'Aisle'),
+    ]
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not SeatMapCache._initialized:
+            SeatMapCache._initialized = True
+
+    @property
+    def history_ttl(self):
+        """Seconds a version's snapshot stays available for deltas"""
+        return getattr(settings, 'SEAT_MAP_HISTORY_TTL', 1800)
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+    def _snapshot_key(self, schedule_id, version):
+        return f"{self.SNAPSHOT_PREFIX}:{schedule_id}:{version}"
+
+    def _layout_key(self, schedule_id, layout_version):
+        return f"{self.LAYOUT_PREFIX}:{schedule_id}:{layout_version}"
+
+    def version(self, schedule_id):
+        """Current version of a schedule's seat map (one primary-key lookup)"""
+        from app.models import SeatMapVersion
+
+        version = SeatMapVersion.objects.filter(schedule_id=schedule_id).values_list(
+            'version', flat=True
+        ).first()
+        return version or 0
+
+    def invalidate(self, schedule_id):
+        """Next version of a schedule's seat map, in the current transaction"""
+        self.invalidate_many([schedule_id])
+
+    def invalidate_many(self, schedule_ids):
+        from app.models import SeatMapVersion
+
+        SeatMapVersion.bump(schedule_ids)
+
+    # ------------------------------------------------------------------
+    # Bitsets
+    # ------------------------------------------------------------------
+    @staticmethod
+    def encode_bits(flags):
+        """Seat i available <=> bit (i % 8) of byte i // 8 is set"""
+        bits = bytearray((len(flags) + 7) // 8)
+        for index, flag in enumerate(flags):
+            if flag:
+                bits[index >> 3] |= 1 << (index & 7)
+        return bytes(bits)
+
+    @staticmethod
+    def changed_seats(old_bits, new_bits, seat_count):
+        """(now available, now taken) seat indexes between two bitsets"""
+        available, taken = [], []
+        for byte_index, (old, new) in enumerate(zip(old_bits, new_bits)):
+            diff = old ^ new
+            while diff:
+                bit = diff & -diff
+                index = (byte_index << 3) + bit.bit_length() - 1
+                if index < seat_count:
+                    (available if new & bit else taken).append(index)
+                diff ^= bit
+        return available, taken
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+    def _build(self, schedule_id):
+        """
+        (version, snapshot, layout) of a schedule from one query, or
+        (version, None, None) for an unknown schedule
+        """
+        from app.models import Schedule, Seat
+
+        rows = list(
+            Seat.objects.filter(schedule_id=schedule_id).order_by(
+                'row', 'column', 'seat_number', 'id'
+            ).values_list(
+                'id', 'seat_number', 'row', 'column',
+                'seat_class_id', 'seat_class__name', 'seat_class__price_multiplier',
+                'price_adjustment', 'is_available',
+                'schedule__ml_base_price', 'schedule__price', 'schedule__seat_map_version__version',
+                *[field for field, _ in self.FEATURES]
+            )
+        )
+        if rows:
+            base_price = rows[0][9] or rows[0][10]
+            version = rows[0][11] or 0
+        else:
+            schedule = Schedule.objects.filter(pk=schedule_id).values_list(
+                'ml_base_price', 'price', 'seat_map_version__version'
+            ).first()
+            if schedule is None:
+                return self.version(schedule_id), None, None
+            base_price = schedule[0] or schedule[1]
+            version = schedule[2] or 0
+
+        classes = []
+        class_index = {}
+        seats = []
+        flags = []
+        for row in rows:
+            (seat_id, seat_number, seat_row, column, seat_class_id, class_name,
+             multiplier, adjustment, is_available) = row[:9]
+            if seat_class_id not in class_index:
+                class_index[seat_class_id] = len(classes)
+                classes.append({
+                    'id': seat_class_id,
+                    'name': class_name,
+                    'price_multiplier': float(multiplier) if multiplier is not None else 1.0,
+                })
+            mask = 0
+            for bit, flag in enumerate(row[12:]):
+                if flag:
+                    mask |= 1 << bit
+            seats.append([
+                seat_id, seat_number, seat_row, column,
+                class_index[seat_class_id], mask, float(adjustment or 0),
+            ])
+            flags.append(is_available)
+
+        layout = {
+            'columns': sorted({seat[3] for seat in seats if seat[3]}),
+            'rows': max((seat[2] for seat in seats if seat[2]), default=0),
+            'classes': classes,
+            'features': [label for _, label in self.FEATURES],
+            'seat_fields': ['id', 'seat_number', 'row', 'column', 'class', 'features', 'price_adjustment'],
+            'seats': seats,
+        }
+        layout_version = hashlib.sha1(
+            json.dumps(layout, sort_keys=True).encode()
+        ).hexdigest()[:16]
+
+        snapshot = {
+            'layout_version': layout_version,
+            'seat_count': len(seats),
+            'bits': self.encode_bits(flags),
+            'available_seats': sum(1 for flag in flags if flag),
+            'base_price': float(base_price or 0),
+        }
+        return version, snapshot, layout
+
+    def snapshot(self, schedule_id):
+        """(version, snapshot) of the current seat map, or (version, None)"""
+        version = self.version(schedule_id)
+        snapshot = cache.get(self._snapshot_key(schedule_id, version))
+        if snapshot is None:
+            # The version read with the seats names what was built
+            version, snapshot, layout = self._build(schedule_id)
+            if snapshot is None:
+                return version, None
+            cache.add(self._layout_key(schedule_id, snapshot['layout_version']), layout, self.history_ttl)
+            cache.add(self._snapshot_key(schedule_id, version), snapshot, self.history_ttl)
+        return version, snapshot
+
+    def layout(self, schedule_id, layout_version):
+        layout = cache.get(self._layout_key(schedule_id, layout_version))
+        if layout is None:
+            _, built, layout = self._build(schedule_id)
+            if built is None or built['layout_version'] != layout_version:
+                return None
+            cache.set(self._layout_key(schedule_id, layout_version), layout, self.history_ttl)
+        return layout
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+    def seat_map(self, schedule_id, since=None, layout_version=None):
+        """
+        Seat map payload: the full map, or only the changes since a version
+        when the client already holds that version and the current layout.
+        Returns None for an unknown schedule.
+        """
+        version, snapshot = self.snapshot(schedule_id)
+        if snapshot is None:
+            return None
+
+        payload = {
+            'schedule_id': schedule_id,
+            'version': version,
+            'layout_version': snapshot['layout_version'],
+            'base_price': snapshot['base_price'],
+            'available_seats': snapshot['available_seats'],
+        }
+
+        if layout_version == snapshot['layout_version'] and since is not None:
+            if since == version:
+                payload['changes'] = {'available': [], 'taken': []}
+                return payload
+
+            previous = cache.get(self._snapshot_key(schedule_id, since))
+            if previous is not None and previous['layout_version'] == snapshot['layout_version']:
+                available, taken = self.changed_seats(
+                    previous['bits'], snapshot['bits'], snapshot['seat_count']
+                )
+                payload['changes'] = {'available': available, 'taken': taken}
+                return payload
+
+        if layout_version != snapshot['layout_version']:
+            layout = self.layout(schedule_id, snapshot['layout_version'])
+            if layout is None:
+                # Layout changed while reading; the next poll gets a new version
+                payload['layout_version'] = None
+            payload['layout'] = layout
+        payload['bits'] = base64.b64encode(snapshot['bits']).decode()
+        return payload
+
+
+# Singleton instance
+seat_maps = SeatMapCache()
@@ -0,0 +1,276 @@
+# flightapp/services/tax_engine.py
+import threading
+from decimal import Decimal
+
+from .data_versions import data_versions
+
+
+class TaxRule:
+    """One active TaxType with its passenger-type, airline and airport amounts"""
+
+    def __init__(self, tax_type):
+        self.id = tax_type.id
+        self.code = tax_type.code
+        self.name = tax_type.name
+        self.category = tax_type.category
+        self.per_passenger = tax_type.per_passenger
+        self.adult_only = tax_type.adult_only
+        self.applies_domestic = tax_type.applies_domestic
+        self.applies_international = tax_type.applies_international
+        self.departure_country = (tax_type.applies_departure_country or '').strip().upper() or None
+        self.base_amount = tax_type.base_amount
+        self.passenger_amounts = {}
+        self.airline_amounts = {}
+        self.airport_amounts = {}
+
+    def amount(self, segment, passenger_type):
+        """
+        Amount for a passenger on a segment: a passenger-type rate (exemptions,
+        discounts) wins over an airline override, which wins over the fee of
+        the departure airport, which wins over the base amount.
+        """
+        if passenger_type in self.passenger_amounts:
+            return self.passenger_amounts[passenger_type]
+        if segment['airline_id'] in self.airline_amounts:
+            return self.airline_amounts[segment['airline_id']]
+        if segment['origin_airport_id'] in self.airport_amounts:
+            return self.airport_amounts[segment['origin_airport_id']]
+        return self.base_amount
+
+
+class TaxRuleEngine:
+    """
+    Taxes and fees computed from an in-memory rule table.
+
+    All active TaxType rows with their PassengerTypeTaxRate, AirlineTax and
+    AirportFee amounts are compiled into TaxRule objects (four queries),
+    indexed by route scope (domestic/international). A version token shared
+    by every process (flightapp/services/data_versions.py) is replaced after
+    commit when any of these models changes; each process recompiles at its
+    first use after noticing. Computing the taxes of a
+    segment is then a pure-Python pass over the rules of its scope, cheap
+    enough for search results and checkout quotes.
+    """
+
+    _instance = None
+    _initialized = False
+
+    KEY = 'tax_rules_version'
+
+    MODELS = ('app.TaxType', 'app.PassengerTypeTaxRate', 'app.AirlineTax', 'app.AirportFee')
+
+    PASSENGER_TYPES = ('adult', 'child', 'infant')
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not TaxRuleEngine._initialized:
+            self._lock = threading.Lock()
+            self._version = None
+            # scope ('domestic' / 'international') -> [TaxRule]
+            self._rules = {}
+            TaxRuleEngine._initialized = True
+
+    # ------------------------------------------------------------------
+    # Rule table
+    # ------------------------------------------------------------------
+    def version(self):
+        return data_versions.get(self.KEY)
+
+    def invalidate(self):
+        """Recompile in every process, after commit"""
+        data_versions.bump(self.KEY)
+
+    def models(self):
+        from django.apps import apps
+        return [apps.get_model(label) for label in self.MODELS]
+
+    def compile(self):
+        """{scope: [TaxRule]} from the database (four queries)"""
+        from app.models import TaxType, PassengerTypeTaxRate, AirlineTax, AirportFee
+
+        rules = {tax_type.id: TaxRule(tax_type) for tax_type in TaxType.objects.filter(is_active=True).order_by('id')}
+        for tax_type_id, passenger_type, amount in PassengerTypeTaxRate.objects.filter(
+            tax_type_id__in=rules
+        ).values_list('tax_type_id', 'passenger_type', 'amount'):
+            rules[tax_type_id].passenger_amounts[passenger_type.lower()] = amount
+        for tax_type_id, airline_id, amount in AirlineTax.objects.filter(
+            tax_type_id__in=rules
+        ).values_list('tax_type_id', 'airline_id', 'amount'):
+            rules[tax_type_id].airline_amounts[airline_id] = amount
+        for tax_type_id, airport_id, amount in AirportFee.objects.filter(
+            tax_type_id__in=rules
+        ).values_list('tax_type_id', 'airport_id', 'amount'):
+            rules[tax_type_id].airport_amounts[airport_id] = amount
+
+        return {
+            'domestic': [rule for rule in rules.values() if rule.applies_domestic],
+            'international': [rule for rule in rules.values() if rule.applies_international],
+        }
+
+    def rules(self):
+        """Compiled rule table of the current version"""
+        version = self.version()
+        if self._version != version:
+            compiled = self.compile()
+            with self._lock:
+                self._rules = compiled
+                self._version = version
+        return self._rules
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+    @staticmethod
+    def segment(schedule):
+        """
+        What the rules look at for a schedule (select_related the flight's
+        airline and route airports with their countries). Plain data, so it
+        can be kept in the search cache.
+        """
+        route = schedule.flight.route
+        origin = route.origin_airport
+        return {
+            'airline_id': schedule.flight.airline_id,
+            'origin_airport_id': origin.id,
+            'departure_country': (origin.country.code or '').upper() if origin.country else None,
+            'domestic': route.is_domestic,
+            'international': route.is_international,
+        }
+
+    def segment_rules(self, segment):
+        """Rules applying to a segment (route scope and departure country)"""
+        table = self.rules()
+        rules = table['domestic'] if segment['domestic'] else []
+        if segment['international']:
+            # A rule for both scopes is listed in both; keep it once
+            seen = {rule.id for rule in rules}
+            rules = rules + [rule for rule in table['international'] if rule.id not in seen]
+        return [
+            rule for rule in rules
+            if rule.departure_country is None or rule.departure_country == segment['departure_country']
+        ]
+
+    # ------------------------------------------------------------------
+    # Computation
+    # ------------------------------------------------------------------
+    def passenger_taxes(self, segment, passenger_type, rules=None):
+        """[(TaxRule, amount)] charged to one passenger on a segment"""
+        passenger_type = (passenger_type or 'adult').lower()
+        charges = []
+        for rule in self.segment_rules(segment) if rules is None else rules:
+            if not rule.per_passenger:
+                continue
+            if rule.adult_only and passenger_type != 'adult':
+                continue
+            charges.append((rule, rule.amount(segment, passenger_type)))
+        return charges
+
+    def booking_taxes(self, segment, rules=None):
+        """[(TaxRule, amount)] charged once per booking on a segment"""
+        charges = []
+        for rule in self.segment_rules(segment) if rules is None else rules:
+            if rule.per_passenger:
+                continue
+            amount = rule.amount(segment, None)
+            if amount:
+                charges.append((rule, amount))
+        return charges
+
+    def per_passenger_totals(self, segment):
+        """{passenger type: tax per passenger} for a segment (search results)"""
+        rules = self.segment_rules(segment)
+        return {
+            passenger_type: float(sum(
+                (amount for _, amount in self.passenger_taxes(segment, passenger_type, rules)),
+                Decimal('0.00')
+            ))
+            for passenger_type in self.PASSENGER_TYPES
+        }
+
+    def quote(self, segments, passenger_counts):
+        """
+        Tax breakdown of a trip: segments (see segment()) and
+        {passenger type: count}. Returns {'lines', 'per_passenger', 'total'}.
+        """
+        lines = {}
+        per_passenger = {}
+        total = Decimal('0.00')
+
+        def add(segment_index, rule, passenger_type, amount, count):
+            nonlocal total
+            key = (segment_index, rule.id, passenger_type)
+            line = lines.setdefault(key, {
+                'segment': segment_index,
+                'code': rule.code,
+                'name': rule.name,
+                'category': rule.category,
+                'passenger_type': passenger_type,
+                'amount': amount,
+                'count': 0,
+            })
+            line['count'] += count
+            total += amount * count
+
+        for index, segment in enumerate(segments):
+            rules = self.segment_rules(segment)
+            for passenger_type, count in passenger_counts.items():
+                if not count:
+                    continue
+                charges = self.passenger_taxes(segment, passenger_type, rules)
+                per_passenger[passenger_type] = per_passenger.get(passenger_type, Decimal('0.00')) + sum(
+                    (amount for _, amount in charges), Decimal('0.00')
+                )
+                for rule, amount in charges:
+                    add(index, rule, passenger_type.lower(), amount, count)
+            for rule, amount in self.booking_taxes(segment, rules):
+                add(index, rule, None, amount, 1)
+
+        return {
+            'lines': [
+                {**line, 'amount': float(line['amount'])}
+                for line in lines.values()
+            ],
+            'per_passenger': {key: float(value) for key, value in per_passenger.items()},
+            'total': float(total),
+        }
+
+    def apply(self, booking, details):
+        """
+        Taxes of a booking's details (schedules loaded with segment()'s
+        relations). Sets detail.tax_amount and returns unsaved BookingTax
+        rows: one per passenger tax, one per booking-level tax and segment.
+        """
+        from app.models import BookingTax
+
+        booking_taxes = []
+        segments = {}
+        for detail in details:
+            if detail.schedule_id not in segments:
+                segment = self.segment(detail.schedule)
+                segments[detail.schedule_id] = (segment, self.segment_rules(segment))
+            segment, rules = segments[detail.schedule_id]
+
+            passenger_type = detail.passenger_type.lower() if detail.passenger_type else 'adult'
+            for rule, amount in self.passenger_taxes(segment, passenger_type, rules):
+                booking_taxes.append(BookingTax(
+                    booking=booking,
+                    tax_type_id=rule.id,
+                    amount=amount,
+                    passenger_type=passenger_type,
+                ))
+                detail.tax_amount += amount
+
+        for segment, rules in segments.values():
+            for rule, amount in self.booking_taxes(segment, rules):
+                booking_taxes.append(BookingTax(booking=booking, tax_type_id=rule.id, amount=amount))
+        return booking_taxes
+
+
+# Singleton instance
+tax_engine = TaxRuleEngine()
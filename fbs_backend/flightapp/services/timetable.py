@@ -0,0 +1,272 @@
+# flightapp/services/timetable.py
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .connection_search import connection_search
+from .search_cache import schedule_search_cache
+
+
+class TimetablePattern:
+    """
+    One line of a timetable: a flight departing at the given times on the
+    given weekdays (0 = Monday) between start_date and end_date inclusive.
+    """
+
+    def __init__(self, flight, weekdays, departure_times, start_date, end_date,
+                 duration=None, price=None, status='Open'):
+        self.flight = flight
+        self.weekdays = set(weekdays)
+        self.departure_times = sorted(departure_times)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.duration = duration
+        self.price = price
+        self.status = status
+
+    def departures(self):
+        """Aware departure datetimes (current time zone) in date order"""
+        tz = timezone.get_current_timezone()
+        day = self.start_date
+        while day <= self.end_date:
+            if day.weekday() in self.weekdays:
+                for departure in self.departure_times:
+                    yield timezone.make_aware(datetime.combine(day, departure), tz)
+            day += timedelta(days=1)
+
+
+class TimetableGenerator:
+    """
+    Creates the schedules of recurring timetables in bulk.
+
+    All departures of every pattern are computed in memory, departures the
+    flight already has are skipped (re-running a timetable only adds what
+    is missing), and the rest are written in batches: one Schedule insert
+    plus SeatLayout.materialize() (one Seat and one SeatInventory insert)
+    per batch. Schedule signals are bypassed, so the search, connection and
+    fare calendar caches of the affected days are invalidated once at the end.
+    """
+
+    _instance = None
+    _initialized = False
+
+    WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+    def __new__(cls):
+        """Singleton pattern - only one instance ever created"""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize only once"""
+        if not TimetableGenerator._initialized:
+            TimetableGenerator._initialized = True
+
+    @property
+    def batch_size(self):
+        """Schedules written per transaction"""
+        return getattr(settings, 'TIMETABLE_BATCH_SIZE', 500)
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+    def parse_weekdays(self, value):
+        """
+        Weekdays from 'daily', 'mon,wed,fri', 'mon-fri' or ISO digits
+        '135' (1 = Monday ... 7 = Sunday). Returns a set of 0-6.
+        """
+        value = (value or 'daily').strip().lower()
+        if value == 'daily':
+            return set(range(7))
+        if value.isdigit():
+            days = {int(digit) - 1 for digit in value}
+            if not days <= set(range(7)):
+                raise ValueError(f"Invalid weekdays: {value}")
+            return days
+
+        days = set()
+        for part in value.split(','):
+            names = [name.strip()[:3] for name in part.split('-')]
+            if len(names) > 2 or not all(name in self.WEEKDAYS for name in names):
+                raise ValueError(f"Invalid weekdays: {value}")
+            first = self.WEEKDAYS.index(names[0])
+            last = self.WEEKDAYS.index(names[-1])
+            day = first
+            days.add(day)
+            while day != last:
+                day = (day + 1) % 7
+                days.add(day)
+        return days
+
+    @staticmethod
+    def parse_times(value):
+        """Departure times from '08:00,14:30'"""
+        times = []
+        for part in str(value).split(','):
+            part = part.strip()
+            if part:
+                try:
+                    times.append(time.fromisoformat(part))
+                except ValueError:
+                    raise ValueError(f"Invalid departure time: {part}")
+        if not times:
+            raise ValueError("At least one departure time is required")
+        return times
+
+    def durations(self, flights):
+        """{flight id: block time} of each flight's latest schedule"""
+        from app.models import Schedule
+
+        durations = {}
+        rows = Schedule.objects.filter(flight__in=flights).order_by(
+            'flight_id', '-departure_time'
+        ).distinct('flight_id').values_list('flight_id', 'departure_time', 'arrival_time')
+        for flight_id, departure_time, arrival_time in rows:
+            durations[flight_id] = arrival_time - departure_time
+        return durations
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+    def plan(self, patterns):
+        """Unsaved Schedule objects for every departure of the patterns"""
+        from app.models import Schedule
+
+        missing = [pattern.flight for pattern in patterns if pattern.duration is None]
+        known = self.durations(missing) if missing else {}
+
+        schedules = []
+        for pattern in patterns:
+            flight = pattern.flight
+            duration = pattern.duration or known.get(flight.id)
+            if not duration:
+                raise ValueError(
+                    f"Flight {flight.flight_number} has no schedules; a duration is required"
+                )
+            price = pattern.price if pattern.price is not None else flight.route.base_price
+            for departure_time in pattern.departures():
+                schedules.append(Schedule(
+                    flight=flight,
+                    departure_time=departure_time,
+                    arrival_time=departure_time + duration,
+                    price=Decimal(price),
+                    status=pattern.status,
+                ))
+        return schedules
+
+    @staticmethod
+    def _existing(schedules):
+        """{(flight id, departure)} of these schedules already in the database"""
+        from app.models import Schedule
+
+        flight_ids = {schedule.flight_id for schedule in schedules}
+        departures = [schedule.departure_time for schedule in schedules]
+        if not flight_ids:
+            return set()
+        return set(
+            Schedule.objects.filter(
+                flight_id__in=flight_ids,
+                departure_time__gte=min(departures),
+                departure_time__lte=max(departures),
+            ).values_list('flight_id', 'departure_time')
+        )
+
+    def generate(self, patterns, dry_run=False, batch_size=None):
+        """
+        Create the missing schedules (and seats) of the patterns.
+        Returns {'planned', 'existing', 'created', 'seats', 'dry_run', 'schedules'}.
+        """
+        from app.models import Flight, Schedule, SeatLayout
+
+        batch_size = batch_size or self.batch_size
+        # Overlapping lines of the timetable collapse into one departure
+        unique = {}
+        for schedule in self.plan(patterns):
+            unique.setdefault((schedule.flight_id, schedule.departure_time), schedule)
+        planned = sorted(unique.values(), key=lambda s: (s.flight_id, s.departure_time))
+        planned_count = len(planned)
+
+        result = {
+            'planned': planned_count,
+            'existing': 0,
+            'created': 0,
+            'seats': 0,
+            'dry_run': dry_run,
+            'schedules': [],
+        }
+
+        if dry_run:
+            existing = self._existing(planned)
+            new = [s for s in planned if (s.flight_id, s.departure_time) not in existing]
+            seats_per_aircraft = {}
+            for schedule in new:
+                aircraft = schedule.flight.aircraft
+                if aircraft.id not in seats_per_aircraft:
+                    seats_per_aircraft[aircraft.id] = len(SeatLayout.specs_for_aircraft(aircraft))
+                result['seats'] += seats_per_aircraft[aircraft.id]
+            result['existing'] = planned_count - len(new)
+            result['created'] = len(new)
+            result['schedules'] = new
+            return result
+
+        created = []
+        for start in range(0, len(planned), batch_size):
+            batch = planned[start:start + batch_size]
+            with transaction.atomic():
+                # Concurrent runs of the same timetable wait here, then skip
+                # what the other run created
+                list(
+                    Flight.objects.select_for_update().filter(
+                        id__in={schedule.flight_id for schedule in batch}
+                    ).order_by('id').values_list('id', flat=True)
+                )
+                existing = self._existing(batch)
+                new = [s for s in batch if (s.flight_id, s.departure_time) not in existing]
+                if not new:
+                    continue
+                Schedule.objects.bulk_create(new)
+                result['seats'] += SeatLayout.materialize(new, refresh_calendar=False)
+            created.extend(new)
+
+        result['existing'] = planned_count - len(created)
+        result['created'] = len(created)
+        result['schedules'] = created
+        if created:
+            self._invalidate(created)
+        return result
+
+    @staticmethod
+    def _invalidate(schedules):
+        """What the Schedule post_save receivers would have done, once per day"""
+        from app.models import FareCalendar
+
+        keys = {}
+        for schedule in schedules:
+            route = schedule.flight.route
+            day = timezone.localtime(schedule.departure_time).date()
+            keys[(route.origin_airport_id, route.destination_airport_id, day)] = route
+
+        for (_, _, day), route in keys.items():
+            schedule_search_cache.invalidate(
+                route.origin_airport.code, route.destination_airport.code,
+                timezone.make_aware(datetime.combine(day, time()))
+            )
+        for day in {day for _, _, day in keys}:
+            connection_search.invalidate(timezone.make_aware(datetime.combine(day, time())))
+
+        # One fare calendar refresh per route and month: refresh() ORs one
+        # term per day, so a whole timetable would be one huge statement
+        months = {}
+        for origin_id, destination_id, day in keys:
+            months.setdefault((origin_id, destination_id, day.year, day.month), set()).add(
+                (origin_id, destination_id, day)
+            )
+        for month_keys in months.values():
+            FareCalendar.queue_refresh(keys=month_keys)
+
+# Singleton instance
+timetable = TimetableGenerator()
@@ -0,0 +1,161 @@
+# flightapp/signals.py
+from django.db.models.signals import post_save, pre_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from app.models import Schedule, Seat, FareCalendar, Airport, Country
+from .services.search_cache import schedule_search_cache
+from .services.connection_search import connection_search
+from .services.airport_index import airport_index
+from .services.reference_data import reference_data
+from .services.seat_map import seat_maps
+from .services.seat_events import seat_events
+from .services.tax_engine import tax_engine
+
+
+# ============================================================
+# SEARCH CACHE INVALIDATION
+# ============================================================
+@receiver(pre_save, sender=Schedule)
+@receiver(pre_delete, sender=Schedule)
+def invalidate_search_for_old_schedule(sender, instance, **kwargs):
+    """Drop the cached search the schedule was in (route/date may change)"""
+    if instance.pk:
+        schedule_search_cache.invalidate_schedule(instance.pk)
+
+
+@receiver(post_save, sender=Schedule)
+def invalidate_search_for_schedule(sender, instance, **kwargs):
+    """Drop the cached search the schedule is in now"""
+    schedule_search_cache.invalidate_schedule(instance.pk)
+
+
+@receiver(post_save, sender=Seat)
+@receiver(post_delete, sender=Seat)
+def invalidate_search_for_seat(sender, instance, **kwargs):
+    """Seat availability changed - cached seat counts are stale"""
+    if instance.schedule_id:
+        schedule_search_cache.invalidate_schedule(instance.schedule_id)
+
+
+# ============================================================
+# FARE CALENDAR
+# ============================================================
+@receiver(pre_save, sender=Schedule)
+@receiver(pre_delete, sender=Schedule)
+def remember_fare_calendar_day(sender, instance, **kwargs):
+    """Remember the day the schedule was on (route/date/status may change)"""
+    if instance.pk:
+        instance._fare_calendar_keys = FareCalendar.keys_for_schedules([instance.pk])
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def refresh_fare_calendar_for_schedule(sender, instance, **kwargs):
+    """Refresh the day the schedule was on and the day it is on now"""
+    FareCalendar.queue_refresh(
+        [instance.pk] if instance.pk else [],
+        keys=getattr(instance, '_fare_calendar_keys', ())
+    )
+
+
+# ============================================================
+# CONNECTION INDEX
+# ============================================================
+@receiver(pre_save, sender=Schedule)
+@receiver(pre_delete, sender=Schedule)
+def invalidate_connections_for_old_schedule(sender, instance, **kwargs):
+    """Rebuild the day the schedule was on (departure may change)"""
+    if instance.pk:
+        connection_search.invalidate_schedule(instance.pk)
+
+
+@receiver(post_save, sender=Schedule)
+def invalidate_connections_for_schedule(sender, instance, **kwargs):
+    """Rebuild the day the schedule is on now"""
+    connection_search.invalidate(instance.departure_time)
+
+
+# ============================================================
+# AIRPORT AUTOCOMPLETE INDEX
+# ============================================================
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def invalidate_airport_index(sender, instance, **kwargs):
+    """Airport codes/names/cities or country names changed"""
+    airport_index.invalidate()
+
+
+# ============================================================
+# SEAT MAPS
+# ============================================================
+@receiver(post_save, sender=Seat)
+@receiver(post_delete, sender=Seat)
+def invalidate_seat_map_for_seat(sender, instance, **kwargs):
+    """New seat-map version for the schedule (and the one it moved from)"""
+    old_schedule_id = getattr(instance, '_inventory_key', (None, None))[0]
+    seat_maps.invalidate_many(
+        schedule_id for schedule_id in (instance.schedule_id, old_schedule_id) if schedule_id
+    )
+
+
+@receiver(post_save, sender=Schedule)
+def invalidate_seat_map_for_schedule(sender, instance, **kwargs):
+    """Base price shown on the seat map may have changed"""
+    seat_maps.invalidate(instance.pk)
+
+
+# ============================================================
+# SEAT AVAILABILITY PUSH
+# ============================================================
+# The seat-map receivers above bump the version inside the transaction;
+# listeners woken by these events after commit see the new version.
+@receiver(post_save, sender=Seat)
+@receiver(post_delete, sender=Seat)
+def publish_seat_change(sender, instance, **kwargs):
+    """Wake open seat maps of the schedule"""
+    seat_events.seat_changed(instance)
+
+
+@receiver(post_save, sender=Schedule)
+def publish_schedule_change(sender, instance, **kwargs):
+    """Base price or status shown on open seat maps may have changed"""
+    seat_events.publish(instance.pk)
+
+# ============================================================
+# REFERENCE DATA CACHE
+# ============================================================
+def invalidate_reference_data(sender, instance, **kwargs):
+    """Countries/airports/add-on catalogues/seat-class features changed"""
+    reference_data.invalidate_model(sender)
+
+
+for reference_model in reference_data.models():
+    post_save.connect(
+        invalidate_reference_data, sender=reference_model,
+        dispatch_uid=f'reference_data_save_{reference_model._meta.label_lower}'
+    )
+    post_delete.connect(
+        invalidate_reference_data, sender=reference_model,
+        dispatch_uid=f'reference_data_delete_{reference_model._meta.label_lower}'
+    )
+
+
+# ============================================================
+# TAX RULES
+# ============================================================
+def invalidate_tax_rules(sender, instance, **kwargs):
+    """Tax types or their passenger/airline/airport amounts changed"""
+    tax_engine.invalidate()
+
+
+for tax_model in tax_engine.models():
+    post_save.connect(
+        invalidate_tax_rules, sender=tax_model,
+        dispatch_uid=f'tax_rules_save_{tax_model._meta.label_lower}'
+    )
+    post_delete.connect(
+        invalidate_tax_rules, sender=tax_model,
+        dispatch_uid=f'tax_rules_delete_{tax_model._meta.label_lower}'
+    )
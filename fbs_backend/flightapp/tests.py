@@ -1,3 +1,204 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.models import (
+    Country, Airport, Airline, Aircraft, Route, Flight, Schedule, RedeemedPriceQuote
+)
+from .services.price_quotes import price_quotes, PriceQuoteError
+from .services.search_cache import schedule_search_cache
+from .services.search_pagination import schedule_search_paginator, InvalidCursor
+
+
+def _cursor(payload):
+    """Cursor for a raw payload, encoded like ScheduleSearchPaginator.encode()"""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+class CursorDecodeTests(SimpleTestCase):
+    """Search cursors come from clients: anything malformed is an InvalidCursor"""
+
+    def test_round_trip(self):
+        paginator = schedule_search_paginator
+        cursors = [
+            ('price', Decimal('2999.50')),
+            ('-departure', datetime(2026, 10, 19, 6, 0, tzinfo=dt_timezone.utc)),
+            ('duration', timedelta(minutes=80)),
+            ('airline', 'Cebu Pacific'),
+        ]
+        for sort, key in cursors:
+            with self.subTest(sort=sort):
+                cursor = paginator.encode(sort, key, 42)
+                self.assertEqual(paginator.decode(cursor, sort), (key, 42))
+
+    def test_malformed_cursors(self):
+        cursors = {
+            'not base64': '!!!',
+            'not json': base64.urlsafe_b64encode(b'{oops').decode(),
+            'not an object': _cursor([1, 2]),
+            'missing key': _cursor({'s': 'price', 'i': 1}),
+            'sort not a string': _cursor({'s': [1], 'k': '1', 'i': 1}),
+            'unknown sort': _cursor({'s': 'seats', 'k': '1', 'i': 1}),
+            'price not a number': _cursor({'s': 'price', 'k': 'x', 'i': 1}),
+            'price not finite': _cursor({'s': 'price', 'k': 'NaN', 'i': 1}),
+            'price not a string': _cursor({'s': 'price', 'k': [1], 'i': 1}),
+            'huge duration': _cursor({'s': 'duration', 'k': 1e300, 'i': 1}),
+            'duration not a number': _cursor({'s': 'duration', 'k': '80', 'i': 1}),
+            'bad datetime': _cursor({'s': 'departure', 'k': 'yesterday', 'i': 1}),
+            'id not an integer': _cursor({'s': 'price', 'k': '1', 'i': '1'}),
+            'id huge float': _cursor({'s': 'price', 'k': '1', 'i': 1e300}),
+        }
+        for case, cursor in cursors.items():
+            with self.subTest(case=case):
+                with self.assertRaises(InvalidCursor):
+                    schedule_search_paginator.decode(cursor, 'price')
+
+    def test_cursor_of_another_sort(self):
+        cursor = schedule_search_paginator.encode('price', Decimal('100'), 1)
+        with self.assertRaisesMessage(InvalidCursor, 'different sort'):
+            schedule_search_paginator.decode(cursor, '-price')
+
+
+def _schedules(*departures):
+    """Open MNL-CEB schedules departing at the given times"""
+    country = Country.objects.create(name='Philippines', code='PH', currency='PHP')
+    origin = Airport.objects.create(name='NAIA', code='MNL', city='Manila', country=country)
+    destination = Airport.objects.create(name='Mactan', code='CEB', city='Cebu', country=country)
+    airline = Airline.objects.create(name='Cebu Pacific', code='5J')
+    aircraft = Aircraft.objects.create(model='Airbus A321', capacity=20, airline=airline)
+    route = Route.objects.create(origin_airport=origin, destination_airport=destination, base_price=Decimal('2000'))
+    flight = Flight.objects.create(flight_number='5J 560', airline=airline, aircraft=aircraft, route=route)
+    return [
+        Schedule.objects.create(
+            flight=flight,
+            departure_time=departure,
+            arrival_time=departure + timedelta(minutes=80),
+            price=Decimal('2500'),
+        )
+        for departure in departures
+    ]
+
+
+class PriceQuoteTests(TestCase):
+    """Signed search quotes: expiry, schedule binding and single use"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departure = timezone.now() + timedelta(days=10)
+        cls.schedule, cls.other = _schedules(departure, departure + timedelta(hours=3))
+
+    def quote(self, **kwargs):
+        return price_quotes.issue(
+            self.schedule.id, Decimal('3000'), {'Economy': Decimal('3000'), 'Business': Decimal('5400')}, **kwargs
+        )['price_quote']
+
+    def test_redeem_returns_quoted_fares(self):
+        price, class_fares = price_quotes.redeem_fares(self.quote(), self.schedule.id, 'Business')
+        self.assertEqual(price, Decimal('5400'))
+        self.assertEqual(class_fares, {'economy': Decimal('3000'), 'business': Decimal('5400')})
+
+    def test_expired_quote(self):
+        token = self.quote(now=time.time() - price_quotes.ttl - 1)
+        with self.assertRaisesMessage(PriceQuoteError, 'expired'):
+            price_quotes.redeem(token, self.schedule.id)
+
+    def test_quote_of_another_schedule(self):
+        with self.assertRaisesMessage(PriceQuoteError, 'does not match'):
+            price_quotes.redeem(self.quote(), self.other.id)
+
+    def test_seat_class_not_quoted(self):
+        with self.assertRaisesMessage(PriceQuoteError, 'does not cover'):
+            price_quotes.redeem(self.quote(), self.schedule.id, 'First')
+
+    def test_tampered_quote(self):
+        token = self.quote()
+        with self.assertRaisesMessage(PriceQuoteError, 'Invalid'):
+            price_quotes.redeem(token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB'), self.schedule.id)
+
+    def test_single_use(self):
+        token = self.quote()
+        self.assertEqual(price_quotes.verify(token, self.schedule.id), Decimal('3000'))
+        price_quotes.redeem(token, self.schedule.id)
+        self.assertEqual(RedeemedPriceQuote.objects.count(), 1)
+        with self.assertRaisesMessage(PriceQuoteError, 'already been used'):
+            price_quotes.redeem(token, self.schedule.id)
+        with self.assertRaisesMessage(PriceQuoteError, 'already been used'):
+            price_quotes.verify(token, self.schedule.id)
+
+    def test_rolled_back_redemption_leaves_quote_usable(self):
+        token = self.quote()
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                price_quotes.redeem(token, self.schedule.id)
+                raise RuntimeError('booking failed')
+        self.assertEqual(price_quotes.redeem(token, self.schedule.id), Decimal('3000'))
+
+
+@override_settings(
+    ML_PRICE_REFRESH_IN_PROCESS=False,
+    DEMAND_TRACKER_PATH=os.path.join(tempfile.gettempdir(), 'flightapp-test-demand.sqlite3'),
+)
+class ScheduleSearchCacheTests(TestCase):
+    """The cache key and the search filter must describe the same query"""
+
+    URL = '/flightapp/api/schedules/'
+
+    @classmethod
+    def setUpTestData(cls):
+        day = timezone.localdate() + timedelta(days=10)
+        departure = timezone.make_aware(datetime.combine(day, datetime.min.time().replace(hour=6)))
+        cls.day = day.isoformat()
+        cls.schedule, cls.next_day = _schedules(departure, departure + timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, departure, **params):
+        return self.client.get(self.URL, {'origin': 'MNL', 'destination': 'CEB', 'departure': departure, **params})
+
+    def cached(self, query):
+        return schedule_search_cache.lookup(query)[0]
+
+    def test_normalize_query(self):
+        normalize = schedule_search_cache.normalize_query
+        self.assertEqual(normalize(' MNL ', 'CEB', self.day + 'T00:00:00 '), ('MNL', 'CEB', self.day))
+        self.assertIsNone(normalize('MNL', 'CEB', 'tomorrow'))
+        self.assertIsNone(normalize('MNL', 'CEB', None))
+        self.assertIsNone(normalize('MNL:CEB', 'CEB', self.day))
+        self.assertIsNone(normalize('X' * 200, 'CEB', self.day))
+
+    def test_search_is_cached_under_its_query(self):
+        response = self.search(self.day)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [self.schedule.id])
+        cached = self.cached(('MNL', 'CEB', self.day))
+        self.assertEqual([entry['row']['id'] for entry in cached], [self.schedule.id])
+
+    def test_padded_date_filters_like_the_key_and_is_not_cached(self):
+        response = self.search(self.day + ' ')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [self.schedule.id])
+        self.assertIsNone(self.cached(('MNL', 'CEB', self.day)))
+
+        # A clean search afterwards still gets only its own day
+        response = self.search(self.day)
+        self.assertEqual([row['id'] for row in response.data], [self.schedule.id])
+
+    def test_unparseable_date_is_rejected(self):
+        for departure in ('tomorrow', '2026-13-45', self.day + 'x'):
+            with self.subTest(departure=departure):
+                self.assertEqual(self.search(departure).status_code, 400)
+                self.assertEqual(self.search(departure, sort='price').status_code, 400)
+                self.assertEqual(self.search(departure, flex_days='1').status_code, 400)
+        self.assertIsNone(self.cached(('MNL', 'CEB', self.day)))
@@ -18,6 +18,12 @@ urlpatterns = [
 
     # Dynamic pricing endpoints
     path('api/test-dynamic-pricing/', views.test_dynamic_pricing, name='test-dynamic-pricing'),
+    path('api/pricing-traces/', views.pricing_traces, name='pricing-traces'),
+    path('api/fare-calendar/', views.fare_calendar, name='fare-calendar'),
+    path('api/connections/', views.search_connections, name='search-connections'),
+    path('api/seat-updates/', views.seat_updates, name='seat-updates'),
+    path('api/seat-stream/', views.seat_stream, name='seat-stream'),
+    path('api/tax-quote/', views.tax_quote, name='tax-quote'),
     path('api/predict-price/', views.predict_flight_price, name='predict-price'),
 
     # Payment endpoints
@@ -4,8 +4,9 @@ import requests
 from rest_framework import viewsets, generics, status, filters, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.db.models import Q, F, Count
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from django.db.models import Q, F, Count, Prefetch
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.core.cache import cache
@@ -14,13 +15,14 @@ from decimal import Decimal
 from django.contrib.auth.models import User
 from .services.email_service import EmailService
 from .services.pdf_service import BoardingPassPDFService
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from .ml.predictor import predictor
 from .ml.dynamic_pricing import dynamic_pricing
 import hashlib
 import json
 from decimal import Decimal
+import logging
 import random
 
 from app.models import (
@@ -28,11 +30,20 @@ from app.models import (
     SeatClass, PassengerInfo, Airline, Booking, BookingDetail,
     MealOption, BaggageOption, AssistanceService, AddOn, AddOnType,
     TaxType, PassengerTypeTaxRate, BookingTax, TravelInsurancePlan, 
-    BookingInsuranceRecord, Aircraft, BookingContact, SeatClass, SeatClassFeature
+    BookingInsuranceRecord, Aircraft, BookingContact, SeatClass, SeatClassFeature,
+    SeatInventory, FareCalendar, SeatHold
 )
 import json
 from .serializers import *
 from .services.paymongo_service import paymongo_service
+from .services.price_quotes import price_quotes, PriceQuoteError
+from .services.reference_data import reference_data
+from .services.seat_holds import seat_hold_sweeper
+from .services.seat_assignment import seat_assignment
+from .services.booking_assembly import booking_assembly
+from .services.tax_engine import tax_engine
+
+booking_logger = logging.getLogger('flightapp.booking')
 
 class AirlineFilterMixin:
     """Mixin to handle common airline filtering logic by ID or Code"""
@@ -51,18 +62,31 @@ class AirlineFilterMixin:
         
         return queryset
 
-class CountryViewSet(viewsets.ReadOnlyModelViewSet):
+class ReferenceDataMixin:
+    """Serve list() from the versioned reference-data cache (ETag / 304)"""
+    reference_dataset = None
+
+    def list(self, request, *args, **kwargs):
+        return reference_data.respond(
+            request,
+            self.reference_dataset,
+            lambda: super(ReferenceDataMixin, self).list(request, *args, **kwargs).data
+        )
+
+class CountryViewSet(ReferenceDataMixin, viewsets.ReadOnlyModelViewSet):
     """
     A read-only viewset that provides 'list' and 'retrieve' actions.
     """
+    reference_dataset = 'countries'
     permission_classes = [permissions.AllowAny]
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
 
-class AirportViewSet(viewsets.ReadOnlyModelViewSet):
+class AirportViewSet(ReferenceDataMixin, viewsets.ReadOnlyModelViewSet):
     """
     A read-only viewset for Airports.
     """
+    reference_dataset = 'airports'
     permission_classes = [permissions.AllowAny]
     queryset = Airport.objects.all().select_related('country')
     serializer_class = AirportSerializer
@@ -70,10 +94,38 @@ class AirportViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'city', 'code', 'country__name']
 
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Ranked airport matches for a typed query (?q=ceb&limit=10), served
+        from the in-memory airport index instead of the full airport list.
+        """
+        from .services.airport_index import airport_index
+
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'limit must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'success': True,
+            'query': query,
+            'results': airport_index.search(query, limit=limit)
+        })
+
 from .ml.predictor import predictor
 from decimal import Decimal
 
 from .ml.dynamic_pricing import dynamic_pricing
+from .ml.price_refresh import price_refresh_scheduler
+from .services.search_cache import schedule_search_cache
+from .services.search_pagination import schedule_search_paginator, InvalidCursor
+from .services.demand_tracker import demand_tracker
+from rest_framework.exceptions import ValidationError as RequestValidationError
 
 class ScheduleViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ScheduleSerializer
@@ -83,34 +135,81 @@ class ScheduleViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         queryset = Schedule.objects.filter(status='Open').select_related(
             'flight__airline', 
-            'flight__route__origin_airport', 
-            'flight__route__destination_airport'
+            'flight__route__origin_airport__country', 
+            'flight__route__destination_airport__country'
         ).prefetch_related(
-            'flight__aircraft',
-            'seats',  # Prefetch seats to avoid N+1 queries
-            'seats__seat_class'
+            # One row per (schedule, seat class) with available count,
+            # min price adjustment and multiplier - no Seat rows are loaded
+            Prefetch(
+                'seat_inventory',
+                queryset=SeatInventory.objects.select_related('seat_class').order_by('seat_class__name')
+            )
         )
         
-        origin = self.request.query_params.get('origin')
-        destination = self.request.query_params.get('destination')
-        date = self.request.query_params.get('departure')
+        try:
+            origin, destination, day = self.get_search_params()
+            flex_days = self.get_flex_days() if day else 0
+        except ValueError as e:
+            # Never drop a filter: that would search (and cache) every date
+            raise RequestValidationError({'success': False, 'error': str(e)})
 
         if origin:
             queryset = queryset.filter(flight__route__origin_airport__code=origin)
         if destination:
             queryset = queryset.filter(flight__route__destination_airport__code=destination)
-        if date:
-            try:
-                clean_date = date.split('T')[0] if 'T' in date else date
-                queryset = queryset.filter(departure_time__date=clean_date)
-            except Exception as e:
-                print(f"Date filter error: {e}")
-                pass
+        if day and flex_days:
+            # Whole +/- N day window in the same single query
+            queryset = queryset.filter(departure_time__date__range=(
+                day - timedelta(days=flex_days), day + timedelta(days=flex_days)
+            ))
+        elif day:
+            queryset = queryset.filter(departure_time__date=day)
 
         return queryset
     
+    def get_search_params(self):
+        """
+        (origin, destination, departure date) of the search, stripped the same
+        way as the search cache key; raises ValueError on an unparseable date
+        """
+        params = self.request.query_params
+        origin = (params.get('origin') or '').strip() or None
+        destination = (params.get('destination') or '').strip() or None
+        departure = (params.get('departure') or '').split('T')[0].strip()
+        if not departure:
+            return origin, destination, None
+        try:
+            return origin, destination, datetime.strptime(departure, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError('departure must be a date (YYYY-MM-DD)')
+    
+    def get_flex_days(self):
+        """flex_days query param (0 when absent); raises ValueError if invalid"""
+        flex_days = self.request.query_params.get('flex_days')
+        if not flex_days:
+            return 0
+        flex_days = int(flex_days)
+        max_flex_days = getattr(settings, 'SCHEDULE_SEARCH_MAX_FLEX_DAYS', 7)
+        if flex_days < 0 or flex_days > max_flex_days:
+            raise ValueError(f"flex_days must be between 0 and {max_flex_days}")
+        return flex_days
+    
     def list(self, request, *args, **kwargs):
-        """REAL-TIME PRICING - Prices change on EVERY request!"""
+        """
+        REAL-TIME PRICING - Prices change on EVERY request!
+        With sort, cursor or page_size the search is cursor-paginated
+        ({'results', 'next_cursor'}) and only the returned page is priced;
+        without them every match is returned as a plain list.
+        sort=price orders by the stored base fare (ML price, else schedule
+        price), shown as 'sort_price' on each row: the displayed 'price' is
+        the per-user dynamic price and need not follow that order.
+        """
+        paginated = any(
+            request.query_params.get(param) for param in ('sort', 'cursor', 'page_size')
+        )
+        sort = request.query_params.get('sort') or schedule_search_paginator.DEFAULT_SORT
+        cursor = request.query_params.get('cursor')
+        next_cursor = None
         
         # Get session ID for price differentiation
         session_id = request.session.session_key
@@ -121,112 +220,248 @@ class ScheduleViewSet(viewsets.ReadOnlyModelViewSet):
         # Get user for loyalty pricing
         user = request.user if request.user.is_authenticated else None
         
-        queryset = self.filter_queryset(self.get_queryset())
-        
-        # ============ UPDATE ML PRICES IN DATABASE ============
-        # Only run this occasionally - not every request!
-        # Consider moving this to a management command or cron job
-        updated_count = 0
-        for schedule in queryset:
-            # Check if ML price is missing or stale (older than 1 hour)
-            needs_update = (
-                schedule.ml_base_price is None or
-                schedule.ml_price_updated_at is None or
-                (timezone.now() - schedule.ml_price_updated_at).total_seconds() > 3600
-            )
-            
-            if needs_update:
-                try:
-                    success, price = schedule.update_ml_price(save=True)
-                    if success:
-                        updated_count += 1
-                except Exception as e:
-                    print(f"Error updating ML price for schedule {schedule.id}: {e}")
+        if request.query_params.get('flex_days'):
+            return self.flex_list(request, user, session_id)
+        
+        try:
+            origin, destination, day = self.get_search_params()
+        except ValueError as e:
+            return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # ============ SHARED SEARCH CACHE ============
+        # Serialized rows + ML base prices are the same for everyone;
+        # only the per-user dynamic factors are applied per request.
+        # The queryset filters on the same normalized values; requests whose
+        # raw params differ from them are answered but never cached.
+        query = schedule_search_cache.normalize_query(
+            origin, destination, day.isoformat() if day else None
+        )
+        if query != tuple(request.query_params.get(param) for param in ('origin', 'destination', 'departure')):
+            query = None
+        if paginated:
+            try:
+                page_size = schedule_search_paginator.parse_page_size(request.query_params.get('page_size'))
+                schedule_search_paginator.parse_sort(sort)
+            except InvalidCursor as e:
+                return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            variant = f"page:{sort}:{page_size}:{cursor or ''}"
+        else:
+            variant = None
         
-        if updated_count > 0:
-            print(f"✅ Updated ML prices for {updated_count} schedules")
-        # ======================================================
+        cached, version = schedule_search_cache.lookup(query, variant) if query else (None, None)
+        
+        if cached is not None:
+            entries = cached['entries'] if paginated else cached
+            next_cursor = cached['next_cursor'] if paginated else None
+        elif paginated:
+            # One ORDER BY ... LIMIT query; only this page is serialized and priced
+            try:
+                schedules, next_cursor = schedule_search_paginator.page(
+                    self.filter_queryset(self.get_queryset()), sort, cursor, page_size
+                )
+            except InvalidCursor as e:
+                return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            entries = self.build_search_entries(schedules)
+            if sort.lstrip('-') == 'price':
+                # The sort key, next to the dynamic price the row displays
+                for entry, schedule in zip(entries, schedules):
+                    entry['row']['sort_price'] = float(
+                        getattr(schedule, schedule_search_paginator.SORT_KEY)
+                    )
+            if query:
+                schedule_search_cache.store(
+                    query, version, {'entries': entries, 'next_cursor': next_cursor}, variant
+                )
+        else:
+            entries = self.build_search_entries(self.filter_queryset(self.get_queryset()))
+            if query:
+                schedule_search_cache.store(query, version, entries)
+        # =============================================
         
         # ============ REAL-TIME PRICING - FRESH EVERY TIME ============
-        serializer = self.get_serializer(queryset, many=True)
-        data = serializer.data
+        data = [entry['row'] for entry in entries]
         
         # Apply dynamic pricing on EVERY request - NO CACHING!
-        for i, schedule in enumerate(queryset):
-            if i < len(data):
-                try:
-                    flight_data = {
-                        'schedule_id': schedule.id,
-                        'flight_number': schedule.flight.flight_number,
-                        'airline_code': schedule.flight.airline.code,
-                        'airline_name': schedule.flight.airline.name,
-                        'origin': schedule.flight.route.origin_airport.code,
-                        'destination': schedule.flight.route.destination_airport.code,
-                        'departure_time': schedule.departure_time.isoformat(),
-                        'arrival_time': schedule.arrival_time.isoformat(),
-                        'total_stops': 0,
-                        'is_domestic': schedule.flight.route.is_domestic,
-                    }
-                    
-                    # FRESH dynamic price for this specific user/session
-                    price_data = dynamic_pricing.get_price_for_user(
-                        flight_data, 
-                        user=user,
-                        session_id=session_id
-                    )
-                    
-                    # ============ FIXED ROUNDING LOGIC ============
-                    # Round ONLY ONCE at the very end
-                    final_price = dynamic_pricing.round_price(price_data['final_price'])
-                    base_price = dynamic_pricing.round_price(price_data['base_price'])
-                    ml_base = float(schedule.ml_base_price) if schedule.ml_base_price else schedule.price
-                    rounded_ml_base = dynamic_pricing.round_price(ml_base)
-                    # ==============================================
-                    
-                    # Update response with PROPERLY rounded prices
-                    data[i]['price'] = final_price
-                    data[i]['base_price'] = base_price
-                    data[i]['ml_base_price'] = rounded_ml_base
-                    data[i]['ml_predicted'] = True
-                    data[i]['dynamic_pricing'] = price_data['factors_applied']
-                    data[i]['raw_ml_price'] = float(schedule.ml_base_price) if schedule.ml_base_price else None  # For debugging
-                    
-                    # Unique price ID for this exact moment
-                    timestamp = datetime.now().strftime('%Y%m%d%H%M%S%f')
-                    price_id_input = f"{session_id}_{schedule.id}_{timestamp}_{random.randint(1, 1000)}"
-                    data[i]['price_id'] = hashlib.md5(price_id_input.encode()).hexdigest()[:8]
-                    
-                    # Add timestamp to show when price was calculated
-                    data[i]['price_calculated_at'] = datetime.now().isoformat()
-                    
-                    # ============ FIXED SEAT CLASS PRICING ============
-                    # Update seat classes with fresh dynamic prices
-                    if 'seat_classes' in data[i]:
-                        for seat_class in data[i]['seat_classes']:
-                            seat_class_name = seat_class.get('name', 'Economy')
-                            # Use ML base price from database
-                            ml_base = float(schedule.ml_base_price) if schedule.ml_base_price else schedule.price
-                            
-                            # Calculate raw seat class price
-                            raw_seat_price = ml_base * self.get_seat_class_multiplier(seat_class_name)
-                            
-                            # Round seat class prices using specialized rounding
-                            seat_class['base_price'] = dynamic_pricing.round_price(ml_base)
-                            seat_class['price'] = dynamic_pricing.round_seat_class_price(raw_seat_price)
-                            seat_class['raw_price'] = float(raw_seat_price)  # For debugging
-                    # ==============================================
-                    
-                except Exception as e:
-                    print(f"Error processing schedule {schedule.id}: {e}")
-                    continue
+        # Per-user work (booking count, session hash) happens once per request
+        pricing_context = dynamic_pricing.build_context(user=user, session_id=session_id)
+        price_results = dynamic_pricing.price_many(
+            [entry['flight_data'] for entry in entries],
+            pricing_context,
+            # Stored ML price, or the schedule price until the first refresh
+            base_prices=[entry['ml_base_price'] or entry['price'] for entry in entries]
+        )
+        
+        self.apply_search_prices(entries, price_results)
         
-        # Track search for demand pricing
-        self.track_search_demand(request, queryset)
+        # Track search for demand pricing (once per search, not per page)
+        if not cursor:
+            self.track_search_demand(request, entries)
         
+        if paginated:
+            return Response({
+                'results': data,
+                'next_cursor': next_cursor,
+                'sort': sort,
+                'page_size': page_size,
+            })
         return Response(data)
+    
+    def apply_search_prices(self, entries, price_results):
+        """Write dynamic prices, seat class prices and a price quote into each row"""
+        for entry, price_data in zip(entries, price_results):
+            row = entry['row']
+            flight_data = entry['flight_data']
+            try:
+                # ============ FIXED ROUNDING LOGIC ============
+                # Round ONLY ONCE at the very end
+                final_price = dynamic_pricing.round_price(price_data['final_price'])
+                base_price = dynamic_pricing.round_price(price_data['base_price'])
+                ml_base = entry['ml_base_price'] if entry['ml_base_price'] else entry['price']
+                rounded_ml_base = dynamic_pricing.round_price(ml_base)
+                # ==============================================
+                
+                # Update response with PROPERLY rounded prices
+                row['price'] = final_price
+                row['base_price'] = base_price
+                row['ml_base_price'] = rounded_ml_base
+                row['ml_predicted'] = True
+                row['dynamic_pricing'] = price_data['factors_applied']
+                row['raw_ml_price'] = entry['ml_base_price']  # For debugging
+                
+                # Add timestamp to show when price was calculated
+                row['price_calculated_at'] = datetime.now().isoformat()
+                
+                # ============ FIXED SEAT CLASS PRICING ============
+                # Update seat classes with fresh dynamic prices
+                if 'seat_classes' in row:
+                    for seat_class in row['seat_classes']:
+                        seat_class_name = seat_class.get('name', 'Economy')
+                        
+                        # Calculate raw seat class price
+                        raw_seat_price = ml_base * self.get_seat_class_multiplier(seat_class_name)
+                        
+                        # Round seat class prices using specialized rounding
+                        seat_class['base_price'] = dynamic_pricing.round_price(ml_base)
+                        seat_class['price'] = dynamic_pricing.round_seat_class_price(raw_seat_price)
+                        seat_class['raw_price'] = float(raw_seat_price)  # For debugging
+                # ==============================================
+                
+                # Taxes per passenger type from the compiled tax rules
+                if entry.get('tax_segment'):
+                    row['taxes_per_passenger'] = tax_engine.per_passenger_totals(entry['tax_segment'])
+                
+                # Signed quote of these prices - create_booking redeems it
+                row.update(price_quotes.issue(
+                    flight_data['schedule_id'],
+                    final_price,
+                    {
+                        seat_class.get('name', 'Economy'): seat_class['price']
+                        for seat_class in row.get('seat_classes', [])
+                    }
+                ))
+                
+            except Exception as e:
+                print(f"Error processing schedule {flight_data['schedule_id']}: {e}")
+                continue
+    
+    def flex_list(self, request, user, session_id):
+        """
+        Flexible-date search (flex_days=N): one query for the +/- N day window,
+        one pricing context, a cheapest-fare summary per day and full rows
+        for the requested day only.
+        """
+        try:
+            flex_days = self.get_flex_days()
+            _, _, day = self.get_search_params()
+            if day is None:
+                raise ValueError('departure is required with flex_days')
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        schedules = list(self.filter_queryset(self.get_queryset()))
+        requested = [s for s in schedules if timezone.localtime(s.departure_time).date() == day]
+        others = [s for s in schedules if timezone.localtime(s.departure_time).date() != day]
+        
+        # Only the requested day is serialized; other days just need pricing inputs
+        entries = self.build_search_entries(requested) + self.build_search_entries(others, serialize=False)
+        days_of_entries = [
+            timezone.localtime(s.departure_time).date() for s in requested + others
+        ]
+        
+        pricing_context = dynamic_pricing.build_context(user=user, session_id=session_id)
+        price_results = dynamic_pricing.price_many(
+            [entry['flight_data'] for entry in entries],
+            pricing_context,
+            base_prices=[entry['ml_base_price'] or entry['price'] for entry in entries]
+        )
+        self.apply_search_prices(entries[:len(requested)], price_results[:len(requested)])
+        
+        summary = {
+            day + timedelta(days=offset): {
+                'date': (day + timedelta(days=offset)).isoformat(),
+                'cheapest_price': None,
+                'flight_count': 0,
+                'available_seats': 0,
+            }
+            for offset in range(-flex_days, flex_days + 1)
+        }
+        for entry, price_data, entry_day in zip(entries, price_results, days_of_entries):
+            day_summary = summary[entry_day]
+            day_summary['flight_count'] += 1
+            available = entry['flight_data'].get('available_seats', 0)
+            day_summary['available_seats'] += available
+            if available > 0:
+                price = dynamic_pricing.round_price(price_data['final_price'])
+                if day_summary['cheapest_price'] is None or price < day_summary['cheapest_price']:
+                    day_summary['cheapest_price'] = price
+        
+        self.track_search_demand(request, entries[:len(requested)])
+        
+        return Response({
+            'departure': day.isoformat(),
+            'flex_days': flex_days,
+            'days': list(summary.values()),
+            'results': [entry['row'] for entry in entries[:len(requested)]],
+        })
+    
+    def build_search_entries(self, queryset, serialize=True):
+        """
+        Serialize a search and collect what pricing needs per schedule.
+        The result is user-independent and safe to share via the search cache.
+        With serialize=False rows are None (pricing inputs only).
+        """
+        # ============ ML PRICES ARE REFRESHED IN THE BACKGROUND ============
+        # Search only reads stored prices; the refresh scheduler keeps them
+        # fresh ahead of expiry. Missing/expired ones are bumped in its queue.
+        schedules = list(queryset)
+        price_refresh_scheduler.ensure_started()
+        price_refresh_scheduler.request_refresh([
+            schedule.id for schedule in schedules
+            if schedule.ml_base_price is None or
+            schedule.ml_price_updated_at is None or
+            (timezone.now() - schedule.ml_price_updated_at).total_seconds() > price_refresh_scheduler.price_ttl
+        ])
+        # ===================================================================
+        
+        data = self.get_serializer(schedules, many=True).data if serialize else [None] * len(schedules)
+        
+        return [
+            {
+                'row': row,
+                'flight_data': {**schedule.get_ml_flight_data(), **schedule.get_seat_counts()},
+                'ml_base_price': float(schedule.ml_base_price) if schedule.ml_base_price else None,
+                'price': float(schedule.price),
+                'tax_segment': tax_engine.segment(schedule),
+            }
+            for schedule, row in zip(schedules, data)
+        ]
     # ===================================================================
     
-    def get_seat_class_multiplier(self, seat_class_name):
+    @staticmethod
+    def get_seat_class_multiplier(seat_class_name):
         """Get multiplier for seat class"""
         multipliers = {
             'economy': 1.0,
@@ -244,28 +479,14 @@ class ScheduleViewSet(viewsets.ReadOnlyModelViewSet):
         key = seat_class_name.lower().strip()
         return multipliers.get(key, 1.0)
     
-    def track_search_demand(self, request, queryset):
+    def track_search_demand(self, request, entries):
         """Track search queries for demand-based pricing"""
-        from django.core.cache import cache
-        
-        # Track origin-destination pair demand
-        origin = request.query_params.get('origin')
-        destination = request.query_params.get('destination')
-        
-        if origin and destination:
-            route_key = f"route_demand_{origin}_{destination}"
-            searches = cache.get(route_key, 0)
-            cache.set(route_key, searches + 1, 3600)  # 1 hour expiry
-        
-        # Track specific flight demand
-        for schedule in queryset[:10]:  # Track top 10 only
-            try:
-                flight_key = f"flight_demand_{schedule.flight.flight_number}"
-                searches = cache.get(flight_key, 0)
-                cache.set(flight_key, searches + 1, 3600)
-            except Exception as e:
-                print(f"Error tracking demand: {e}")
-                continue
+        # Origin-destination pair + top 10 flights, one atomic write
+        demand_tracker.record_search(
+            request.query_params.get('origin'),
+            request.query_params.get('destination'),
+            [entry['flight_data']['flight_number'] for entry in entries[:10]]
+        )
 # ====================================================================
 
 @api_view(['GET'])
@@ -338,6 +559,278 @@ def test_dynamic_pricing(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def fare_calendar(request):
+    """
+    Cheapest fare per day of a month on a route, from the precomputed
+    FareCalendar table (one indexed query, no pricing loop).
+    Query params: origin, destination, month (YYYY-MM, default this month),
+    seat_class (optional, e.g. Economy).
+    """
+    origin = request.query_params.get('origin')
+    destination = request.query_params.get('destination')
+    if not origin or not destination:
+        return Response({
+            'success': False,
+            'error': 'origin and destination are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        month = request.query_params.get('month') or timezone.localdate().strftime('%Y-%m')
+        start = datetime.strptime(month, '%Y-%m').date()
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'month must be in YYYY-MM format'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    end = (start + timedelta(days=32)).replace(day=1)
+    
+    fares = FareCalendar.objects.filter(
+        origin__code=origin,
+        destination__code=destination,
+        date__gte=start,
+        date__lt=end,
+    )
+    seat_class = request.query_params.get('seat_class')
+    if seat_class:
+        fares = fares.filter(seat_class_name__iexact=seat_class)
+    
+    days = {}
+    for fare in fares.order_by('date', 'seat_class_name').values(
+        'date', 'seat_class_name', 'min_base_price', 'available_seats', 'schedule_count'
+    ):
+        base_price = float(fare['min_base_price'] or 0)
+        # Same seat-class pricing as the search results
+        price = dynamic_pricing.round_seat_class_price(
+            base_price * ScheduleViewSet.get_seat_class_multiplier(fare['seat_class_name'])
+        )
+        day = days.setdefault(fare['date'], {
+            'date': fare['date'].isoformat(),
+            'min_price': None,
+            'available': False,
+            'seat_classes': [],
+        })
+        day['seat_classes'].append({
+            'name': fare['seat_class_name'],
+            'base_price': dynamic_pricing.round_price(base_price),
+            'price': price,
+            'available_seats': fare['available_seats'],
+            'schedule_count': fare['schedule_count'],
+        })
+        if fare['available_seats'] > 0:
+            day['available'] = True
+            if day['min_price'] is None or price < day['min_price']:
+                day['min_price'] = price
+    
+    return Response({
+        'success': True,
+        'origin': origin,
+        'destination': destination,
+        'month': start.strftime('%Y-%m'),
+        'days': list(days.values())
+    })
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_connections(request):
+    """
+    Direct, one-stop and two-stop itineraries between two airports.
+    Query params: origin, destination, departure (YYYY-MM-DD),
+    max_stops (0-2, default 2), passengers (default 1),
+    sort (best | price | duration), limit (default 20).
+    """
+    from .services.connection_search import connection_search
+    
+    origin = request.query_params.get('origin')
+    destination = request.query_params.get('destination')
+    departure = request.query_params.get('departure')
+    if not origin or not destination or not departure:
+        return Response({
+            'success': False,
+            'error': 'origin, destination and departure are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        day = datetime.strptime(departure.split('T')[0], '%Y-%m-%d').date()
+        max_stops = min(max(int(request.query_params.get('max_stops', 2)), 0), 2)
+        passengers = max(int(request.query_params.get('passengers', 1)), 1)
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'Invalid departure date or numeric parameter'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    itineraries = connection_search.search(
+        origin, destination, day,
+        max_stops=max_stops,
+        passengers=passengers,
+        sort=request.query_params.get('sort', 'best'),
+        limit=limit
+    )
+    
+    return Response({
+        'success': True,
+        'origin': origin,
+        'destination': destination,
+        'departure': day.isoformat(),
+        'count': len(itineraries),
+        'itineraries': itineraries
+    })
+
+
+def _seat_listen_params(params, last_event_id=None):
+    """(schedule_id, since, layout_version) of a seat update request"""
+    schedule_id = int(params.get('schedule', ''))
+    since = params.get('since')
+    layout_version = params.get('layout_version')
+    if last_event_id and ':' in last_event_id:
+        # EventSource reconnect: resume from the last event received
+        since, layout_version = last_event_id.split(':', 1)
+    return schedule_id, int(since) if since else None, layout_version
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def seat_updates(request):
+    """
+    Long-poll seat availability of a schedule (?schedule=ID&since=<version>
+    &layout_version=<digest>&timeout=25). Answers as soon as a seat changes,
+    with the same payload as /api/seats/map/.
+    """
+    from .services.seat_events import seat_events
+
+    try:
+        schedule_id, since, layout_version = _seat_listen_params(request.query_params)
+        timeout = min(max(float(request.query_params.get('timeout', 25)), 0), 60)
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'schedule, since and timeout must be numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    payload = seat_events.wait(schedule_id, since=since, layout_version=layout_version, timeout=timeout)
+    if payload is None:
+        return Response({
+            'success': False,
+            'error': 'Schedule not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'success': True, **payload})
+
+
+def seat_stream(request):
+    """
+    Server-sent events of a schedule's seat availability
+    (?schedule=ID&since=<version>&layout_version=<digest>).
+    Plain Django view: EventSource asks for text/event-stream, which DRF
+    content negotiation would reject. Each stream holds a worker thread for
+    up to SEAT_STREAM_MAX_SECONDS, so a process serves at most
+    SEAT_STREAM_MAX_CONNECTIONS at once; beyond that it answers 503 and
+    clients should long-poll /api/seat-updates/ instead.
+    """
+    from .services.seat_events import seat_events
+
+    try:
+        schedule_id, since, layout_version = _seat_listen_params(
+            request.GET, request.headers.get('Last-Event-ID')
+        )
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'schedule and since must be integers'
+        }, status=400)
+
+    events = seat_events.open_stream(schedule_id, since=since, layout_version=layout_version)
+    if events is None:
+        response = JsonResponse({
+            'success': False,
+            'error': 'Too many open seat streams, use /api/seat-updates/'
+        }, status=503)
+        response['Retry-After'] = str(seat_events.poll_interval)
+        return response
+
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def tax_quote(request):
+    """
+    Tax breakdown of a trip before booking
+    (?schedules=ID[,ID]&adults=1&children=0&infants=0).
+    """
+    try:
+        schedule_ids = [
+            int(schedule_id) for schedule_id in request.query_params.get('schedules', '').split(',')
+            if schedule_id.strip()
+        ]
+        passenger_counts = {
+            'adult': int(request.query_params.get('adults', 1)),
+            'child': int(request.query_params.get('children', 0)),
+            'infant': int(request.query_params.get('infants', 0)),
+        }
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'schedules and passenger counts must be numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not schedule_ids:
+        return Response({
+            'success': False,
+            'error': 'schedules is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    schedules = Schedule.objects.select_related(
+        'flight__route__origin_airport__country',
+        'flight__route__destination_airport__country'
+    ).in_bulk(schedule_ids)
+    missing = [schedule_id for schedule_id in schedule_ids if schedule_id not in schedules]
+    if missing:
+        return Response({
+            'success': False,
+            'error': f'Schedule not found: {missing[0]}'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    quote = tax_engine.quote(
+        [tax_engine.segment(schedules[schedule_id]) for schedule_id in schedule_ids],
+        passenger_counts
+    )
+    return Response({'success': True, 'currency': 'PHP', **quote})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pricing_traces(request):
+    """
+    Sampled pricing traces (one row per priced flight, oldest first).
+    Sampling is off unless PRICING_TRACE_SAMPLE_RATE is set.
+    """
+    from .ml.pricing_trace import pricing_trace
+
+    try:
+        limit = int(request.query_params.get('limit', 0)) or None
+    except ValueError:
+        return Response({
+            'success': False,
+            'error': 'limit must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    traces = pricing_trace.snapshot(limit=limit)
+    return Response({
+        'success': True,
+        'sample_rate': pricing_trace.sample_rate,
+        'count': len(traces),
+        'traces': traces
+    })
+
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -406,7 +899,7 @@ class SeatViewSet(viewsets.ReadOnlyModelViewSet):
                     'schedule_price': float(schedule.price) if schedule.price else 0.00,
                     'seats': response.data,
                     'total_seats': len(response.data),
-                    'available_seats': Seat.objects.filter(schedule_id=schedule_id, is_available=True).count()
+                    'available_seats': schedule.get_seat_counts()['available_seats']
                 }
             except Schedule.DoesNotExist:
                 response.data = {
@@ -428,17 +921,52 @@ class SeatViewSet(viewsets.ReadOnlyModelViewSet):
         
         return response
 
-class MealOptionViewSet(AirlineFilterMixin, viewsets.ReadOnlyModelViewSet):
+    @action(detail=False, methods=['get'], url_path='map')
+    def seat_map(self, request):
+        """
+        Compact seat map (?schedule=ID): layout once, availability as a bitset.
+        Polling with &since=<version>&layout_version=<layout_version> returns
+        only the seats that became available or taken since that version.
+        """
+        from .services.seat_map import seat_maps
+
+        try:
+            schedule_id = int(request.query_params.get('schedule', ''))
+            since = request.query_params.get('since')
+            since = int(since) if since else None
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'schedule and since must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = seat_maps.seat_map(
+            schedule_id,
+            since=since,
+            layout_version=request.query_params.get('layout_version')
+        )
+        if payload is None:
+            return Response({
+                'success': False,
+                'error': 'Schedule not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({'success': True, **payload})
+
+class MealOptionViewSet(ReferenceDataMixin, AirlineFilterMixin, viewsets.ReadOnlyModelViewSet):
+    reference_dataset = 'meal_options'
     queryset = MealOption.objects.all()
     serializer_class = MealOptionSerializer
     permission_classes = [permissions.AllowAny]
 
-class AssistanceServiceViewSet(AirlineFilterMixin, viewsets.ReadOnlyModelViewSet):
+class AssistanceServiceViewSet(ReferenceDataMixin, AirlineFilterMixin, viewsets.ReadOnlyModelViewSet):
+    reference_dataset = 'assistance_services'
     queryset = AssistanceService.objects.all()
     serializer_class = AssistanceServiceSerializer
     permission_classes = [permissions.AllowAny]
 
-class BaggageOptionViewSet(AirlineFilterMixin, viewsets.ReadOnlyModelViewSet):
+class BaggageOptionViewSet(ReferenceDataMixin, AirlineFilterMixin, viewsets.ReadOnlyModelViewSet):
+    reference_dataset = 'baggage_options'
     queryset = BaggageOption.objects.all()
     serializer_class = BaggageOptionSerializer
     permission_classes = [permissions.AllowAny]
@@ -787,14 +1315,23 @@ def create_checkout_session(request):
     Generate a PayMongo Checkout URL for method selection
     """
     try:
-        amount = request.data.get('amount')
         booking_id = request.data.get('booking_id')
         
-        if not amount or not booking_id:
+        if not booking_id:
             return Response({
                 'success': False,
-                'error': 'Amount and booking_id are required'
+                'error': 'booking_id is required'
             }, status=400)
+        
+        # Charge the total computed when the booking was created, not the client amount
+        booking = Booking.objects.filter(id=booking_id).only('id', 'total_amount').first()
+        if booking is None:
+            return Response({
+                'success': False,
+                'error': f'Booking {booking_id} not found'
+            }, status=404)
+        amount = booking.total_amount
+        _check_client_total(booking, request.data.get('amount'))
 
         # Get additional customer info
         customer_email = request.data.get('customer_email')
@@ -878,12 +1415,13 @@ def create_booking(request):
     API endpoint to create a booking with pending status
     """
     try:
-        print(f"🔍 DEBUG: Raw request data: {request.data}")
+        # Seats are held until payment; expired holds are released in the background
+        seat_hold_sweeper.ensure_started()
         
         # Validate request data using serializer
         serializer = CreateBookingSerializer(data=request.data)
         if not serializer.is_valid():
-            print(f"DEBUG: Serializer errors: {serializer.errors}")
+            booking_logger.info("Booking rejected: invalid fields %s", sorted(serializer.errors))
             return Response({
                 'success': False,
                 'error': serializer.errors
@@ -896,13 +1434,9 @@ def create_booking(request):
             # 1. Create or get user
             user = _get_or_create_user(data)
             
-            # 2. Create main booking WITH total amount from frontend
+            # 2. Create main booking (totals are computed from the verified fares below)
             trip_type = data.get('trip_type', 'one_way')
-            total_amount = data.get('total_amount', Decimal('0.00'))
             
-            print(f"DEBUG: Creating booking with total amount: {total_amount}")
-            
-            # Create booking WITH the total_amount field
             booking = Booking.objects.create(
                 user=user,
                 trip_type=trip_type,
@@ -910,79 +1444,60 @@ def create_booking(request):
                 base_fare_total=Decimal('0.00'),
                 insurance_total=Decimal('0.00'),
                 tax_total=Decimal('0.00'),
-                total_amount=total_amount  # Use the field from your model
+                total_amount=Decimal('0.00')
             )
             
-            print(f"DEBUG: Booking created with ID: {booking.id}, Total: {booking.total_amount}")
-            
             contact_info = data.get('contact_info', {})
             booking_contact = _create_booking_contact(booking, contact_info)
             
-            # 3. Create passengers
-            passengers = _create_passengers(data.get('passengers', []))
-            print(f"DEBUG: Created {len(passengers)} passengers")
-            
-            # 4. Create booking details for each passenger
-            booking_details = []
+            # 3. Verified fares per flight and seat class from the search price quotes
+            fares, class_fares = _verified_fares(data, trip_type)
             
-            # For each passenger, create TWO booking details for round trips
-            for i, passenger in enumerate(passengers):
-                print(f"DEBUG: Creating booking details for passenger {i+1}: {passenger.first_name} {passenger.last_name}")
-                
-                # Get the passenger data from request to get the key
-                passenger_data = data.get('passengers', [])[i] if i < len(data.get('passengers', [])) else None
-                
-                # Create DEPART flight booking detail
-                depart_detail = _create_booking_detail(
-                    booking, passenger, data, passenger_data, is_return=False
-                )
-                if depart_detail:
-                    booking_details.append(depart_detail)
-                    print(f"DEBUG: Depart booking detail created: {depart_detail.id}")
-                
-                # Create RETURN flight booking detail for round trips
-                if trip_type == 'round_trip':
-                    return_detail = _create_booking_detail(
-                        booking, passenger, data, passenger_data, is_return=True
-                    )
-                    if return_detail:
-                        booking_details.append(return_detail)
-                        print(f"DEBUG: Return booking detail created: {return_detail.id}")
+            # 4. Passengers, booking details (one per passenger and flight), seats,
+            #    add-ons and taxes, written with one bulk statement per table
+            passengers, booking_details, booking_taxes = booking_assembly.assemble(
+                booking, data, data.get('passengers', []), trip_type=trip_type,
+                fares=fares, class_fares=class_fares
+            )
             
             if not booking_details:
                 raise Exception("No booking details created")
             
-            # 5. Calculate and apply taxes
-            print(f"DEBUG: Applying taxes for {len(booking_details)} booking details")
-            _apply_taxes(booking, booking_details)
+            # Seat passengers who did not pick a seat (party kept together)
+            seated = seat_assignment.assign(booking, booking_details)
+            booking_logger.debug("Auto-assigned seats to %s booking details", seated)
             
-            # 6. Save booking totals
-            print(f"DEBUG: Updating booking totals")
-            _update_booking_totals(booking)
+            # 5. Save booking totals (fares + taxes + add-ons, computed server-side)
+            booking_assembly.totals(booking, booking_details, booking_taxes)
+            _check_client_total(booking, data.get('total_amount'))
+            booking_logger.info("Booking %s created", booking.id)
             
-            print(f"DEBUG: Booking creation successful!")
-            
-            # Return the correct total amount
             return Response({
                 'success': True,
                 'booking_id': booking.id,
                 'booking_reference': f"CSUCC{booking.id:08d}",
                 'status': 'pending',
-                'total_amount': float(total_amount),  # Use the total amount from frontend
+                'seat_hold_expires_at': booking.seat_holds.order_by('expires_at').values_list(
+                    'expires_at', flat=True
+                ).first(),
+                'total_amount': float(booking.total_amount),
                 'payment_info': {
                     'needs_payment': True,
-                    'amount': float(total_amount),  # Use the total amount from frontend
+                    'amount': float(booking.total_amount),
                     'currency': 'PHP',
                     'description': f'Flight Booking {booking.id}'
                 },
                 'message': 'Booking created successfully with pending payment status'
             }, status=status.HTTP_201_CREATED)
             
+    except PriceQuoteError as e:
+        return Response({
+            'success': False,
+            'error': str(e),
+            'code': 'price_quote'
+        }, status=status.HTTP_409_CONFLICT)
     except Exception as e:
-        import traceback
-        print("=== ERROR TRACEBACK ===")
-        traceback.print_exc()
-        print("======================")
+        booking_logger.exception("Booking creation failed: %s", e)
         return Response({
             'success': False,
             'error': str(e)
@@ -996,15 +1511,10 @@ def update_booking(request, booking_id):
     API endpoint to update an existing booking
     """
     try:
-        print(f"🔍 DEBUG: Updating booking ID: {booking_id}")
-        print(f"DEBUG: Request data: {request.data}")
-        
         # First, check if booking exists
         try:
             booking = Booking.objects.get(id=booking_id)
-            print(f"DEBUG: Found booking {booking_id}, current status: {booking.status}")
         except Booking.DoesNotExist:
-            print(f"DEBUG: Booking {booking_id} not found")
             return Response({
                 'success': False,
                 'error': f'Booking {booking_id} not found'
@@ -1012,7 +1522,6 @@ def update_booking(request, booking_id):
         
         # Don't update if booking is already confirmed/cancelled
         if booking.status in ['Confirmed', 'Cancelled']:
-            print(f"DEBUG: Booking {booking_id} is already {booking.status}, cannot update")
             return Response({
                 'success': False,
                 'error': f'Cannot update booking with status: {booking.status}'
@@ -1021,21 +1530,22 @@ def update_booking(request, booking_id):
         # Validate the update data
         serializer = CreateBookingSerializer(data=request.data, partial=True)
         if not serializer.is_valid():
-            print(f"DEBUG: Serializer errors: {serializer.errors}")
+            booking_logger.info(
+                "Update of booking %s rejected: invalid fields %s", booking_id, sorted(serializer.errors)
+            )
             return Response({
                 'success': False,
                 'error': serializer.errors
             }, status=status.HTTP_400_BAD_REQUEST)
         
         data = serializer.validated_data
-        print(f"DEBUG: Validated data: {data}")
         
         # Start transaction for the update
+        booking_details = []
         with transaction.atomic():
             # Update booking contact info if provided
             if 'contact_info' in data:
                 contact_info = data['contact_info']
-                print(f"DEBUG: Updating contact info: {contact_info}")
                 
                 # Create or update booking contact
                 try:
@@ -1047,7 +1557,6 @@ def update_booking(request, booking_id):
                     booking_contact.title = contact_info.get('title', booking_contact.title)
                     booking_contact.middle_name = contact_info.get('middleName', booking_contact.middle_name)
                     booking_contact.save()
-                    print(f"DEBUG: Updated booking contact")
                 except BookingContact.DoesNotExist:
                     # Create new contact
                     booking_contact = BookingContact.objects.create(
@@ -1059,87 +1568,64 @@ def update_booking(request, booking_id):
                         title=contact_info.get('title', 'MR'),
                         middle_name=contact_info.get('middleName', '')
                     )
-                    print(f"DEBUG: Created new booking contact")
             
             # Update passengers if provided
             if 'passengers' in data:
                 passengers_data = data['passengers']
-                print(f"DEBUG: Updating {len(passengers_data)} passengers")
+                
+                # Fares verified when the booking was created (or new quotes)
+                fares, class_fares = _verified_fares(data, booking.trip_type, booking=booking)
                 
                 # For simplicity, we'll delete existing passengers and create new ones
-                # First, delete existing booking details
+                # Release seats held by the old booking details first
+                # (Seat.save() updates SeatInventory in this transaction)
+                old_seat_ids = BookingDetail.objects.filter(
+                    booking=booking, seat__isnull=False
+                ).values_list('seat_id', flat=True)
+                for seat in Seat.objects.select_for_update().filter(id__in=list(old_seat_ids), is_available=False):
+                    seat.is_available = True
+                    seat.save()
+                SeatHold.objects.filter(booking=booking).delete()
+                
+                # Then delete existing booking details
                 deleted_details_count, _ = BookingDetail.objects.filter(booking=booking).delete()
-                print(f"DEBUG: Deleted {deleted_details_count} old booking details")
                 
                 # Delete existing passengers linked to this booking
                 passenger_ids = BookingDetail.objects.filter(booking=booking).values_list('passenger_id', flat=True)
                 PassengerInfo.objects.filter(id__in=passenger_ids).delete()
-                print(f"DEBUG: Deleted old passengers")
-                
-                # Create new passengers
-                new_passengers = _create_passengers(passengers_data)
-                print(f"DEBUG: Created {len(new_passengers)} new passengers")
                 
-                # Create new booking details
-                booking_details = []
+                # Taxes are recomputed for the new booking details
+                BookingTax.objects.filter(booking=booking).delete()
                 
-                for i, passenger in enumerate(new_passengers):
-                    print(f"DEBUG: Creating booking details for passenger {i+1}")
-                    
-                    # Get passenger data
-                    passenger_data = passengers_data[i] if i < len(passengers_data) else {}
-                    
-                    # Create DEPART flight booking detail
-                    depart_detail = _create_booking_detail(
-                        booking, passenger, data, passenger_data, is_return=False
-                    )
-                    if depart_detail:
-                        booking_details.append(depart_detail)
-                        print(f"DEBUG: Created depart booking detail: {depart_detail.id}")
-                    
-                    # Create RETURN flight booking detail for round trips
-                    if booking.trip_type == 'round_trip':
-                        return_detail = _create_booking_detail(
-                            booking, passenger, data, passenger_data, is_return=True
-                        )
-                        if return_detail:
-                            booking_details.append(return_detail)
-                            print(f"DEBUG: Created return booking detail: {return_detail.id}")
+                # Create new passengers and booking details (bulk)
+                new_passengers, booking_details, booking_taxes = booking_assembly.assemble(
+                    booking, data, passengers_data, trip_type=booking.trip_type,
+                    fares=fares, class_fares=class_fares
+                )
                 
-                print(f"DEBUG: Created {len(booking_details)} new booking details")
+                # Seat passengers who did not pick a seat (party kept together)
+                seated = seat_assignment.assign(booking, booking_details)
+                booking_logger.debug("Auto-assigned seats to %s booking details", seated)
             
             # Update flight selections if provided
             if 'selectedOutbound' in data:
                 # Update would require more complex logic to change schedules
                 # For now, we'll log it but not change the actual schedule
-                print(f"DEBUG: Update requested for outbound flight: {data['selectedOutbound']}")
-                print(f"NOTE: Flight schedule changes not implemented in update")
+                booking_logger.debug("Booking %s: outbound flight changes are not applied", booking.id)
             
             if 'selectedReturn' in data and booking.trip_type == 'round_trip':
-                print(f"DEBUG: Update requested for return flight: {data['selectedReturn']}")
-                print(f"NOTE: Flight schedule changes not implemented in update")
+                booking_logger.debug("Booking %s: return flight changes are not applied", booking.id)
             
             # Update add-ons if provided
             if 'addons' in data or 'return_addons' in data:
-                print(f"DEBUG: Update requested for add-ons")
-                print(f"NOTE: Add-on updates would require more complex logic")
-            
-            # Update total amount if provided
-            if 'total_amount' in data:
-                new_total = data['total_amount']
-                booking.total_amount = new_total
-                print(f"DEBUG: Updated total amount to: {new_total}")
+                booking_logger.debug("Booking %s: add-on changes are not applied", booking.id)
             
-            # Save booking
-            booking.save()
-            
-            # Recalculate taxes
+            # Recalculate totals (taxes were recomputed with the new booking details);
+            # a total sent by the client is only compared, never stored
             if booking_details:
-                print(f"DEBUG: Recalculating taxes for {len(booking_details)} booking details")
-                _apply_taxes(booking, booking_details)
-                _update_booking_totals(booking)
-            
-            print(f"DEBUG: Booking update successful!")
+                booking_assembly.totals(booking, booking_details, booking_taxes)
+            _check_client_total(booking, data.get('total_amount'))
+            booking_logger.info("Booking %s updated", booking.id)
             
             return Response({
                 'success': True,
@@ -1150,11 +1636,14 @@ def update_booking(request, booking_id):
                 'message': 'Booking updated successfully'
             }, status=status.HTTP_200_OK)
             
+    except PriceQuoteError as e:
+        return Response({
+            'success': False,
+            'error': str(e),
+            'code': 'price_quote'
+        }, status=status.HTTP_409_CONFLICT)
     except Exception as e:
-        import traceback
-        print("=== ERROR TRACEBACK ===")
-        traceback.print_exc()
-        print("======================")
+        booking_logger.exception("Update of booking %s failed: %s", booking_id, e)
         return Response({
             'success': False,
             'error': str(e)
@@ -1172,10 +1661,9 @@ def _create_booking_contact(booking, contact_info):
             title=contact_info.get('title', 'MR'),
             middle_name=contact_info.get('middleName', '')
         )
-        print(f"✅ Booking contact created: {contact.id}")
         return contact
     except Exception as e:
-        print(f"❌ Error creating booking contact: {str(e)}")
+        booking_logger.warning("Could not create contact for booking %s: %s", booking.id, e)
         return None
 
 def _get_or_create_user(data):
@@ -1186,12 +1674,9 @@ def _get_or_create_user(data):
     email = contact_info.get('email', 'guest@example.com')
     
     if not email:
-        print("❌ ERROR: No email provided in contact info")
+        booking_logger.warning("No email in contact info, booking as guest")
         email = 'guest@example.com'
     
-    print(f"DEBUG: Creating user with email: {email}")
-    print(f"DEBUG: Contact info for user: {contact_info}")
-    
     # Create a unique username based on email and timestamp
     username_base = email.split('@')[0] if '@' in email else 'guest'
     username = f"{username_base}_{int(timezone.now().timestamp())}"
@@ -1212,17 +1697,12 @@ def _get_or_create_user(data):
             }
         )
         
-        if created:
-            print(f"✅ Created new user: {user.id} - {user.email}")
-            print(f"   First name: {user.first_name}")
-            print(f"   Last name: {user.last_name}")
-        else:
-            print(f"✅ Found existing user: {user.id} - {user.email}")
-            
+        booking_logger.debug("%s user %s for booking", 'Created' if created else 'Found', user.id)
+        
         return user
         
     except Exception as e:
-        print(f"❌ Error creating user: {str(e)}")
+        booking_logger.warning("Could not create booking user, using a guest user: %s", e)
         # Fallback to a default guest user
         fallback_user, _ = User.objects.get_or_create(
             username=f'guest_{int(timezone.now().timestamp())}',
@@ -1235,446 +1715,75 @@ def _get_or_create_user(data):
         )
         return fallback_user
 
-def _create_booking(data, user):
-    """Create main booking record"""
-    trip_type = data.get('trip_type', 'one_way')
-    is_round_trip = trip_type == 'round_trip'
-    
-    # Calculate total amount from frontend data
-    total_amount = Decimal(str(data.get('total_amount', 0)))
-    print(f"DEBUG: Creating booking with total amount from frontend: {total_amount}")
-    
-    # Create and save the booking immediately
-    booking = Booking.objects.create(
-        user=user,
-        trip_type=trip_type,
-        status='Pending',
-        base_fare_total=Decimal('0.00'),
-        insurance_total=Decimal('0.00'),
-        tax_total=Decimal('0.00'),
-        total_amount=total_amount  # Store the total amount from frontend
-    )
-    
-    print(f"DEBUG: Booking created. ID: {booking.id}, Total: {total_amount}")
-    
-    return booking
+def _check_client_total(booking, client_total):
+    """Log a client-side total that differs from the server total (which is what is charged)"""
+    if client_total is not None and Decimal(str(client_total)) != booking.total_amount:
+        booking_logger.info(
+            "Client total %s differs from server total %s for booking %s",
+            client_total, booking.total_amount, booking.id
+        )
 
-def _create_passengers(passengers_data):
-    """Create passenger records"""
-    passengers = []
-    print(f"DEBUG: Creating {len(passengers_data)} passengers")
-    
-    for i, pax_data in enumerate(passengers_data):
-        try:
-            print(f"  Passenger {i+1} full data: {pax_data}")
-            
-            # Use the validated data from serializer
-            # The serializer has already normalized the field names
-            first_name = pax_data.get('first_name', '')
-            last_name = pax_data.get('last_name', '')
-            middle_name = pax_data.get('middle_name', '')
-            title = pax_data.get('title', 'MR')
-            date_of_birth = pax_data.get('date_of_birth', '')
-            nationality = pax_data.get('nationality', 'Philippines')
-            passport_number = pax_data.get('passport_number', '')
-            passenger_type = pax_data.get('type', 'Adult')
-            
-            print(f"    First Name: {first_name}")
-            print(f"    Last Name: {last_name}")
-            print(f"    Middle Name: {middle_name}")
-            print(f"    Type: {passenger_type}")
-            print(f"    Date of Birth: {date_of_birth}")
-            
-            # Parse date of birth
-            dob_parsed = None
-            if date_of_birth:
-                try:
-                    # Remove timezone if present
-                    clean_dob = str(date_of_birth).split('T')[0]
-                    dob_parsed = datetime.strptime(clean_dob, '%Y-%m-%d').date()
-                    print(f"    Date of birth parsed: {dob_parsed}")
-                except Exception as e:
-                    print(f"    ERROR parsing date of birth: {e}")
-                    # Try alternative format
-                    try:
-                        dob_parsed = datetime.strptime(str(date_of_birth), '%Y-%m-%d').date()
-                        print(f"    Date of birth parsed (alternative): {dob_parsed}")
-                    except:
-                        print(f"    Could not parse date, using None")
-                        dob_parsed = None
-            
-            print(f"    Creating PassengerInfo...")
-            
-            # Create passenger with validated data
-            passenger = PassengerInfo.objects.create(
-                first_name=first_name,
-                last_name=last_name,
-                middle_name=middle_name,
-                title=title,
-                date_of_birth=dob_parsed,
-                nationality=nationality,
-                passport_number=passport_number,
-                passenger_type=passenger_type
-            )
-            
-            print(f"    Passenger created with ID: {passenger.id}")
-            print(f"    Passenger full name: {passenger.get_full_name()}")
-            passengers.append(passenger)
-            
-        except Exception as e:
-            print(f"    ERROR creating passenger: {e}")
-            import traceback
-            traceback.print_exc()
-            # Don't continue, raise the error
-            raise Exception(f"Failed to create passenger {i+1}: {str(e)}")
+def _booked_fares(booking):
+    """
+    {schedule id (str): {seat class key: fare}} of a booking's details, seat
+    surcharges removed: the fares verified when the booking was created.
+    """
+    fares = {}
+    for detail in BookingDetail.objects.filter(booking=booking).select_related('seat', 'seat_class'):
+        fare = detail.price
+        if detail.seat is not None:
+            fare -= detail.seat.price_adjustment or Decimal('0.00')
+        class_key = price_quotes.class_key(detail.seat_class.name if detail.seat_class else '')
+        fares.setdefault(str(detail.schedule_id), {}).setdefault(class_key, fare)
+    return fares
+
+def _verified_fares(data, trip_type, booking=None):
+    """
+    Verified fares of the selected flights for booking_assembly.assemble():
+    (fares, class_fares), both keyed by 'depart'/'return'. They come from
+    the search price quotes; when updating a booking, flights and classes it
+    already has keep the fares verified at creation (their quotes are used up).
+    """
+    legs = [('depart', data.get('selectedOutbound') or {})]
+    if trip_type == 'round_trip':
+        legs.append(('return', data.get('selectedReturn') or {}))
     
-    print(f"DEBUG: Created {len(passengers)} passengers successfully")
-    return passengers
-
-def _create_booking_detail(booking, passenger, data, passenger_data=None, is_return=False):
-    """Create booking detail for each passenger - UPDATED for round trips"""
-    try:
-        print(f"DEBUG: In _create_booking_detail - is_return: {is_return}")
-        
-        # Determine which flight to use
-        if is_return:
-            selected_flight = data.get('selectedReturn', {})
-            flight_label = "Return"
-        else:
-            selected_flight = data.get('selectedOutbound', {})
-            flight_label = "Depart"
-        
-        print(f"  {flight_label} flight data: {selected_flight}")
-        
-        # Get schedule ID
+    booked = _booked_fares(booking) if booking is not None else {}
+    fares = {}
+    class_fares = {}
+    for leg, selected_flight in legs:
         schedule_id = selected_flight.get('schedule_id') or selected_flight.get('id')
-        
-        if not schedule_id:
-            print(f"  ERROR: No schedule ID found for {flight_label.lower()} flight")
-            return None
-        
-        print(f"  {flight_label} Schedule ID: {schedule_id}")
-        
-        # Get schedule
-        try:
-            schedule = Schedule.objects.select_related(
-                'flight__airline',
-                'flight__route',
-                'flight__aircraft'
-            ).get(id=schedule_id)
-            print(f"  {flight_label} schedule found: {schedule.id} - {schedule.flight.flight_number}")
-            print(f"  {flight_label} schedule price: {schedule.price}")
-        except Schedule.DoesNotExist:
-            print(f"  ERROR: {flight_label} schedule with ID {schedule_id} not found")
-            return None
-        
-        # Get seat if selected (seats usually apply to all flights, not segmented)
-        seat = None
-        seat_class = None
-        addons_data = data.get('addons', {})
-        
-        # Use the passenger key from passenger_data
-        passenger_key = None
-        if passenger_data and passenger_data.get('key'):
-            passenger_key = passenger_data.get('key')
+        previous = booked.get(str(schedule_id), {})
+        fare = previous.get(price_quotes.class_key(selected_flight.get('class_type')))
+        if fare is not None:
+            fares[leg], class_fares[leg] = fare, previous
         else:
-            passenger_key = f"{passenger.first_name}_{passenger.last_name}"
-        
-        print(f"  Passenger key for addons: {passenger_key}")
-        
-        # Find seat for this passenger (seats are not segmented)
-        if passenger_key in addons_data.get('seats', {}):
-            seat_data = addons_data['seats'][passenger_key]
-            print(f"  Seat data for this passenger: {seat_data}")
-            
-            try:
-                if isinstance(seat_data, int):
-                    seat = Seat.objects.select_related('seat_class').get(id=seat_data)
-                elif isinstance(seat_data, dict) and seat_data.get('id'):
-                    seat = Seat.objects.select_related('seat_class').get(id=seat_data['id'])
-                
-                if seat:
-                    # Only mark seat as unavailable for the FIRST booking detail (depart flight)
-                    if not is_return:  # Only mark seat unavailable once
-                        seat.is_available = False
-                        seat.save()
-                    seat_class = seat.seat_class
-                    print(f"  Seat assigned: {seat.seat_number}")
-                    
-            except Seat.DoesNotExist:
-                print(f"  WARNING: Seat not found")
-        
-        # If no seat selected, get default seat class
-        if not seat_class:
-            fare_type = selected_flight.get('class_type', 'Economy')
-            seat_class = SeatClass.objects.filter(
-                airline=schedule.flight.airline,
-                name__icontains=fare_type
-            ).first()
-        
-        # Calculate base price
-        base_price = Decimal(str(selected_flight.get('price', 0)))
-        print(f"  {flight_label} base price: {base_price}")
-        
-        # Create booking detail
-        print(f"  Creating BookingDetail for {flight_label.lower()} flight...")
-        try:
-            booking_detail = BookingDetail.objects.create(
-                booking=booking,
-                passenger=passenger,
-                schedule=schedule,
-                seat=seat if not is_return else None,  # Only assign seat to depart flight
-                seat_class=seat_class,
-                price=base_price,
-                passenger_type=passenger.passenger_type,
-                status='pending'
-            )
-            print(f"  {flight_label} BookingDetail created with ID: {booking_detail.id}")
-        except Exception as e:
-            print(f"  ERROR creating {flight_label} BookingDetail: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
-        
-        # Add add-ons - pass is_return flag
-        print(f"  Adding {flight_label.lower()} flight addons...")
-        _add_addons_to_booking_detail(booking_detail, addons_data, passenger_data or {}, is_return)
-        
-        return booking_detail
-        
-    except Exception as e:
-        print(f"ERROR in _create_booking_detail: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return None
+            fares[leg], class_fares[leg] = _redeem_price_quote(selected_flight)
+    return fares, class_fares
 
-# In flightapp/views.py, update the _add_addons_to_booking_detail function:
-def _add_addons_to_booking_detail(booking_detail, addons_data, passenger_data, is_return=False):
-    """Add selected add-ons to booking detail with segment support"""
-    addons_to_link = []
-    
-    # Get airline from schedule
-    airline = booking_detail.schedule.flight.airline if booking_detail.schedule else None
-    
-    # Get passenger key from passenger data
-    passenger_key = passenger_data.get('key', f"{booking_detail.passenger.first_name}_{booking_detail.passenger.last_name}")
-    
-    print(f"DEBUG: Looking for addons for passenger key: {passenger_key}")
-    print(f"DEBUG: Is return flight: {is_return}")
+def _redeem_price_quote(selected_flight):
+    """
+    Verified per-passenger fare of a selected flight from its search price
+    quote, with the quoted fare of every seat class: (fare, {class key: fare}).
+    Without a quote the client price is used, unless PRICE_QUOTE_REQUIRED.
+    """
+    token = selected_flight.get('price_quote')
+    schedule_id = selected_flight.get('schedule_id') or selected_flight.get('id')
     
-    # Determine which addons to use (depart or return)
-    addon_source = addons_data
-    if is_return and 'return_addons' in addons_data:
-        addon_source = addons_data.get('return_addons', {})
+    if not token:
+        if getattr(settings, 'PRICE_QUOTE_REQUIRED', True):
+            raise PriceQuoteError('A price quote is required, please search again')
+        return None, {}
     
-    # Baggage add-on
-    baggage_data = addon_source.get('baggage', {}).get(passenger_key)
-    if baggage_data:
-        if isinstance(baggage_data, dict) and baggage_data.get('id'):
-            try:
-                baggage_option = BaggageOption.objects.get(id=baggage_data['id'])
-                # Create add-on for baggage
-                addon, created = AddOn.objects.get_or_create(
-                    baggage_option=baggage_option,
-                    defaults={
-                        'name': f"Extra Baggage {baggage_option.formatted_weight}",
-                        'price': baggage_option.price,
-                        'airline': airline,
-                        'segment': 'return' if is_return else 'depart'  # NEW: Add segment
-                    }
-                )
-                addons_to_link.append(addon)
-                print(f"DEBUG: Added baggage addon ({'return' if is_return else 'depart'}): {baggage_option.name}")
-            except BaggageOption.DoesNotExist:
-                print(f"DEBUG: Baggage option with ID {baggage_data['id']} not found")
-        elif isinstance(baggage_data, int):
-            try:
-                baggage_option = BaggageOption.objects.get(id=baggage_data)
-                addon, created = AddOn.objects.get_or_create(
-                    baggage_option=baggage_option,
-                    defaults={
-                        'name': f"Extra Baggage {baggage_option.formatted_weight}",
-                        'price': baggage_option.price,
-                        'airline': airline,
-                        'segment': 'return' if is_return else 'depart'
-                    }
-                )
-                addons_to_link.append(addon)
-                print(f"DEBUG: Added baggage addon ({'return' if is_return else 'depart'}): {baggage_option.name}")
-            except BaggageOption.DoesNotExist:
-                print(f"DEBUG: Baggage option with ID {baggage_data} not found")
+    fare, class_fares = price_quotes.redeem_fares(token, schedule_id, selected_flight.get('class_type'))
     
-    # Meal add-on
-    meal_data = addon_source.get('meals', {}).get(passenger_key)
-    if meal_data:
-        if isinstance(meal_data, dict) and meal_data.get('id'):
-            try:
-                meal_option = MealOption.objects.get(id=meal_data['id'])
-                addon, created = AddOn.objects.get_or_create(
-                    meal_option=meal_option,
-                    defaults={
-                        'name': f"Meal: {meal_option.name}",
-                        'price': meal_option.price,
-                        'airline': airline,
-                        'segment': 'return' if is_return else 'depart'
-                    }
-                )
-                addons_to_link.append(addon)
-                print(f"DEBUG: Added meal addon ({'return' if is_return else 'depart'}): {meal_option.name}")
-            except MealOption.DoesNotExist:
-                print(f"DEBUG: Meal option with ID {meal_data['id']} not found")
-        elif isinstance(meal_data, int):
-            try:
-                meal_option = MealOption.objects.get(id=meal_data)
-                addon, created = AddOn.objects.get_or_create(
-                    meal_option=meal_option,
-                    defaults={
-                        'name': f"Meal: {meal_option.name}",
-                        'price': meal_option.price,
-                        'airline': airline,
-                        'segment': 'return' if is_return else 'depart'
-                    }
-                )
-                addons_to_link.append(addon)
-                print(f"DEBUG: Added meal addon ({'return' if is_return else 'depart'}): {meal_option.name}")
-            except MealOption.DoesNotExist:
-                print(f"DEBUG: Meal option with ID {meal_data} not found")
-    
-    # Assistance service
-    service_id = addon_source.get('wheelchair', {}).get(passenger_key)
-    if service_id:
-        try:
-            assistance_service = AssistanceService.objects.get(id=service_id)
-            addon, created = AddOn.objects.get_or_create(
-                assistance_service=assistance_service,
-                defaults={
-                    'name': f"Assistance: {assistance_service.name}",
-                    'price': assistance_service.price,
-                    'airline': airline,
-                    'included': assistance_service.is_included,
-                    'segment': 'return' if is_return else 'depart'
-                }
-            )
-            addons_to_link.append(addon)
-            print(f"DEBUG: Added assistance addon ({'return' if is_return else 'depart'}): {assistance_service.name}")
-        except AssistanceService.DoesNotExist:
-            print(f"DEBUG: Assistance service with ID {service_id} not found")
-    
-    # Link addons to booking detail
-    if addons_to_link:
-        booking_detail.addons.add(*addons_to_link)
-        print(f"DEBUG: Linked {len(addons_to_link)} addons to booking detail {booking_detail.id} for {'return' if is_return else 'depart'} flight")
-
-def _apply_taxes(booking, booking_details):
-    """Calculate and apply taxes to booking"""
-    for detail in booking_details:
-        if not detail.schedule:
-            continue
-            
-        # Get applicable taxes based on route and passenger type
-        route = detail.schedule.flight.route
-        passenger_type = detail.passenger_type.lower() if detail.passenger_type else 'adult'
-        
-        # Find applicable taxes
-        applicable_taxes = TaxType.objects.filter(
-            is_active=True,
-            applies_domestic=route.is_domestic,
-            applies_international=route.is_international
+    client_price = selected_flight.get('price')
+    if client_price is not None and Decimal(str(client_price)) != fare:
+        booking_logger.warning(
+            "Client price %s differs from quoted fare %s for schedule %s",
+            client_price, fare, schedule_id
         )
-        
-        for tax in applicable_taxes:
-            try:
-                # Check if passenger type is applicable
-                if tax.adult_only and passenger_type != 'adult':
-                    continue
-                    
-                # Check passenger type rate
-                try:
-                    rate = PassengerTypeTaxRate.objects.get(
-                        tax_type=tax,
-                        passenger_type=passenger_type
-                    )
-                    amount = rate.amount
-                except PassengerTypeTaxRate.DoesNotExist:
-                    amount = tax.base_amount
-                
-                # Apply per passenger or per booking
-                if tax.per_passenger:
-                    # Create booking tax record
-                    BookingTax.objects.create(
-                        booking=booking,
-                        tax_type=tax,
-                        amount=amount,
-                        passenger_type=passenger_type
-                    )
-                    
-                    # Add to booking detail tax amount
-                    detail.tax_amount += amount
-                    detail.save()
-                
-            except Exception as e:
-                print(f"Error applying tax {tax.name}: {e}")
-                continue
-
-def _update_booking_totals(booking):
-    """Update booking totals after all details are created and verify against stored total"""
-    try:
-        print(f"DEBUG: In _update_booking_totals for booking {booking.id}")
-        
-        # Wait a moment to ensure all details are saved
-        import time
-        time.sleep(0.1)  # Small delay
-        
-        # Refresh booking from database
-        booking.refresh_from_db()
-        
-        # Recalculate totals - use direct query instead of reverse relationship
-        from django.db.models import Sum
-        
-        # Calculate base fare total
-        base_fare_total = BookingDetail.objects.filter(
-            booking=booking
-        ).aggregate(total=Sum('price'))['total'] or Decimal('0.00')
-        
-        print(f"  Base fare total: {base_fare_total}")
-        
-        # Calculate insurance total (if you have insurance logic)
-        insurance_total = Decimal('0.00')
-        # Add your insurance calculation here
-        
-        # Calculate tax total
-        tax_total = BookingTax.objects.filter(
-            booking=booking
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-        
-        print(f"  Tax total: {tax_total}")
-        
-        # Calculate the total from components
-        calculated_total = base_fare_total + insurance_total + tax_total
-        
-        # Verify the stored total matches the calculated total
-        stored_total = booking.total_amount
-        print(f"  Stored total: {stored_total}")
-        print(f"  Calculated total: {calculated_total}")
-        
-        # If there's a discrepancy, log it but use the stored total (from frontend)
-        if calculated_total != stored_total:
-            print(f"  ⚠️ WARNING: Total mismatch! Stored: {stored_total}, Calculated: {calculated_total}")
-            print(f"  ⚠️ Using stored total from frontend: {stored_total}")
-        
-        # Update booking with calculated totals
-        booking.base_fare_total = base_fare_total
-        booking.insurance_total = insurance_total
-        booking.tax_total = tax_total
-        booking.save()
-        
-        print(f"  Booking totals updated successfully")
-        
-    except Exception as e:
-        print(f"ERROR in _update_booking_totals: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise
+    return fare, class_fares
 
 
 @api_view(['POST'])
@@ -2787,26 +2896,28 @@ def get_seat_class_features(request):
     """
     API endpoint to get seat class features from database
     """
-    try:
-        # Get all seat classes
-        seat_classes = SeatClass.objects.all()
-        
+    def build():
+        # All features in one query, grouped by class in display order
+        class_features = {}
+        rows = SeatClassFeature.objects.order_by(
+            'seat_class_id', 'display_order'
+        ).values_list('seat_class_id', 'seat_class__name', 'feature')
+        for seat_class_id, class_name, feature in rows:
+            class_features.setdefault((seat_class_id, class_name), []).append(feature)
+
+        # Only classes with features are listed; a later class of the same name wins
         features_data = {}
-        for seat_class in seat_classes:
-            # Get features for this seat class
-            class_features = SeatClassFeature.objects.filter(
-                seat_class=seat_class
-            ).order_by('display_order').values_list('feature', flat=True)
-            
-            if class_features.exists():
-                features_data[seat_class.name.lower().replace(' ', '_')] = list(class_features)
-            # Don't add empty arrays - only add if features exist
-        
-        return Response({
+        for (_, class_name), features in class_features.items():
+            features_data[class_name.lower().replace(' ', '_')] = features
+
+        return {
             'success': True,
             'data': features_data
-        })
-        
+        }
+
+    try:
+        return reference_data.respond(request, 'seat_class_features', build)
+
     except Exception as e:
         print(f"Error loading seat class features: {str(e)}")
         # Return empty data instead of error
@@ -2845,6 +2956,8 @@ def cancel_booking(request, booking_id):
         booking = Booking.objects.get(id=booking_id)
         booking.status = 'cancelled'
         booking.save()
+        # Seats held for payment go back on sale right away
+        seat_hold_sweeper.release_booking(booking)
         return Response({
             'success': True,
             'message': 'Booking cancelled successfully'
@@ -2931,7 +3044,7 @@ def get_seats_with_schedule_info(request, schedule_id):
             'airline': schedule.flight.airline.code if schedule.flight and schedule.flight.airline else '',
             'seats': seat_data,
             'total_seats': len(seat_data),
-            'available_seats': seats.filter(is_available=True).count()
+            'available_seats': sum(1 for seat in seat_data if seat['is_available'])
         })
         
     except Schedule.DoesNotExist:
@@ -3097,7 +3210,12 @@ def process_payment_webhook(payment_id, payment_attrs, booking_id):
             updated_details = booking.details.all().update(status='confirmed')
             print(f"✅ Updated {updated_details} booking details")
             
-            # Mark seats as unavailable
+            # Held seats become firm assignments
+            confirmed_holds = SeatHold.confirm(booking)
+            print(f"✅ Confirmed {confirmed_holds} seat holds")
+            
+            # Mark seats as unavailable (seats whose hold expired and were
+            # released are no longer on the booking details)
             seat_count = 0
             for detail in booking.details.all():
                 if detail.seat:
@@ -3219,7 +3337,7 @@ def get_seats_with_schedule_info(request, schedule_id):
             'airline_name': schedule.flight.airline.name if schedule.flight and schedule.flight.airline else '',
             'seats': seat_data,
             'total_seats': len(seat_data),
-            'available_seats': seats.filter(is_available=True).count()
+            'available_seats': sum(1 for seat in seat_data if seat['is_available'])
         })
         
     except Schedule.DoesNotExist:
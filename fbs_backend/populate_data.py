@@ -2,7 +2,7 @@
 import os
 import sys
 import django
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 import random
 
@@ -15,6 +15,7 @@ from django.contrib.auth.models import User
 from app.models import (
     Country, Airline, SeatClass, Aircraft, Airport, Route, Flight, 
     Schedule, Seat, SeatClassFeature, PassengerInfo,
+    SeatLayout, SeatLayoutZone, SeatInventory,
     AddOnType, AddOn, MealCategory, MealOption, AssistanceService,
     BaggageOption, TaxType, AirlineTax, AirportFee, PassengerTypeTaxRate,
     InsuranceProvider, InsuranceCoverageType, InsuranceBenefit,
@@ -22,6 +23,7 @@ from app.models import (
     Booking, BookingContact, BookingDetail, Payment,
     CheckInDetail, TrackLog
 )
+from flightapp.services.timetable import timetable, TimetablePattern
 
 def create_countries():
     """Create sample countries"""
@@ -239,9 +241,8 @@ def create_flights(airlines, aircrafts, routes):
     return flights
 
 def create_schedules(flights):
-    """Create flight schedules for the next 30 days"""
-    schedules = []
-    today = timezone.now()
+    """Create weekly flight schedules for the next 30 days (bulk, via the timetable generator)"""
+    today = timezone.localdate()
     
     schedule_configs = [
         {'flight_number': 'PR123', 'days_from_now': 2, 'hour': 8, 'minute': 0, 'duration_hours': 1.5},
@@ -255,107 +256,70 @@ def create_schedules(flights):
         {'flight_number': 'QR456', 'days_from_now': 9, 'hour': 9, 'minute': 15, 'duration_hours': 4},
     ]
     
+    patterns = []
     for config in schedule_configs:
-        flight = flights[config['flight_number']]
+        first_day = today + timedelta(days=config['days_from_now'])
         
-        # Create multiple schedules for the same flight
-        for day_offset in range(0, 30, 7):  # Every week for a month
-            departure_time = today + timedelta(days=config['days_from_now'] + day_offset, hours=config['hour'], minutes=config['minute'])
-            arrival_time = departure_time + timedelta(hours=config['duration_hours'])
-            
-            schedule, created = Schedule.objects.get_or_create(
-                flight=flight,
-                departure_time=departure_time,
-                defaults={
-                    'arrival_time': arrival_time,
-                    'price': flight.route.base_price,
-                    'status': 'Open'
-                }
-            )
-            
-            if created:
-                schedules.append(schedule)
-                print(f"Created schedule: {schedule.flight.flight_number} on {departure_time.date()}")
+        # Every week for a month
+        patterns.append(TimetablePattern(
+            flight=flights[config['flight_number']],
+            weekdays=[first_day.weekday()],
+            departure_times=[time(config['hour'], config['minute'])],
+            start_date=first_day,
+            end_date=first_day + timedelta(days=28),
+            duration=timedelta(hours=config['duration_hours']),
+        ))
+    
+    result = timetable.generate(patterns)
+    print(f"Created {result['created']} schedules with {result['seats']} seats")
     
-    return schedules
+    return result['schedules']
 
-def create_seats_for_all_schedules(schedules, seat_classes):
-    """Create seats for all schedules based on aircraft configuration"""
-    for schedule in schedules:
-        aircraft = schedule.flight.aircraft
-        airline = schedule.flight.airline
-        
-        # Get seat classes for this airline
-        airline_seat_classes = seat_classes.get(airline.code, [])
-        if not airline_seat_classes:
-            # Get seat classes for this airline code
-            airline_seat_classes = SeatClass.objects.filter(airline=airline)
-            if not airline_seat_classes.exists():
-                airline_seat_classes = SeatClass.objects.filter(airline__isnull=True)
-        
-        # Create seats based on aircraft capacity
-        # For simplicity, we'll create a basic seat map
-        seats_created = 0
-        total_capacity = aircraft.capacity
+def create_seat_layouts(aircrafts):
+    """Create seat layout templates (seats of new schedules are built from them)"""
+    for aircraft in aircrafts.values():
+        seat_classes = list(SeatClass.objects.filter(airline=aircraft.airline).order_by('-price_multiplier'))
+        if not seat_classes:
+            continue
         
-        # Simple seat configuration: A-F columns, rows based on capacity
-        columns = ['A', 'B', 'C', 'D', 'E', 'F']
-        rows_needed = (total_capacity // len(columns)) + 1
+        layout, created = SeatLayout.objects.get_or_create(
+            aircraft=aircraft,
+            defaults={
+                'columns': 'ABC-DEF',
+                'exit_rows': '11,26',      # Common exit rows
+                'bulkhead_rows': '1,5,10',
+                'extra_legroom_rows': '5-9',  # Comfort rows
+            }
+        )
+        if not created:
+            continue
         
-        current_row = 1
-        seat_class_index = 0
-        seat_classes_list = list(airline_seat_classes)
+        # Business/Front rows 1-4, Premium/Comfort rows 5-8, Economy the rest
+        rows = -(-aircraft.capacity // 6)
+        if len(seat_classes) >= 3:
+            zones = [(seat_classes[0], 1, 4), (seat_classes[1], 5, 8), (seat_classes[-1], 9, rows)]
+        elif len(seat_classes) == 2:
+            zones = [(seat_classes[0], 1, 8), (seat_classes[-1], 9, rows)]
+        else:
+            zones = [(seat_classes[0], 1, rows)]
         
-        for row in range(1, rows_needed + 1):
-            for col in columns:
-                if seats_created >= total_capacity:
-                    break
-                
-                # Assign seat class based on row (simulating different classes)
-                if row <= 4 and len(seat_classes_list) >= 3:
-                    seat_class = seat_classes_list[0]  # Business/Front
-                elif row <= 8 and len(seat_classes_list) >= 2:
-                    seat_class = seat_classes_list[1]  # Premium/Comfort
-                else:
-                    seat_class = seat_classes_list[-1]  # Economy
-                
-                # Determine seat features
-                is_window = col in ['A', 'F']
-                is_aisle = col in ['C', 'D']
-                is_exit_row = row in [11, 26]  # Common exit rows
-                is_bulkhead = row in [1, 5, 10]
-                has_extra_legroom = row in range(5, 10)  # Comfort rows
-                
-                # Price adjustment for premium features
-                price_adjustment = Decimal('0.00')
-                if has_extra_legroom:
-                    price_adjustment += Decimal('500.00')
-                if is_exit_row:
-                    price_adjustment += Decimal('800.00')
-                if is_bulkhead:
-                    price_adjustment += Decimal('300.00')
-                
-                seat, created = Seat.objects.get_or_create(
-                    schedule=schedule,
-                    seat_class=seat_class,
-                    row=row,
-                    column=col,
-                    defaults={
-                        'seat_number': f"{row}{col}",
-                        'is_available': random.choice([True, True, True, False]),  # 75% available
-                        'has_extra_legroom': has_extra_legroom,
-                        'is_exit_row': is_exit_row,
-                        'is_bulkhead': is_bulkhead,
-                        'is_window': is_window,
-                        'is_aisle': is_aisle,
-                        'price_adjustment': price_adjustment
-                    }
-                )
-                
-                if created:
-                    seats_created += 1
-        
-        print(f"Created {seats_created} seats for {schedule.flight.flight_number} on {schedule.departure_time.date()}")
+        SeatLayoutZone.objects.bulk_create([
+            SeatLayoutZone(layout=layout, seat_class=seat_class, first_row=first_row, last_row=last_row)
+            for seat_class, first_row, last_row in zones
+        ])
+        print(f"Created seat layout: {aircraft} ({rows} rows)")
+
+def create_seats_for_all_schedules(schedules, seat_classes):
+    """Seats come from the aircraft seat layouts; mark some of them as taken"""
+    schedule_ids = [schedule.id for schedule in schedules]
+    seat_ids = list(Seat.objects.filter(schedule_id__in=schedule_ids).values_list('id', flat=True))
+    
+    # 25% taken
+    taken = [seat_id for seat_id in seat_ids if random.random() < 0.25]
+    Seat.objects.filter(id__in=taken).update(is_available=False)
+    SeatInventory.rebuild(schedule_ids)
+    
+    print(f"Marked {len(taken)} of {len(seat_ids)} seats as taken for {len(schedule_ids)} schedules")
 
 def create_seat_class_features(seat_classes):
     """Create features for seat classes"""
@@ -1146,8 +1110,10 @@ def create_bookings_and_payments(users, passengers, schedules, seats, addons):
             status='confirmed'
         )
         
-        # Update seats as occupied
-        available_seats.update(is_available=False)
+        # Update seats as occupied (Seat.save() keeps SeatInventory in sync)
+        for seat in available_seats:
+            seat.is_available = False
+            seat.save()
         
         # Update booking totals
         booking.base_fare_total = booking_detail1.price + booking_detail2.price
@@ -1179,14 +1145,14 @@ def create_sample_data():
     airlines = create_airlines()
     seat_classes = create_seat_classes(airlines)
     aircrafts = create_aircrafts(airlines)
+    create_seat_layouts(aircrafts)
     airports = create_airports(countries)
     routes = create_routes(airports)
     flights = create_flights(airlines, aircrafts, routes)
     schedules = create_schedules(flights)
     
-    # Create seats for all schedules
-    for schedule in schedules:
-        create_seats_for_all_schedules([schedule], seat_classes)
+    # Seats were created from the seat layouts with each schedule
+    create_seats_for_all_schedules(schedules, seat_classes)
     
     create_seat_class_features(seat_classes)
     passengers = create_passenger_info()